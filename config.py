@@ -1,22 +1,24 @@
 import os
+import secrets
 import uuid
 from datetime import datetime, timedelta
-from typing import Annotated, List
+from typing import Annotated, Callable, FrozenSet, List
 
 from dotenv import load_dotenv
-from fastapi import Depends, HTTPException, Path, status
+from fastapi import Depends, Header, HTTPException, Path, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from crud.token_blacklist import token_blacklist_crud
 from crud.user import user_crud
 from database.database import get_db
 from models.staff import Staff
 from models.store import Store
 from schemas.users import TokenData, UserOut
 from services.permission import permission_service
+from services.token_cache import token_decode_cache
+from services.token_revocation import token_revocation_service
 
 load_dotenv()
 # Secret key for JWT
@@ -25,6 +27,8 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 REFRESH_TOKEN_EXPIRE_MINUTES = int(os.getenv("REFRESH_TOKEN_EXPIRE_MINUTES", 1440))
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/users/token")
+# Bearer token for the /metrics endpoints; unset turns them off
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -35,7 +39,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     expire = datetime.utcnow() + (
         expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": str(uuid.uuid4())})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -47,32 +51,65 @@ def create_refresh_token(data: dict, expires_delta: timedelta | None = None):
     expire = datetime.utcnow() + (
         expires_delta or timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": str(uuid.uuid4())})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    if token_blacklist_crud.get_token(db, token):
-        raise credentials_exception
 
+
+def decode_token(token: str) -> dict | None:
+    """Verify a JWT and return its claims, or None if it is invalid.
+
+    Verified claims are cached until the token's exp, so repeat bearer
+    tokens skip the signature check.
+    """
+    claims = token_decode_cache.get(token)
+    if claims is not None:
+        return claims
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
+        return None
+    token_decode_cache.set(token, claims)
+    return claims
+
+
+def get_token_claims(db: Session, token: str) -> dict:
+    """Validate a bearer token and return its claims; ``sub`` is the email"""
+    credentials_exception = _credentials_exception()
+    payload = decode_token(token)
+    if payload is None:
         raise credentials_exception
-    user = user_crud.get_user_by_email(db, email=token_data.email)
-    if user is None:
+    if token_revocation_service.is_revoked(db, payload.get("jti")):
+        raise credentials_exception
+
+    email: str = payload.get("sub")
+    if email is None:
         raise credentials_exception
+    TokenData(email=email)
+    return payload
+
+
+def is_token_current(claims: dict, user) -> bool:
+    """Tokens minted before the user's token_version was bumped are dead"""
+    return claims.get("ver") == user.token_version
+
+
+# Dependencies that use the sync Session are plain functions so FastAPI
+# runs them in its threadpool instead of blocking the event loop.
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+):
+    claims = get_token_claims(db, token)
+    user = user_crud.get_user_by_email(db, email=claims["sub"])
+    if user is None or not is_token_current(claims, user):
+        raise _credentials_exception()
     return user
 
 
@@ -82,7 +119,19 @@ async def get_current_active_user(current_user: UserOut = Depends(get_current_us
     return current_user
 
 
-async def get_current_staff(
+def _check_staff(staff: Staff | None) -> Staff:
+    if staff is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Not a staff"
+        )
+    elif not staff.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Staff is not active"
+        )
+    return staff
+
+
+def get_current_staff(
     store_id: Annotated[uuid.UUID, Path(title="store id")],
     db: Session = Depends(get_db),
     current_user: UserOut = Depends(get_current_user),
@@ -93,83 +142,96 @@ async def get_current_staff(
             Staff.store_id == store_id, Staff.user_id == current_user.id
         )
     )
-    if staff is None:
+    return _check_staff(staff)
+
+
+# ============ Operational endpoints ===============
+def require_metrics_token(authorization: str | None = Header(None)):
+    """Guard for /metrics: 404 unless METRICS_TOKEN is set, 401 without it"""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not secrets.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Not a staff"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-    elif not staff.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Staff is not active"
+
+
+# ============ Fused auth + staff + permission resolution ===============
+def store_access(
+    check: Callable[[FrozenSet[str]], bool] | None = None,
+    denied_detail: str = "Permission denied",
+):
+    """Dependency factory for store-scoped routes.
+
+    Resolves the token's user and their staff row in ``store_id`` with one
+    joined query and the staff's effective permissions from the permission
+    cache, then applies ``check`` to the permission set. Errors match ``get_current_user``,
+    ``get_current_staff`` and the permission dependencies below.
+    """
+
+    def store_access_dependency(
+        store_id: Annotated[uuid.UUID, Path(title="store id")],
+        token: str = Depends(oauth2_scheme),
+        db: Session = Depends(get_db),
+    ):
+        claims = get_token_claims(db, token)
+        user, staff, permissions = permission_service.resolve_store_access(
+            db, claims["sub"], store_id
         )
-    return staff
+        if user is None or not is_token_current(claims, user):
+            raise _credentials_exception()
+        staff = _check_staff(staff)
+        if check is not None and not check(permissions):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail=denied_detail
+            )
+        return staff
+
+    return store_access_dependency
+
+
+# Store staff membership without a permission requirement
+get_current_store_staff = store_access()
 
 
 # ============ Used for authorization based on roles ===============
 # Permission dependency factory
 def require_permission(permission: str):
     """Dependency factory for single permission"""
-
-    def permission_dependency(
-        current_staff: Staff = Depends(get_current_staff), db: Session = Depends(get_db)
-    ):
-        if not permission_service.has_permission(db, current_staff.id, permission):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Permission denied. Required: {permission}",
-            )
-        return current_staff
-
-    return permission_dependency
+    return store_access(
+        lambda permissions: permission in permissions,
+        f"Permission denied. Required: {permission}",
+    )
 
 
 def require_any_permission(permissions: List[str]):
     """Dependency factory for multiple permissions (need any one)"""
-
-    def permission_dependency(
-        current_staff: Staff = Depends(get_current_staff), db: Session = Depends(get_db)
-    ):
-        if not permission_service.has_any_permission(db, current_staff.id, permissions):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Permission denied. Required any of: {', '.join(permissions)}",
-            )
-        return current_staff
-
-    return permission_dependency
+    return store_access(
+        lambda staff_permissions: any(
+            perm in staff_permissions for perm in permissions
+        ),
+        f"Permission denied. Required any of: {', '.join(permissions)}",
+    )
 
 
 def require_all_permissions(permissions: List[str]):
     """Dependency factory for multiple permissions (need all)"""
-
-    def permission_dependency(
-        current_staff: Staff = Depends(get_current_staff), db: Session = Depends(get_db)
-    ):
-        if not permission_service.has_all_permissions(
-            db, current_staff.id, permissions
-        ):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Permission denied. Required all of: {', '.join(permissions)}",
-            )
-        return current_staff
-
-    return permission_dependency
+    return store_access(
+        lambda staff_permissions: all(
+            perm in staff_permissions for perm in permissions
+        ),
+        f"Permission denied. Required all of: {', '.join(permissions)}",
+    )
 
 
 def can_access_resource(action: str, resource: str):
     """Dependency factory for resource-action based permissions"""
-
-    def permission_dependency(
-        current_staff: Staff = Depends(get_current_staff), db: Session = Depends(get_db)
-    ):
-        if not permission_service.can(db, current_staff.id, action, resource):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Permission denied. Cannot {action} {resource}",
-            )
-        return current_staff
-
-    return permission_dependency
+    return store_access(
+        lambda permissions: f"{resource}.{action}" in permissions,
+        f"Permission denied. Cannot {action} {resource}",
+    )
 
 
 # def require_store_owner_or_staff_with_permission(permission: str):
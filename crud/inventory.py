@@ -1,14 +1,34 @@
-from fastapi import HTTPException, status, BackgroundTasks, UploadFile, File
+from fastapi import BackgroundTasks, HTTPException, status, UploadFile, File
 from uuid import UUID
-from sqlalchemy.orm import Session
-from typing import Optional
-from schemas.inventory import InventoryCreate, InventoryUpdate
+from sqlalchemy import Integer, cast, column, func, select, update, values
+from sqlalchemy.orm import Session, aliased
+from typing import List, Optional
+from crud.pagination import Page, PageParams, paginate
+from schemas.inventory import (
+    InventoryBatchUpdateItem,
+    InventoryBatchUpdateResult,
+    InventoryCreate,
+    InventoryUpdate,
+)
 from models.inventory import Inventory
-from services.mail import email_service
+from models.stock import StockMovement, StockMovementReason
 from models.store import Store
-from models.staff import Staff
-from models.user import User
-from services.image_config import image_service
+from services.inventory_cache import inventory_cache
+from services.inventory_images import inventory_image_service
+from services.product_search import product_search_service
+from services.stock_ledger import stock_ledger_service
+
+# Columns a batch update may change; None in a request leaves them as they are
+BATCH_UPDATE_FIELDS = (
+    "product_name",
+    "cost_price",
+    "selling_price",
+    "quantity",
+    "low_stock_threshold",
+    "high_stock_threshold",
+    "status",
+    "description",
+)
 
 
 class InventoryCRUD:
@@ -16,6 +36,7 @@ class InventoryCRUD:
     async def create_inventory(
         db: Session, inventory_data: InventoryCreate, created_by: UUID, store_id: UUID,
         file: UploadFile = File(None),
+        background_tasks: Optional[BackgroundTasks] = None,
     ):
         existing = (
             db.query(Inventory).filter(Inventory.sku == inventory_data.sku).first()
@@ -34,43 +55,76 @@ class InventoryCRUD:
         #         status_code=status.HTTP_400_BAD_REQUEST, detail="Store is not active"
         #     )
       
-        image_url = None
+        # Validated and spooled now, uploaded after the commit
+        image_path = None
         if file:
-            image_url = await image_service.validate_and_upload_profile_picture(file,str(created_by))
-        new_inventory = Inventory(
-            product_name=inventory_data.product_name,
-            cost_price=inventory_data.cost_price,
-            selling_price=inventory_data.selling_price,
-            sku=inventory_data.sku,
-            low_stock_threshold=inventory_data.low_stock_threshold,
-            high_stock_threshold=inventory_data.high_stock_threshold,
-            quantity=inventory_data.quantity,
-            status=inventory_data.status,
-            description=inventory_data.description,
-            expiration_date=inventory_data.expiration_date,
-            created_by=created_by,
-            store_id=store_id,
-            image_url=image_url,
-            is_active=True,
+            image_path = await inventory_image_service.stage(file)
+        try:
+            new_inventory = Inventory(
+                product_name=inventory_data.product_name,
+                cost_price=inventory_data.cost_price,
+                selling_price=inventory_data.selling_price,
+                sku=inventory_data.sku,
+                low_stock_threshold=inventory_data.low_stock_threshold,
+                high_stock_threshold=inventory_data.high_stock_threshold,
+                quantity=inventory_data.quantity,
+                status=inventory_data.status,
+                description=inventory_data.description,
+                expiration_date=inventory_data.expiration_date,
+                created_by=created_by,
+                store_id=store_id,
+                is_active=True,
+            )
+            if image_path:
+                inventory_image_service.mark_pending(new_inventory)
+            new_inventory.track_low_stock()
+            db.add(new_inventory)
+            if new_inventory.quantity:
+                db.add(
+                    StockMovement(
+                        inventory=new_inventory,
+                        store_id=store_id,
+                        delta=new_inventory.quantity,
+                        reason=StockMovementReason.CREATE,
+                        created_by=created_by,
+                    )
+                )
+            inventory_cache.bump(db, store_id)
+            db.commit()
+            db.refresh(new_inventory)
+        except BaseException:
+            # Never scheduled, so process() will not remove it
+            inventory_image_service.discard(image_path)
+            raise
+        product_search_service.add(
+            store_id, new_inventory.id, new_inventory.product_name, new_inventory.sku
         )
-        db.add(new_inventory)
-        db.commit()
-        db.refresh(new_inventory)
+        if image_path:
+            await inventory_image_service.schedule(
+                background_tasks, new_inventory, image_path, file.filename
+            )
         return new_inventory
 
     @staticmethod
-    def get_inventory(db: Session):
-        return db.query(Inventory).filter(Inventory.is_active == True).all()
+    def get_inventory(db: Session, page: PageParams = PageParams()) -> Page:
+        return paginate(
+            db, select(Inventory).where(Inventory.is_active == True), [Inventory.id], page
+        )
 
     # get inventory by store id
     @staticmethod
-    def get_inventory_by_store_id(db: Session, store_id: UUID):
-        inventory = (
-            db.query(Inventory)
-            .filter(Inventory.store_id == store_id, Inventory.is_active == True)
-            .all()
+    def get_inventory_by_store_id(
+        db: Session, store_id: UUID, page: PageParams = PageParams()
+    ) -> Page:
+        inventory = paginate(
+            db,
+            select(Inventory).where(
+                Inventory.store_id == store_id, Inventory.is_active == True
+            ),
+            [Inventory.created_at, Inventory.id],
+            page,
         )
-        if not inventory:
+        if not inventory.items and not page.cursor:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No inventory found for this store",
@@ -96,7 +150,8 @@ class InventoryCRUD:
         inventory_id: UUID,
         inventory_data: InventoryUpdate,
         file: Optional [UploadFile] = File(None),
-        background_tasks: BackgroundTasks = None,
+        background_tasks: Optional[BackgroundTasks] = None,
+        updated_by: Optional[UUID] = None,
     ):
         inventory = db.query(Inventory).filter(Inventory.id == inventory_id).first()
         if not inventory:
@@ -108,40 +163,176 @@ class InventoryCRUD:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Inventory item is not active"
             )
+        # The current image_url stays until the new upload is ready
+        image_path = None
         if file and file.filename:
-            image_url = await image_service.validate_and_upload_profile_picture(file, str(inventory.created_by))
-            inventory.image_url = image_url 
-        for key, value in inventory_data.dict(exclude_unset=True).items():
-            if value is not None:
-              setattr(inventory, key, value)
+            image_path = await inventory_image_service.stage(file)
+        # Locked only now, after the image is spooled, and re-read so the
+        # ledger delta is taken against the committed quantity
+        try:
+            db.refresh(inventory, with_for_update=True)
+            if image_path:
+                inventory_image_service.mark_pending(inventory)
+            previous_quantity = inventory.quantity
+            for key, value in inventory_data.dict(exclude_unset=True).items():
+                if value is not None:
+                  setattr(inventory, key, value)
+            if inventory.quantity != previous_quantity:
+                db.add(
+                    StockMovement(
+                        inventory_id=inventory.id,
+                        store_id=inventory.store_id,
+                        delta=inventory.quantity - previous_quantity,
+                        reason=StockMovementReason.ADJUSTMENT,
+                        created_by=updated_by,
+                    )
+                )
+
+            # Digested by services.low_stock rather than emailed on every edit
+            inventory.track_low_stock()
+            inventory_cache.bump(db, inventory.store_id)
+
+            db.commit()
+            db.refresh(inventory)
+        except BaseException:
+            inventory_image_service.discard(image_path)
+            raise
+        product_search_service.add(
+            inventory.store_id, inventory.id, inventory.product_name, inventory.sku
+        )
+        if image_path:
+            await inventory_image_service.schedule(
+                background_tasks, inventory, image_path, file.filename
+            )
+        return inventory
 
+    @staticmethod
+    def batch_update_inventory(
+        db: Session,
+        store_id: UUID,
+        items: List[InventoryBatchUpdateItem],
+        updated_by: Optional[UUID] = None,
+    ) -> List[InventoryBatchUpdateResult]:
+        """Apply many item updates with one UPDATE ... FROM (VALUES ...).
+
+        SKUs are resolved to ids with one query and everything is committed
+        in a single transaction; low_stock_since is kept in the same UPDATE,
+        and quantity changes go to the stock ledger in one more INSERT.
+        """
+        results = [
+            InventoryBatchUpdateResult(
+                index=index, inventory_id=item.inventory_id, sku=item.sku, updated=False
+            )
+            for index, item in enumerate(items)
+        ]
+        skus = {item.sku for item in items if item.sku is not None}
+        ids_by_sku = {}
+        if skus:
+            ids_by_sku = dict(
+                db.execute(
+                    select(Inventory.sku, Inventory.id).where(
+                        Inventory.store_id == store_id,
+                        Inventory.sku.in_(skus),
+                        Inventory.is_active == True,
+                    )
+                ).all()
+            )
+
+        rows = []
+        seen = set()
+        for result, item in zip(results, items):
+            inventory_id = item.inventory_id or ids_by_sku.get(item.sku)
+            if inventory_id is None:
+                result.detail = "Inventory item not found"
+            elif inventory_id in seen:
+                result.detail = "Item appears more than once in the batch"
+            else:
+                seen.add(inventory_id)
+                rows.append(
+                    (result.index, inventory_id)
+                    + tuple(getattr(item, field) for field in BATCH_UPDATE_FIELDS)
+                )
+
+        if rows:
+            table = Inventory.__table__
+            changes = values(
+                column("idx", Integer),
+                column("id", table.c.id.type),
+                *(column(field, table.c[field].type) for field in BATCH_UPDATE_FIELDS),
+                name="changes",
+            ).data(rows)
+            # Untyped NULLs in VALUES resolve to text, so cast to the column types
+            typed = {
+                name: cast(changes.c[name], table.c[name].type)
+                for name in ("id",) + BATCH_UPDATE_FIELDS
+            }
+            new = {
+                field: func.coalesce(typed[field], table.c[field])
+                for field in BATCH_UPDATE_FIELDS
+            }
+            # The pre-update quantities, locked so the ledger deltas are exact.
+            # Locked in id order, like sales, so the two cannot deadlock.
+            before = aliased(Inventory)
+            prior = (
+                select(before.id, before.quantity)
+                .where(before.id.in_([row[1] for row in rows]))
+                .order_by(before.id)
+                .with_for_update()
+                .subquery("prior")
+            )
+            updated = db.execute(
+                update(Inventory)
+                .where(
+                    Inventory.id == typed["id"],
+                    Inventory.id == prior.c.id,
+                    Inventory.store_id == store_id,
+                    Inventory.is_active == True,
+                )
+                .values(
+                    {
+                        **new,
+                        "low_stock_since": Inventory.low_stock_since_for(
+                            new["quantity"], new["low_stock_threshold"]
+                        ),
+                    }
+                )
+                .returning(
+                    changes.c.idx,
+                    Inventory.id,
+                    Inventory.sku,
+                    prior.c.quantity,
+                    Inventory.quantity,
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+            movements = []
+            for index, inventory_id, sku, old_quantity, quantity in updated:
+                results[index].inventory_id = inventory_id
+                results[index].sku = sku
+                results[index].updated = True
+                if quantity != old_quantity:
+                    movements.append(
+                        {
+                            "inventory_id": inventory_id,
+                            "store_id": store_id,
+                            "delta": quantity - old_quantity,
+                            "reason": StockMovementReason.ADJUSTMENT,
+                            "created_by": updated_by,
+                        }
+                    )
+            stock_ledger_service.record(db, movements)
+            for result in results:
+                if not result.updated and result.detail is None:
+                    result.detail = "Inventory item not found"
+            if updated:
+                inventory_cache.bump(db, store_id)
         db.commit()
-        db.refresh(inventory)
-        # Low stock notification logic
-        if inventory.quantity is not None and inventory.low_stock_threshold is not None:
-            if inventory.quantity <= inventory.low_stock_threshold:
-                # Get store and staff emails
-                store = db.query(Store).filter(Store.id == inventory.store_id).first()
-                staff_users = (
-                    db.query(User)
-                    .join(Staff, Staff.user_id == User.id)
-                    .filter(Staff.store_id == store.id)
-                    .all()
+        for result, item in zip(results, items):
+            if result.updated and item.product_name is not None:
+                product_search_service.add(
+                    store_id, result.inventory_id, item.product_name, result.sku
                 )
-                owner = db.query(User).filter(User.id == store.user_id).first()
-                emails = [user.email for user in staff_users]
-                if owner and owner.email not in emails:
-                    emails.append(owner.email)
-                # Send emails in background
-                if background_tasks:
-                    for email in emails:
-                        background_tasks.add_task(
-                            email_service.send_email,
-                            email=email,
-                            subject=f"Low Stock Alert: {inventory.product_name}",
-                            body=f"The inventory for {inventory.product_name} is low (current: {inventory.quantity}). Please restock soon.",
-                        )
-        return inventory
+        return results
 
     @staticmethod
     def delete_inventory(db: Session, inventory_id: UUID):
@@ -151,9 +342,12 @@ class InventoryCRUD:
                 status_code=status.HTTP_404_NOT_FOUND, detail="Inventory item not found"
             )
         inventory.is_active = False
+        inventory.low_stock_since = None
+        inventory_cache.bump(db, inventory.store_id)
 
         db.commit()
         db.refresh(inventory)
+        product_search_service.remove(inventory.store_id, inventory.id)
         return {"detail": "Inventory item deleted successfully"}
 
 
@@ -0,0 +1,121 @@
+import base64
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", 50))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 200))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams(NamedTuple):
+    cursor: Optional[str] = None
+    limit: int = PAGE_SIZE_DEFAULT
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def page_params(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+) -> PageParams:
+    return PageParams(cursor=cursor, limit=limit)
+
+
+def set_next_cursor(response: Response, page: Page):
+    """Expose the next cursor as a header so list bodies keep their shape"""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+
+
+def _invalid_cursor():
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor"
+    )
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([str(value) if value is not None else None for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        return [_parse(key, value) for key, value in zip(keys, values)]
+    except (ValueError, TypeError):
+        raise _invalid_cursor()
+
+
+def _parse(key, value):
+    python_type = key.type.python_type
+    if value is None:
+        raise ValueError
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    return python_type(value)
+
+
+def _page_statement(
+    stmt: Select, keys: Sequence, params: PageParams, descending: bool
+) -> Select:
+    if params.cursor:
+        after = decode_cursor(params.cursor, keys)
+        if len(keys) == 1:
+            left, right = keys[0], after[0]
+        else:
+            left, right = tuple_(*keys), tuple_(*after)
+        stmt = stmt.where(left < right if descending else left > right)
+    order = [key.desc() if descending else key.asc() for key in keys]
+    return stmt.order_by(*order).limit(params.limit + 1)
+
+
+def _page(rows: Sequence, keys: Sequence, limit: int) -> Page:
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return Page(items, None)
+    last = items[-1]
+    return Page(items, encode_cursor([getattr(last, key.key) for key in keys]))
+
+
+def paginate(
+    db: Session,
+    stmt: Select,
+    keys: Sequence,
+    params: PageParams = PageParams(),
+    descending: bool = False,
+) -> Page:
+    """Run ``stmt`` as one keyset page ordered by ``keys``.
+
+    ``keys`` must be mapped columns whose values together are unique
+    (end them with the primary key) so the ordering is stable. One extra
+    row is fetched to tell whether another page exists.
+    """
+    rows = db.scalars(_page_statement(stmt, keys, params, descending)).all()
+    return _page(rows, keys, params.limit)
+
+
+async def paginate_async(
+    db: AsyncSession,
+    stmt: Select,
+    keys: Sequence,
+    params: PageParams = PageParams(),
+    descending: bool = False,
+) -> Page:
+    rows = (await db.scalars(_page_statement(stmt, keys, params, descending))).all()
+    return _page(rows, keys, params.limit)
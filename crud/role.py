@@ -1,16 +1,19 @@
+from uuid import UUID
+
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from crud.pagination import Page, PageParams, paginate, paginate_async
 from models.role import Role
 from models.staff import Staff
 
 
 class RoleCRUD:
     @staticmethod
-    def get_roles(db: Session):
-        roles = db.scalars(select(Role)).all()
-        return roles
+    def get_roles(db: Session, page: PageParams = PageParams()) -> Page:
+        return paginate(db, select(Role), [Role.id], page)
 
     @staticmethod
     def get_role_by_name(db: Session, name: str):
@@ -19,6 +22,8 @@ class RoleCRUD:
 
     @staticmethod
     def grant_role(db: Session, staff: Staff, role_name: str):
+        """Set the staff's role. Callers invalidate permission_cache after
+        committing, or a read in between re-caches the old role."""
         role = RoleCRUD.get_role_by_name(db, role_name)
         if role is None:
             raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Role not found")
@@ -28,3 +33,20 @@ class RoleCRUD:
 
 
 role_crud = RoleCRUD()
+
+
+class AsyncRoleCRUD:
+    @staticmethod
+    async def get_store_roles(
+        db: AsyncSession, store_id: UUID, page: PageParams = PageParams()
+    ) -> Page:
+        """Roles defined for the store plus the global ones"""
+        return await paginate_async(
+            db,
+            select(Role).where(or_(Role.store_id == store_id, Role.store_id == None)),
+            [Role.id],
+            page,
+        )
+
+
+async_role_crud = AsyncRoleCRUD()
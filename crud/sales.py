@@ -1,20 +1,53 @@
-from sqlalchemy.orm import Session
+from typing import Iterable, List, Set, Tuple
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
-from uuid import UUID
+from uuid import UUID, uuid4
 from models.sales import Sale, SaleItem
 from models.inventory import Inventory
+from models.stock import StockMovement, StockMovementReason
 from schemas.sales import SaleCreate
+from crud.pagination import Page, PageParams, paginate_async
+from services.inventory_cache import inventory_cache
 
 
 class SalesCRUD:
+    """Session-agnostic statements and sale building for AsyncSalesCRUD"""
+
+    @staticmethod
+    def inventory_query(sale_data: SaleCreate) -> Select:
+        """Every inventory row the sale touches, in one query.
+
+        The rows are locked, in id order so concurrent sales cannot
+        deadlock, so the decrement and its ledger delta cannot lose an
+        update.
+        """
+        return (
+            select(Inventory)
+            .where(Inventory.id.in_({item.inventory_id for item in sale_data.items}))
+            .order_by(Inventory.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+
     @staticmethod
-    def create_sale(db: Session, sale_data: SaleCreate, created_by: UUID):
+    def build_sale(
+        sale_data: SaleCreate, inventories: Iterable[Inventory]
+    ) -> Tuple[Sale, List[StockMovement], Set[UUID]]:
+        """Check stock, decrement it and build the sale with its items.
+
+        Returns the sale, its stock movements and the stores it touched.
+        """
+        by_id = {inventory.id: inventory for inventory in inventories}
         total = 0
+        sale_id = uuid4()
         sale_items = []
+        movements = []
+        store_ids = set()
         for item in sale_data.items:
-            inventory = (
-                db.query(Inventory).filter(Inventory.id == item.inventory_id).first()
-            )
+            inventory = by_id.get(item.inventory_id)
             if not inventory:
                 raise HTTPException(
                     status_code=404,
@@ -26,13 +59,24 @@ class SalesCRUD:
                     detail=f"Insufficient stock for {inventory.product_name}",
                 )
             inventory.quantity -= item.quantity
-            db.add(inventory)
+            inventory.track_low_stock()
+            store_ids.add(inventory.store_id)
+            movements.append(
+                StockMovement(
+                    inventory_id=inventory.id,
+                    store_id=inventory.store_id,
+                    delta=-item.quantity,
+                    reason=StockMovementReason.SALE,
+                    reference_id=sale_id,
+                    created_by=sale_data.staff_id,
+                )
+            )
             sale_items.append(
                 SaleItem(
                     inventory_id=item.inventory_id,
                     quantity=item.quantity,
                     price=item.price,
-                    product_name: inventory.product_name,
+                    product_name=inventory.product_name,
                 )
             )
             total += item.price * item.quantity
@@ -45,6 +89,7 @@ class SalesCRUD:
         )
 
         sale = Sale(
+            id=sale_id,
             store_id=sale_data.store_id,
             total_amount=total,
             amount_paid=sale_data.amount_paid,
@@ -54,39 +99,70 @@ class SalesCRUD:
             created_by=sale_data.staff_id,
             items=sale_items,
         )
+        return sale, movements, store_ids
+
+    # Newest first, with the id breaking ties
+    PAGE_KEYS = (Sale.created_at, Sale.id)
+
+    @staticmethod
+    def store_sales(store_id: UUID) -> Select:
+        """A store's live sales with their items, for paginating on PAGE_KEYS"""
+        return (
+            select(Sale)
+            .options(selectinload(Sale.items))
+            .where(Sale.store_id == store_id, Sale.is_deleted == False)
+        )
+
+    @staticmethod
+    def stats_query(store_id: UUID) -> Select:
+        """Count, revenue and outstanding balance, aggregated in SQL"""
+        return select(
+            func.count(Sale.id),
+            func.coalesce(func.sum(Sale.total_amount), 0),
+            func.coalesce(func.sum(Sale.outstanding_balance), 0),
+        ).where(Sale.store_id == store_id, Sale.is_deleted == False)
+
+
+class AsyncSalesCRUD:
+    """Sales on AsyncSession; sale items are loaded eagerly for SaleOut"""
+
+    @staticmethod
+    async def create_sale(db: AsyncSession, sale_data: SaleCreate, created_by: UUID):
+        sale, movements, store_ids = SalesCRUD.build_sale(
+            sale_data, await db.scalars(SalesCRUD.inventory_query(sale_data))
+        )
         db.add(sale)
-        db.commit()
-        db.refresh(sale)
+        db.add_all(movements)
+        await inventory_cache.bump_async(db, *store_ids)
+        await db.commit()
         return sale
 
-    def get_all_sales(self, db: Session, store_id: UUID):
-        return (
-            db.query(Sale)
-            .filter(Sale.store_id == store_id, Sale.is_deleted == False)
-            .all()
+    @staticmethod
+    async def get_all_sales(
+        db: AsyncSession, store_id: UUID, page: PageParams = PageParams()
+    ) -> Page:
+        """Newest first"""
+        return await paginate_async(
+            db, SalesCRUD.store_sales(store_id), SalesCRUD.PAGE_KEYS, page, descending=True
         )
 
-    def delete_sale(self, db: Session, sale_id: UUID, staff_id: UUID):
-        sale = (
-            db.query(Sale).filter(Sale.id == sale_id, Sale.is_deleted == False).first()
+    @staticmethod
+    async def delete_sale(db: AsyncSession, sale_id: UUID, staff_id: UUID):
+        sale = await db.scalar(
+            select(Sale).where(Sale.id == sale_id, Sale.is_deleted == False)
         )
         if not sale:
             raise HTTPException(status_code=404, detail="Sale not found")
         sale.is_deleted = True
         sale.deleted_by = staff_id
-        db.add(sale)
-        db.commit()
+        await db.commit()
 
-    def get_sales_stats(self, db: Session, store_id: UUID):
-        sales = (
-            db.query(Sale)
-            .filter(Sale.store_id == store_id, Sale.is_deleted == False)
-            .all()
-        )
-        total_sales = len(sales)
-        revenue_generated = sum(s.total_amount for s in sales)
+    @staticmethod
+    async def get_sales_stats(db: AsyncSession, store_id: UUID):
+        total_sales, revenue_generated, outstanding = (
+            await db.execute(SalesCRUD.stats_query(store_id))
+        ).one()
         avg_sales_value = revenue_generated / total_sales if total_sales else 0
-        outstanding = sum(s.outstanding_balance for s in sales)
         return {
             "total_sales": total_sales,
             "revenue_generated": revenue_generated,
@@ -95,4 +171,4 @@ class SalesCRUD:
         }
 
 
-sales_crud = SalesCRUD()
+async_sales_crud = AsyncSalesCRUD()
@@ -1,10 +1,10 @@
-from typing import Sequence
 from uuid import UUID
 
 from fastapi import HTTPException, status
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
+from crud.pagination import Page, PageParams, paginate
 from models.staff import Staff, StaffStatus
 from models.store import Store
 from models.user import User
@@ -68,9 +68,17 @@ class StaffCRUD:
         return staff
 
     @staticmethod
-    def get_all_store_staffs(db: Session, store_id: UUID) -> Sequence[Staff]:
-        staff_list = db.scalars(select(Staff).where(Staff.store_id == store_id, Staff.is_active == True)).all()
-        return staff_list
+    def get_all_store_staffs(
+        db: Session, store_id: UUID, page: PageParams = PageParams()
+    ) -> Page:
+        return paginate(
+            db,
+            select(Staff)
+            .where(Staff.store_id == store_id, Staff.is_active == True)
+            .options(selectinload(Staff.user), selectinload(Staff.role)),
+            [Staff.id],
+            page,
+        )
 
 
 staff_crud = StaffCRUD()
@@ -1,7 +1,8 @@
-from typing import List, Union
+from datetime import datetime
+from typing import List, Sequence, Tuple, Union
 
-from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from models.token_blacklist import TokenBlacklist
@@ -9,27 +10,50 @@ from models.token_blacklist import TokenBlacklist
 
 class TokenBlacklistCRUD:
     @staticmethod
-    def get_token(db: Session, token: str) -> Union[TokenBlacklist, None]:
-        token = db.scalar(select(TokenBlacklist).where(TokenBlacklist.token == token))
+    def get_token(db: Session, jti: str) -> Union[TokenBlacklist, None]:
+        token = db.scalar(select(TokenBlacklist).where(TokenBlacklist.jti == jti))
         return token
 
     @staticmethod
-    def add_token(db: Session, token: str) -> TokenBlacklist:
-        new_token = TokenBlacklist(token=token)
-        db.add(new_token)
+    def add_tokens(db: Session, tokens: List[Tuple[str, datetime]]):
+        """Stamped with the statement's clock rather than the transaction
+        start and committed straight away, so a row is visible to other
+        workers within moments of its revoked_at"""
+        db.execute(
+            insert(TokenBlacklist)
+            .values(
+                [
+                    {"jti": jti, "expires_at": expires_at, "revoked_at": func.clock_timestamp()}
+                    for jti, expires_at in tokens
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[TokenBlacklist.jti])
+        )
         db.commit()
-        db.refresh(new_token)
-        return new_token
+
+        return True
 
     @staticmethod
-    def add_tokens(db: Session, tokens: List[str]):
-        for token in tokens:
-            new_token = TokenBlacklist(token=token)
-            db.add(new_token)
+    def get_revoked_since(
+        db: Session, since: Union[datetime, None], now: datetime
+    ) -> Sequence[Tuple[str, datetime, datetime]]:
+        """Unexpired (jti, expires_at, revoked_at) rows revoked at or after
+        ``since`` (all if None); ``since`` is a revoked_at value, i.e. DB time"""
+        query = select(
+            TokenBlacklist.jti, TokenBlacklist.expires_at, TokenBlacklist.revoked_at
+        ).where(TokenBlacklist.expires_at > now)
+        if since is not None:
+            query = query.where(TokenBlacklist.revoked_at >= since)
+        return db.execute(query).all()
 
+    @staticmethod
+    def prune_expired(db: Session, now: datetime) -> int:
+        """Delete revocations for tokens that have expired anyway"""
+        deleted = db.execute(
+            delete(TokenBlacklist).where(TokenBlacklist.expires_at <= now)
+        ).rowcount
         db.commit()
-
-        return True
+        return deleted
 
 
 token_blacklist_crud = TokenBlacklistCRUD()
@@ -1,14 +1,18 @@
 from fastapi import HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from dependencies.auth import get_password_hash
+from crud.pagination import Page, PageParams, paginate
+from dependencies.auth import password_hasher
 from models.user import User
 from schemas.users import UserCreate, UserUpdate
 
 
 class UserCRUD:
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate, is_active: bool = True) -> User:
+    async def create_user(
+        db: Session, user_data: UserCreate, is_active: bool = True
+    ) -> User:
         # Check if username exists
         existing_user = (
             db.query(User)
@@ -34,13 +38,15 @@ class UserCRUD:
                     )
                 # Reactivate with updated username & password
                 existing_user.username = user_data.username
-                existing_user.password_hash = get_password_hash(user_data.password)
+                existing_user.password_hash = await password_hasher.hash(
+                    user_data.password
+                )
                 existing_user.is_active = True
                 db.commit()
                 db.refresh(existing_user)
                 return existing_user
         # Create new user
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await password_hasher.hash(user_data.password)
         new_user = User(
             username=user_data.username,
             email=user_data.email,
@@ -53,9 +59,8 @@ class UserCRUD:
         return new_user
 
     @staticmethod
-    def get_users(db: Session):
-        users = db.query(User).all()
-        return users
+    def get_users(db: Session, page: PageParams = PageParams()) -> Page:
+        return paginate(db, select(User), [User.id], page)
 
     @staticmethod
     def get_user_by_id(db: Session, user_id: str):
@@ -108,13 +113,15 @@ class UserCRUD:
         return user
 
     @staticmethod
-    def update_password(db: Session, user: User, new_password: str):
+    async def update_password(db: Session, user: User, new_password: str):
         # check if user is active
         if not user.is_active:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="User is not active"
             )
-        user.password_hash = get_password_hash(new_password)
+        user.password_hash = await password_hasher.hash(new_password)
+        # Log out everywhere: tokens carrying the old version stop validating
+        user.token_version = User.token_version + 1
         db.commit()
         db.refresh(user)
         return user
@@ -135,6 +142,7 @@ class UserCRUD:
             )
         # Soft delete the user
         user.is_active = False
+        user.token_version = User.token_version + 1
         db.commit()
         db.refresh(user)
         return user
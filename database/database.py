@@ -1,22 +1,167 @@
+import time
+from typing import Dict
+
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import  sessionmaker, declarative_base
 from dotenv import load_dotenv
 import os
 
+from database.pool import PoolMetrics, pool_options
+
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL") 
+DATABASE_URL = os.getenv("DATABASE_URL")
+# Read replica; GET routes read from the primary when it is not configured
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+# How long after a write a client keeps reading from the primary
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+READ_PRIMARY_COOKIE = "read_primary_until"
+READ_PRIMARY_HEADER = "X-Read-Primary"
+
+pool_metrics: Dict[str, PoolMetrics] = {
+    "primary": PoolMetrics(),
+    "primary_async": PoolMetrics(),
+    "replica": PoolMetrics(),
+    "replica_async": PoolMetrics(),
+}
+
+
+def _read_only(engine):
+    # Replica sessions run in read-only transactions so a stray write fails
+    # loudly instead of diverging from the primary.
+    if engine.dialect.name == "postgresql":
+        return engine.execution_options(postgresql_readonly=True)
+    return engine
 
-engine = create_engine(DATABASE_URL)
+
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL, pool_metrics["primary"]))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+read_engine = (
+    create_engine(
+        REPLICA_DATABASE_URL,
+        **pool_options(REPLICA_DATABASE_URL, pool_metrics["replica"]),
+    )
+    if REPLICA_DATABASE_URL
+    else engine
+)
+ReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=_read_only(read_engine)
+)
 
-Base.metadata.create_all(bind=engine)
+Base = declarative_base()
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def reads_from_primary(request: Request) -> bool:
+    """True when the client just wrote and must see its own writes"""
+    if request.headers.get(READ_PRIMARY_HEADER) == "1":
+        return True
+    try:
+        pinned_until = float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+    except ValueError:
+        return False
+    return pinned_until > time.time()
+
+
+def get_read_db(request: Request):
+    """Read-only session on the replica, or the primary after a recent write"""
+    factory = SessionLocal if reads_from_primary(request) else ReadSessionLocal
+    db = factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# ============ Async engine for async route handlers ===============
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def get_async_database_url(url: str | None = None) -> str:
+    """ASYNC_DATABASE_URL, or the given URL with its driver swapped for an async one"""
+    if url is None:
+        override = os.getenv("ASYNC_DATABASE_URL")
+        if override:
+            return override
+        url = DATABASE_URL
+    url = make_url(url)
+    backend = url.get_backend_name()
+    return url.set(drivername=ASYNC_DRIVERS.get(backend, url.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+_async_engines = {}
+_async_session_factories = {}
+
+
+def get_async_engine(name: str = "primary"):
+    # Built on first use so sync-only processes never import the async driver
+    if name not in _async_engines:
+        if name == "replica" and not REPLICA_DATABASE_URL:
+            _async_engines[name] = get_async_engine("primary")
+        else:
+            url = get_async_database_url(
+                REPLICA_DATABASE_URL if name == "replica" else None
+            )
+            _async_engines[name] = create_async_engine(
+                url, **pool_options(url, pool_metrics[f"{name}_async"], is_async=True)
+            )
+        bind = _async_engines[name]
+        if name == "replica":
+            bind = _read_only(bind)
+        _async_session_factories[name] = async_sessionmaker(
+            bind, autoflush=False, expire_on_commit=False
+        )
+    return _async_engines[name]
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_session_factories["primary"]()
+
+
+def AsyncReadSessionLocal() -> AsyncSession:
+    get_async_engine("replica")
+    return _async_session_factories["replica"]()
+
+
+def get_pool_stats():
+    """Live pool occupancy plus checkout wait/failure counters per engine"""
+    stats = {"primary": pool_metrics["primary"].snapshot(engine.pool)}
+    if read_engine is not engine:
+        stats["replica"] = pool_metrics["replica"].snapshot(read_engine.pool)
+    for name, async_engine in _async_engines.items():
+        if name == "replica" and async_engine is _async_engines.get("primary"):
+            continue
+        stats[f"{name}_async"] = pool_metrics[f"{name}_async"].snapshot(
+            async_engine.pool
+        )
+    return stats
+
+
+async def dispose_async_engine():
+    for async_engine in set(_async_engines.values()):
+        await async_engine.dispose()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db(request: Request):
+    """Async counterpart of get_read_db"""
+    factory = AsyncSessionLocal if reads_from_primary(request) else AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
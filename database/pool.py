@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+
+
+class PoolMetrics:
+    """Checkout counters for one connection pool.
+
+    ``wait_seconds`` is time spent inside pool checkout (queueing for a free
+    connection or opening a new one), which is what separates pool
+    starvation from slow queries.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+
+    def record(self, waited: float, failed: bool = False):
+        with self._lock:
+            if failed:
+                self.checkout_failures += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def snapshot(self, pool=None) -> Dict:
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "wait_seconds": round(self.wait_seconds, 6),
+                "max_wait_seconds": round(self.max_wait_seconds, 6),
+                "avg_wait_seconds": round(self.wait_seconds / self.checkouts, 6)
+                if self.checkouts
+                else 0.0,
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                overflow=max(pool.overflow(), 0),
+                idle=pool.checkedin(),
+            )
+        return stats
+
+
+def _instrumented(base):
+    class InstrumentedPool(base):
+        metrics: PoolMetrics
+
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                record = super()._do_get()
+            except (exc.TimeoutError, exc.DBAPIError, OSError):
+                self.metrics.record(time.perf_counter() - start, failed=True)
+                raise
+            self.metrics.record(time.perf_counter() - start)
+            return record
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+def pool_options(url: str, metrics: PoolMetrics, is_async: bool = False) -> Dict:
+    """create_engine keyword arguments for a settings-driven, instrumented pool"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    pool_class = _instrumented(AsyncAdaptedQueuePool if is_async else QueuePool)
+    pool_class.metrics = metrics
+    return {
+        "poolclass": pool_class,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
@@ -0,0 +1,105 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Tuple, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# A statement shape repeated more often than this in one request is reported
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))
+
+_IN_LIST = re.compile(r"IN \((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with expanded IN lists collapsed.
+
+    Parameters are already bound out of the SQL, so this is enough for two
+    executions of the same query to compare equal.
+    """
+    return _WHITESPACE.sub(" ", _IN_LIST.sub("IN (...)", statement)).strip()
+
+
+class QueryStats:
+    """Statements run and time spent in the database for one unit of work"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.duration += elapsed
+            self.shapes[shape] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Shapes that ran more than ``threshold`` times, most frequent first"""
+        with self._lock:
+            return [
+                (shape, count)
+                for shape, count in self.shapes.most_common()
+                if count > threshold
+            ]
+
+
+_current_stats: ContextVar[Union[QueryStats, None]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+def current_query_stats() -> Union[QueryStats, None]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries():
+    """Count every statement run in this context, including threadpool work
+    started from it, on any engine."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def warn_on_repeated_queries(stats: QueryStats, label: str):
+    for shape, count in stats.repeated():
+        logger.warning(
+            "Possible N+1 in %s: statement ran %d times: %s", label, count, shape
+        )
+
+
+# Listening on the Engine class covers the primary, the replica and the
+# sync engines behind the async ones.
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None and conn.info.get("query_start"):
+        stats.record(statement, time.perf_counter() - conn.info["query_start"].pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_timer(context):
+    # after_cursor_execute never fires for a failed statement
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
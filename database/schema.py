@@ -0,0 +1,121 @@
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, Table, exc, inspect, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+from sqlalchemy.types import SchemaType
+
+from database.database import Base, engine
+from database.seed_data import PERMISSIONS, ROLES, seed_data
+
+# Arbitrary key for the advisory lock that serialises schema setup
+SCHEMA_LOCK_KEY = 0x5E7A_1E5
+# Tables no model maps any more; dropped on the next schema change
+RETIRED_TABLES = ("token_blacklist",)
+
+schema_version = Table(
+    "schema_version",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", String(64), nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow, nullable=False),
+)
+
+
+def schema_fingerprint() -> str:
+    """Hash of the DDL for every mapped table plus the seed data.
+
+    Any model or seed change produces a new version, so nothing has to be
+    bumped by hand. Models must be imported before calling this.
+    """
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=engine.dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=engine.dialect)).encode())
+    digest.update(repr((PERMISSIONS, ROLES, RETIRED_TABLES)).encode())
+    return digest.hexdigest()
+
+
+def current_schema_version():
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(schema_version.c.version).where(schema_version.c.id == 1)
+            ).scalar()
+    except exc.ProgrammingError:
+        # First boot: the marker table does not exist yet
+        return None
+
+
+def add_missing_columns(conn):
+    """ALTER existing tables to add columns declared since they were created.
+
+    New columns must be nullable or have a server default. A column whose
+    ``info`` has a "backfill" statement gets it run once, right after it is
+    added; ensure_schema does the same for tables.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if isinstance(column.type, SchemaType):
+                # e.g. the ENUM type behind the column
+                column.type.create(conn, checkfirst=True)
+            ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+            if "backfill" in column.info:
+                conn.execute(text(column.info["backfill"]))
+
+
+def ensure_schema():
+    """Create tables and seed data unless the database is already at this version.
+
+    A matching version costs one indexed SELECT. Otherwise the DDL, the seed
+    and the version marker are applied in one transaction under an advisory
+    lock, so workers booting together wait for the first one instead of
+    racing it.
+    """
+    version = schema_fingerprint()
+    if current_schema_version() == version:
+        return False
+
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        for name in RETIRED_TABLES:
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        add_missing_columns(conn)
+        inspector = inspect(conn)
+        new_tables = [
+            table
+            for table in Base.metadata.sorted_tables
+            if not inspector.has_table(table.name)
+        ]
+        Base.metadata.create_all(bind=conn)
+        for table in new_tables:
+            if "backfill" in table.info:
+                conn.execute(text(table.info["backfill"]))
+        # create_all skips existing tables, so add indexes declared since
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        applied = conn.execute(
+            select(schema_version.c.version).where(schema_version.c.id == 1)
+        ).scalar()
+        if applied == version:
+            return False
+        seed_data(conn)
+        conn.execute(
+            insert(schema_version)
+            .values(id=1, version=version)
+            .on_conflict_do_update(
+                index_elements=[schema_version.c.id],
+                set_={"version": version, "applied_at": datetime.utcnow()},
+            )
+        )
+    return True
@@ -1,83 +1,98 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
 
-from database.database import SessionLocal
-from models.role import Permission, Role
+from database.database import engine
+from models.role import Permission, Role, role_permissions
 
+PERMISSIONS = [
+    ("products.view", "products", "view"),
+    ("products.create", "products", "create"),
+    ("products.edit", "products", "edit"),
+    ("products.delete", "products", "delete"),
+    ("sales.view", "sales", "view"),
+    ("sales.create", "sales", "create"),
+    ("sales.delete", "sales", "delete"),
+    ("sales.edit", "sales", "edit"),
+    ("staff.view", "staff", "view"),
+    ("staff.create", "staff", "create"),
+    ("staff.invite", "staff", "invite"),
+    ("staff.delete", "staff", "delete"),
+    ("roles.manage", "roles", "manage"),
+    ("analytics.view", "analytics", "view"),
+]
 
-def seed_data():
-    """Seed initial data"""
-    db: Session = SessionLocal()
-    # Create permissions
-    permissions_data = [
-        ("products.view", "products", "view"),
-        ("products.create", "products", "create"),
-        ("products.edit", "products", "edit"),
-        ("products.delete", "products", "delete"),
-        ("sales.view", "sales", "view"),
-        ("sales.create", "sales", "create"),
-        ("sales.delete", "sales", "delete"),
-        ("sales.edit", "sales", "edit"),
-        ("staff.view", "staff", "view"),
-        ("staff.create", "staff", "create"),
-        ("staff.invite", "staff", "invite"),
-        ("staff.delete", "staff", "delete"),
-        ("roles.manage", "roles", "manage"),
-        ("analytics.view", "analytics", "view"),
-    ]
+# Role name -> (description, permission names); None means every permission
+ROLES = {
+    "Admin": ("Full access", None),
+    "Manager": (
+        "Limited management access",
+        [
+            "products.view",
+            "products.create",
+            "products.edit",
+            "sales.view",
+            "sales.create",
+            "sales.edit",
+            "analytics.view",
+        ],
+    ),
+    "Sales Rep": (
+        "Limited Sales access",
+        [
+            "products.view",
+            "sales.view",
+            "sales.create",
+            "analytics.view",
+        ],
+    ),
+}
 
-    permissions = []
-    for name, resource, action in permissions_data:
-        perm = db.query(Permission).filter(Permission.name == name).first()
-        if not perm:
-            perm = Permission(name=name, resource=resource, action=action)
-            db.add(perm)
-            db.commit()
-        permissions.append(perm)
 
-    # Create roles
-    admin_role = db.query(Role).filter(Role.name == "Admin").first()
-    if not admin_role:
-        admin_role = Role(name="Admin", description="Full access")
-        admin_role.permissions = permissions  # Give all permissions
-        db.add(admin_role)
+def seed_data(conn: Connection = None):
+    """Seed initial data.
 
-    manager_role = db.query(Role).filter(Role.name == "Manager").first()
-    if not manager_role:
-        manager_role = Role(name="Manager", description="Limited management access")
-        # Give subset of permissions
-        manager_permissions = [
-            p
-            for p in permissions
-            if p.name
-            in [
-                "products.view",
-                "products.create",
-                "products.edit",
-                "sales.view",
-                "sales.create",
-                "sales.edit",
-                "analytics.view",
-            ]
-        ]
-        manager_role.permissions = manager_permissions
-        db.add(manager_role)
+    Bulk upserts in one transaction, so concurrent workers cannot create
+    duplicates. A role's permissions are only set when the role is created;
+    later edits to seeded roles are left alone.
+    """
+    if conn is None:
+        with engine.begin() as conn:
+            return seed_data(conn)
 
-    sales_rep_role = db.query(Role).filter(Role.name == "Sales Rep").first()
-    if not sales_rep_role:
-        sales_rep_role = Role(name="Sales Rep", description="Limited Sales access")
-        # Give subset of permissions
-        sales_rep_permissions = [
-            p
-            for p in permissions
-            if p.name
-            in [
-                "products.view",
-                "sales.view",
-                "sales.create",
-                "analytics.view",
+    conn.execute(
+        insert(Permission)
+        .values(
+            [
+                {"name": name, "resource": resource, "action": action}
+                for name, resource, action in PERMISSIONS
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=[Permission.name])
+    )
+    created_roles = conn.execute(
+        insert(Role)
+        .values(
+            [
+                {"name": name, "description": description}
+                for name, (description, _) in ROLES.items()
             ]
-        ]
-        sales_rep_role.permissions = sales_rep_permissions
-        db.add(sales_rep_role)
+        )
+        .on_conflict_do_nothing(index_elements=[Role.name])
+        .returning(Role.id, Role.name)
+    ).all()
+    if not created_roles:
+        return
 
-    db.commit()
+    permission_ids = dict(conn.execute(select(Permission.name, Permission.id)).all())
+    conn.execute(
+        insert(role_permissions)
+        .values(
+            [
+                {"role_id": role_id, "permission_id": permission_ids[name]}
+                for role_id, role_name in created_roles
+                for name in ROLES[role_name][1] or permission_ids
+            ]
+        )
+        .on_conflict_do_nothing()
+    )
@@ -1,25 +1,50 @@
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import Depends, FastAPI
 from fastapi.concurrency import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 
-from database.database import Base, engine
-from database.seed_data import seed_data
-from middleware.middleware import add_process_time_header
+from config import require_metrics_token
+from crud.pagination import NEXT_CURSOR_HEADER
+from database.database import dispose_async_engine, get_pool_stats
+from database.schema import ensure_schema
+from middleware.middleware import (
+    add_process_time_header,
+    add_query_stats_headers,
+    pin_reads_after_write,
+)
 from routes.v1.inventory import inventory_router
 from routes.v1.permission import permission_router
 from routes.v1.role import role_router
 from routes.v1.sales import sales_router
 from routes.v1.store import store_router
 from routes.v1.user import user_router
-
-# Create the database tables
-Base.metadata.create_all(bind=engine)
+from services.expiry import expiry_service
+from services.image_config import LocalStorage, image_service
+from services.low_stock import low_stock_service
+from services.mail import check_mail_settings
+from services.stock_ledger import stock_ledger_service
+from services.token_cache import token_decode_cache
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    seed_data()
+    # Only warns: stores without SMTP still run, and sends fail on their own
+    check_mail_settings()
+    # Creates tables and seeds roles only when the schema version changed
+    ensure_schema()
+    tasks = []
+    if low_stock_service.interval > 0:
+        tasks.append(asyncio.create_task(low_stock_service.run_periodically()))
+    if stock_ledger_service.interval > 0:
+        tasks.append(asyncio.create_task(stock_ledger_service.run_periodically()))
+    if expiry_service.interval > 0:
+        tasks.append(asyncio.create_task(expiry_service.run_periodically()))
     yield
+    for task in tasks:
+        task.cancel()
+    await dispose_async_engine()
 
 
 app = FastAPI(
@@ -40,10 +65,41 @@ async def Read_root():
     return {"message": "Welcome to retaler"}
 
 
+@app.get(
+    "/metrics",
+    include_in_schema=False,
+    dependencies=[Depends(require_metrics_token)],
+)
+async def metrics():
+    return {
+        "db_pool": get_pool_stats(),
+        "token_decode_cache": token_decode_cache.stats(),
+    }
+
+
+@app.get(
+    "/metrics/db-pool",
+    include_in_schema=False,
+    dependencies=[Depends(require_metrics_token)],
+)
+async def db_pool_metrics():
+    return get_pool_stats()
+
+
 app.add_middleware(
-    CORSMiddleware, allow_origins=["*"],allow_credentials=True, allow_methods=["*"], allow_headers=["*"]
+    CORSMiddleware, allow_origins=["*"],allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 app.middleware("http")(add_process_time_header)
+app.middleware("http")(pin_reads_after_write)
+app.middleware("http")(add_query_stats_headers)
+
+if isinstance(image_service.storage, LocalStorage):
+    app.mount(
+        image_service.storage.base_url,
+        StaticFiles(directory=image_service.storage.root, check_dir=False),
+        name="media",
+    )
 
 app.include_router(user_router, prefix="/v1/users", tags=["users"])
 app.include_router(store_router, prefix="/v1/store", tags=["store"])
@@ -1,6 +1,9 @@
 import time
 from fastapi import FastAPI, Request
 
+from database.database import READ_PRIMARY_COOKIE, READ_YOUR_WRITES_SECONDS
+from database.query_stats import track_queries, warn_on_repeated_queries
+
 app = FastAPI()
 
 @app.middleware("http")
@@ -16,3 +19,31 @@ async def add_process_time_header(request: Request, call_next):
         print(f"Request: {request.method} {request.url} - Processed in {process_time:.4f} seconds")
 
         return response
+
+
+async def pin_reads_after_write(request: Request, call_next):
+        """Send a client's reads to the primary for a moment after it writes"""
+        response = await call_next(request)
+
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            response.set_cookie(
+                READ_PRIMARY_COOKIE,
+                str(time.time() + READ_YOUR_WRITES_SECONDS),
+                max_age=READ_YOUR_WRITES_SECONDS,
+                httponly=True,
+                samesite="lax",
+            )
+
+        return response
+
+
+async def add_query_stats_headers(request: Request, call_next):
+        """Report statements run and DB time per request; warn on N+1 patterns"""
+        with track_queries() as stats:
+            response = await call_next(request)
+
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time"] = str(stats.duration)
+        warn_on_repeated_queries(stats, f"{request.method} {request.url.path}")
+
+        return response
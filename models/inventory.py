@@ -1,3 +1,4 @@
+import enum
 from datetime import datetime
 from uuid import uuid4
 
@@ -11,8 +12,11 @@ from sqlalchemy import (
     Table,
     text,
     Boolean,
+    Index,
+    case,
+    func,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import ENUM, UUID
 from sqlalchemy.orm import relationship
 
 from database.database import Base
@@ -25,8 +29,55 @@ stores_inventory: Table = Table(
 )
 
 
+class ImageStatus(enum.Enum):
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+
+
 class Inventory(Base):
     __tablename__ = "inventory"
+    __table_args__ = (
+        # Store listings only ever read active items, a keyset page at a time
+        Index(
+            "ix_inventory_store_id_created_at_active",
+            "store_id",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active = true"),
+        ),
+        # Only items at or below their threshold, so the low-stock list and
+        # the digest read a handful of rows per store
+        Index(
+            "ix_inventory_store_id_low_stock_since",
+            "store_id",
+            "low_stock_since",
+            "id",
+            postgresql_where=text("low_stock_since IS NOT NULL"),
+        ),
+        # The per-store "expiring in the next N days" list
+        Index(
+            "ix_inventory_store_id_expiration_date",
+            "store_id",
+            "expiration_date",
+            "id",
+            postgresql_where=text("expiration_date IS NOT NULL AND is_active = true"),
+        ),
+        # The expiry job's range scan: only items it may still flag
+        Index(
+            "ix_inventory_expiration_date_unflagged",
+            "expiration_date",
+            postgresql_where=text(
+                "is_active = true AND status IN ('available', 'expiring_soon')"
+            ),
+        ),
+        # Flagged items the job re-checks in case their date moved
+        Index(
+            "ix_inventory_expiring_soon",
+            "expiration_date",
+            postgresql_where=text("is_active = true AND status = 'expiring_soon'"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     product_name = Column(String, nullable=False)
@@ -37,6 +88,11 @@ class Inventory(Base):
     low_stock_threshold = Column(Integer)
     high_stock_threshold = Column(Integer)
     image_url = Column(String, nullable=True)
+    # NULL when no image was ever uploaded; see services/inventory_images.py
+    image_status = Column(ENUM(ImageStatus), nullable=True)
+    image_error = Column(String, nullable=True)
+    # Identifies the upload in flight; a superseded one does not write back
+    image_upload_id = Column(UUID(as_uuid=True), nullable=True)
     description = Column(String, nullable=True)
     status = Column(String, default="available")
     expiration_date = Column(DateTime)
@@ -47,19 +103,79 @@ class Inventory(Base):
     )
     is_active = Column(Boolean, default=True, nullable=False)
     store_id = Column(UUID(as_uuid=True), ForeignKey("stores.id"), nullable=False)
+    # When quantity last dropped to low_stock_threshold or below; NULL otherwise
+    low_stock_since = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        info={
+            "backfill": "UPDATE inventory SET low_stock_since = now() "
+            "WHERE is_active AND quantity <= low_stock_threshold"
+        },
+    )
 
     @property
     def is_low_stock(self) -> bool:
-        return self.current_stock <= self.low_stock_threshold
+        if self.low_stock_threshold is not None:
+            return self.quantity <= self.low_stock_threshold
+        return False
 
     @property
     def is_overstocked(self) -> bool:
         if self.high_stock_threshold is not None:
-            return self.current_stock >= self.high_stock_threshold
+            return self.quantity >= self.high_stock_threshold
         return False
 
+    def track_low_stock(self):
+        """Stamp or clear low_stock_since after quantity or threshold changed"""
+        if not self.is_low_stock:
+            self.low_stock_since = None
+        elif self.low_stock_since is None:
+            self.low_stock_since = func.now()
+
+    @staticmethod
+    def search_vector():
+        """Full-text document for search; must match ix_inventory_search exactly.
+
+        Punctuation becomes spaces first, so SKUs like "ABC-12" index as
+        plain words instead of the parser's signed numbers.
+        """
+        return func.to_tsvector(
+            text("'simple'::regconfig"),
+            func.regexp_replace(
+                Inventory.product_name
+                + " "
+                + Inventory.sku
+                + " "
+                + func.coalesce(Inventory.description, ""),
+                text("'[^[:alnum:]]+'"),
+                text("' '"),
+                text("'g'"),
+            ),
+        )
+
+    @staticmethod
+    def low_stock_since_for(quantity, threshold):
+        """track_low_stock() as a SQL expression for set-based UPDATEs"""
+        return case(
+            (quantity <= threshold, func.coalesce(Inventory.low_stock_since, func.now())),
+            else_=None,
+        )
+
     store = relationship(
         "Store", secondary=stores_inventory, back_populates="inventory"
     )
     creator = relationship("User", back_populates="inventories")
     sale_items = relationship("SaleItem", back_populates="inventory")
+
+
+# Declared after the class because it indexes an expression over its columns
+Index("ix_inventory_search", Inventory.search_vector(), postgresql_using="gin")
+
+
+class LowStockDigest(Base):
+    """When each store was last sent its low-stock digest"""
+
+    __tablename__ = "low_stock_digests"
+
+    store_id = Column(UUID(as_uuid=True), ForeignKey("stores.id"), primary_key=True)
+    last_sent_at = Column(DateTime(timezone=True), nullable=False)
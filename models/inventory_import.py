@@ -0,0 +1,35 @@
+import enum
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import ENUM, JSONB, UUID
+
+from database.database import Base
+
+
+class ImportStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class InventoryImportJob(Base):
+    """Progress and per-row error report of one bulk inventory import"""
+
+    __tablename__ = "inventory_import_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    store_id = Column(UUID(as_uuid=True), ForeignKey("stores.id"), nullable=False, index=True)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    filename = Column(String)
+    status = Column(ENUM(ImportStatus), default=ImportStatus.PENDING, nullable=False)
+    rows_processed = Column(Integer, default=0, nullable=False)
+    rows_imported = Column(Integer, default=0, nullable=False)
+    rows_failed = Column(Integer, default=0, nullable=False)
+    # [{"row": 12, "sku": "...", "errors": [...]}], capped at IMPORT_MAX_ERRORS
+    errors = Column(JSONB, default=list, nullable=False)
+    detail = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
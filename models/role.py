@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, String, Table, Text
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, String, Table, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -47,8 +47,11 @@ class Permission(Base):
 
 class StaffPermissionOverride(Base):
     __tablename__ = "staff_permission_overrides"
+    __table_args__ = (
+        Index("ix_staff_permission_overrides_staff_id_expires_at", "staff_id", "expires_at"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     staff_id = Column(UUID, ForeignKey("staffs.id"))
     permission_id = Column(UUID, ForeignKey("permissions.id"))
     granted = Column(Boolean)  # True = grant, False = deny
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, Table, Boolean
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, Table, Boolean, text
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import relationship
 
@@ -10,6 +10,17 @@ from database.database import Base
 
 class Sale(Base):
     __tablename__ = "sales"
+    __table_args__ = (
+        # Store sale lists (keyset pages, newest first) and stats skip
+        # soft-deleted sales
+        Index(
+            "ix_sales_store_id_created_at_id_live",
+            "store_id",
+            "created_at",
+            "id",
+            postgresql_where=text("is_deleted = false"),
+        ),
+    )
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     store_id = Column(PG_UUID(as_uuid=True), ForeignKey("stores.id"), nullable=False)
     total_amount = Column(Float, nullable=False)
@@ -32,9 +43,11 @@ class Sale(Base):
 class SaleItem(Base):
     __tablename__ = "sale_items"
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    sale_id = Column(PG_UUID(as_uuid=True), ForeignKey("sales.id"), nullable=False)
+    sale_id = Column(
+        PG_UUID(as_uuid=True), ForeignKey("sales.id"), nullable=False, index=True
+    )
     inventory_id = Column(
-        PG_UUID(as_uuid=True), ForeignKey("inventory.id"), nullable=False
+        PG_UUID(as_uuid=True), ForeignKey("inventory.id"), nullable=False, index=True
     )
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)  # price per unit at time of sale
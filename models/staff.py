@@ -1,7 +1,7 @@
 import enum
 import uuid
 
-from sqlalchemy import Boolean, Column, ForeignKey
+from sqlalchemy import Boolean, Column, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import ENUM, UUID
 from sqlalchemy.orm import relationship
 
@@ -16,6 +16,10 @@ class StaffStatus(enum.Enum):
 
 class Staff(Base):
     __tablename__ = "staffs"
+    __table_args__ = (
+        # get_current_staff / store_access look staff up by (store, user)
+        Index("ix_staffs_store_id_user_id", "store_id", "user_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
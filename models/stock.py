@@ -0,0 +1,61 @@
+import enum
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, text
+from sqlalchemy.dialects.postgresql import ENUM, UUID
+from sqlalchemy.orm import relationship
+
+from database.database import Base
+
+
+class StockMovementReason(enum.Enum):
+    OPENING = "opening"
+    CREATE = "create"
+    ADJUSTMENT = "adjustment"
+    SALE = "sale"
+    IMPORT = "import"
+
+
+class StockMovement(Base):
+    """One change to an item's quantity; rows are only ever inserted.
+
+    ``reference_id`` points at what caused the movement (a sale or an import
+    job). Inventory.quantity stays the source of truth for current stock;
+    the ledger answers history and audit questions.
+    """
+
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        # Point-in-time reads: one item's movements after its snapshot
+        Index("ix_stock_movements_inventory_id_created_at", "inventory_id", "created_at"),
+        # Append-only, so a BRIN index is a few pages and serves compaction
+        Index("ix_stock_movements_created_at_brin", "created_at", postgresql_using="brin"),
+        # Opening balances for items that predate the ledger
+        {
+            "info": {
+                "backfill": "INSERT INTO stock_movements (inventory_id, store_id, delta, reason) "
+                "SELECT id, store_id, quantity, 'OPENING' FROM inventory WHERE quantity <> 0"
+            }
+        },
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    inventory_id = Column(UUID(as_uuid=True), ForeignKey("inventory.id"), nullable=False)
+    store_id = Column(UUID(as_uuid=True), ForeignKey("stores.id"), nullable=False)
+    delta = Column(Integer, nullable=False)
+    reason = Column(ENUM(StockMovementReason), nullable=False)
+    reference_id = Column(UUID(as_uuid=True), nullable=True)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=text("now()"), nullable=False)
+
+    inventory = relationship("Inventory")
+
+
+class StockSnapshot(Base):
+    """An item's quantity as of ``as_of``: every movement up to then, summed"""
+
+    __tablename__ = "stock_snapshots"
+
+    inventory_id = Column(UUID(as_uuid=True), ForeignKey("inventory.id"), primary_key=True)
+    as_of = Column(DateTime(timezone=True), primary_key=True)
+    store_id = Column(UUID(as_uuid=True), ForeignKey("stores.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
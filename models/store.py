@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, ForeignKey, String
+from sqlalchemy import BigInteger, Column, ForeignKey, String, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -16,7 +16,11 @@ class Store(Base):
     name = Column(String(256), nullable=False, unique=True)
     category = Column(String(256))
     no_of_staffs = Column(String(50), nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    user_id = Column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True
+    )
+    # Bumped in the same transaction as every change to the store's stock
+    inventory_version = Column(BigInteger, nullable=False, server_default=text("0"))
     
 
     #Relationships
@@ -1,13 +1,14 @@
-import uuid
-
-from sqlalchemy import Column, String
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, DateTime, String, text
 
 from database.database import Base
 
 
 class TokenBlacklist(Base):
-    __tablename__ = "token_blacklist"
-
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    token = Column(String(256), nullable=False, unique=True)
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(36), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # Stamped by the database, so every worker syncs against the same clock
+    revoked_at = Column(
+        DateTime, server_default=text("clock_timestamp()"), nullable=False, index=True
+    )
@@ -18,6 +18,8 @@ class User(Base):
     role = Column(String, default="Admin")
     is_active = Column(Boolean, default=True)
     profile_picture_url = Column(String, nullable=True)
+    # Bumped to revoke every outstanding token for the user at once
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -1,21 +1,36 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, status,UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, Query, Request, Response, status,UploadFile, File, Form, BackgroundTasks
 from sqlalchemy.orm import Session
-from typing import Optional
+from datetime import datetime
+from typing import Literal, Optional
 
 from config import get_current_active_user, require_permission
 from crud.inventory import inventory_crud
-from database.database import get_db
+from crud.pagination import PageParams, page_params, set_next_cursor
+from database.database import get_db, get_read_db
 from models.staff import Staff
 from models.user import User
 from schemas.errors import ErrorOut
 from schemas.inventory import (
+    InventoryBatchUpdate,
+    InventoryBatchUpdateResponse,
     InventoryCreate,
     InventoryGenericResponseWithData,
+    InventoryImportJobOut,
+    InventorySuggestionsResponse,
     InventoryUpdate,
+    StockLevelsResponse,
+    StockMovementsResponse,
 )
 from schemas.utils import GenericResponse
+from services.expiry import expiry_service
+from services.export import export_service
+from services.inventory_cache import inventory_cache
+from services.inventory_import import inventory_import_service
+from services.low_stock import low_stock_service
+from services.product_search import product_search_service
+from services.stock_ledger import stock_ledger_service
 
 inventory_router = APIRouter()
 
@@ -30,6 +45,7 @@ inventory_router = APIRouter()
 )
 async def create_inventory(
     store_id: UUID,
+    background_tasks: BackgroundTasks,
     product_name: str = Form(...),
     cost_price: float = Form(...),
     selling_price: float = Form(...),
@@ -44,6 +60,7 @@ async def create_inventory(
     db: Session = Depends(get_db),
     current_staff: Staff = Depends(require_permission("products.create")),
 ):
+    """Returns at once; a file is uploaded in the background (see image_status)"""
     inventory_data = InventoryCreate(
         product_name=product_name,
         cost_price=cost_price,
@@ -62,6 +79,7 @@ async def create_inventory(
         created_by=current_staff.user.id,
         store_id=store_id,
         file=file,
+        background_tasks=background_tasks,
     )
     return {
         "status_code": status.HTTP_201_CREATED,
@@ -79,12 +97,17 @@ async def create_inventory(
         404: {"model": ErrorOut},
     },
 )
-async def get_all_inventory(db: Session = Depends(get_db)):
-    inventory_items = inventory_crud.get_inventory(db)
+async def get_all_inventory(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
+):
+    inventory_items = inventory_crud.get_inventory(db, page)
+    set_next_cursor(response, inventory_items)
     return {
         "status_code": status.HTTP_200_OK,
         "detail": "Inventory data retrieved",
-        "inventory": inventory_items,
+        "inventory": inventory_items.items,
     }
 
 
@@ -93,22 +116,239 @@ async def get_all_inventory(db: Session = Depends(get_db)):
     status_code=status.HTTP_200_OK,
     responses={
         200: {"model": InventoryGenericResponseWithData},
+        304: {"description": "Not modified since the ETag in If-None-Match"},
         404: {"model": ErrorOut},
     },
 )
 async def get_inventory_by_store(
     store_id: UUID,
-    db: Session = Depends(get_db),
+    request: Request,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
+    current_staff: Staff = Depends(require_permission("products.view")),
+):
+    """Cached per store version; send If-None-Match to get 304 when unchanged"""
+
+    def build():
+        inventory_items = inventory_crud.get_inventory_by_store_id(db, store_id, page)
+        return {
+            "status_code": status.HTTP_200_OK,
+            "detail": "store inventory retrieved",
+            "inventory": inventory_items.items,
+        }, inventory_items
+
+    return inventory_cache.respond(request, db, store_id, page, build)
+
+
+@inventory_router.get("/{store_id}/inventory/export")
+def export_inventory(
+    store_id: UUID,
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    current_staff: Staff = Depends(require_permission("products.view")),
+):
+    """Stream every active item in the store as CSV or NDJSON"""
+    return export_service.response(
+        request,
+        export_service.inventory_query(store_id),
+        format,
+        f"inventory-{store_id}",
+    )
+
+
+@inventory_router.get(
+    "/{store_id}/inventory/search",
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {"model": InventoryGenericResponseWithData},
+        400: {"model": ErrorOut},
+    },
+)
+def search_inventory(
+    store_id: UUID,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100),
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
+    current_staff: Staff = Depends(require_permission("products.view")),
+):
+    """Items whose name, SKU or description has words starting with every word of q"""
+    inventory_items = product_search_service.search(db, store_id, q, page)
+    set_next_cursor(response, inventory_items)
+    return {
+        "status_code": status.HTTP_200_OK,
+        "detail": "inventory search results",
+        "inventory": inventory_items.items,
+    }
+
+
+@inventory_router.get(
+    "/{store_id}/inventory/autocomplete",
+    status_code=status.HTTP_200_OK,
+    response_model=InventorySuggestionsResponse,
+)
+def autocomplete_inventory(
+    store_id: UUID,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_read_db),
+    current_staff: Staff = Depends(require_permission("products.view")),
+):
+    """Products with a name word or SKU starting with q, from memory"""
+    return {
+        "status_code": status.HTTP_200_OK,
+        "detail": "inventory suggestions",
+        "suggestions": product_search_service.suggest(db, store_id, q, limit),
+    }
+
+
+@inventory_router.get(
+    "/{store_id}/inventory/low-stock",
+    status_code=status.HTTP_200_OK,
+    responses={200: {"model": InventoryGenericResponseWithData}},
+)
+def get_low_stock_inventory(
+    store_id: UUID,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
+    current_staff: Staff = Depends(require_permission("products.view")),
+):
+    """Items at or below their low-stock threshold, longest-low first"""
+    inventory_items = low_stock_service.get_low_stock(db, store_id, page)
+    set_next_cursor(response, inventory_items)
+    return {
+        "status_code": status.HTTP_200_OK,
+        "detail": "low stock inventory retrieved",
+        "inventory": inventory_items.items,
+    }
+
+
+@inventory_router.get(
+    "/{store_id}/inventory/expiring",
+    status_code=status.HTTP_200_OK,
+    responses={200: {"model": InventoryGenericResponseWithData}},
+)
+def get_expiring_inventory(
+    store_id: UUID,
+    response: Response,
+    days: int = Query(7, ge=0, le=365),
+    include_expired: bool = False,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
     current_staff: Staff = Depends(require_permission("products.view")),
 ):
-    inventory_items =  inventory_crud.get_inventory_by_store_id(db, store_id)
+    """Items expiring in the next ``days`` days, soonest first"""
+    inventory_items = expiry_service.get_expiring(db, store_id, days, include_expired, page)
+    set_next_cursor(response, inventory_items)
     return {
         "status_code": status.HTTP_200_OK,
-        "detail": "store inventory retrieved",
-        "inventory": inventory_items,
+        "detail": "expiring inventory retrieved",
+        "inventory": inventory_items.items,
     }
 
 
+@inventory_router.get(
+    "/{store_id}/inventory/stock-at",
+    response_model=StockLevelsResponse,
+)
+def get_stock_at(
+    store_id: UUID,
+    at: datetime = Query(..., description="Point in time, ISO 8601"),
+    db: Session = Depends(get_read_db),
+    current_staff: Staff = Depends(require_permission("products.view")),
+):
+    """Every item's quantity as it stood at ``at``, from the stock ledger"""
+    stock = stock_ledger_service.quantities_at(db, store_id, at)
+    return StockLevelsResponse(
+        status_code=status.HTTP_200_OK,
+        detail="stock levels retrieved",
+        at=at,
+        stock=stock,
+    )
+
+
+@inventory_router.post(
+    "/{store_id}/inventory/import",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=InventoryImportJobOut,
+    responses={400: {"model": ErrorOut}},
+)
+def import_inventory(
+    store_id: UUID,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description=".csv or .jsonl, one item per row"),
+    db: Session = Depends(get_db),
+    current_staff: Staff = Depends(require_permission("products.create")),
+):
+    """Start a bulk import; poll the returned job for progress and row errors"""
+    job, path = inventory_import_service.start(db, store_id, current_staff.user_id, file)
+    background_tasks.add_task(inventory_import_service.run, job.id, path)
+    return job
+
+
+@inventory_router.get(
+    "/{store_id}/inventory/import/{job_id}",
+    response_model=InventoryImportJobOut,
+    responses={404: {"model": ErrorOut}},
+)
+def get_inventory_import(
+    store_id: UUID,
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_staff: Staff = Depends(require_permission("products.create")),
+):
+    return inventory_import_service.get_job(db, store_id, job_id)
+
+
+# Declared before /{inventory_id} so "batch" is not parsed as an id
+@inventory_router.patch(
+    "/{store_id}/inventory/batch",
+    response_model=InventoryBatchUpdateResponse,
+    responses={422: {"model": ErrorOut}},
+)
+def batch_update_inventory(
+    store_id: UUID,
+    batch: InventoryBatchUpdate,
+    db: Session = Depends(get_db),
+    current_staff: Staff = Depends(require_permission("products.edit")),
+):
+    """Update prices, stock and other fields of many items in one transaction"""
+    results = inventory_crud.batch_update_inventory(
+        db, store_id, batch.items, updated_by=current_staff.user_id
+    )
+    updated = sum(result.updated for result in results)
+    return InventoryBatchUpdateResponse(
+        status_code=status.HTTP_200_OK,
+        detail=f"{updated} of {len(results)} inventory items updated",
+        updated=updated,
+        failed=len(results) - updated,
+        results=results,
+    )
+
+
+@inventory_router.get(
+    "/{store_id}/inventory/{inventory_id}/movements",
+    response_model=StockMovementsResponse,
+)
+def get_stock_movements(
+    store_id: UUID,
+    inventory_id: UUID,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
+    current_staff: Staff = Depends(require_permission("products.view")),
+):
+    """The item's stock ledger, newest movement first"""
+    movements = stock_ledger_service.get_movements(db, store_id, inventory_id, page)
+    set_next_cursor(response, movements)
+    return StockMovementsResponse(
+        status_code=status.HTTP_200_OK,
+        detail="stock movements retrieved",
+        movements=movements.items,
+    )
+
+
 @inventory_router.patch(
     "/{store_id}/inventory/{inventory_id}",
     status_code=status.HTTP_200_OK,
@@ -119,6 +359,7 @@ async def get_inventory_by_store(
 )
 async def update_inventory(
     inventory_id: UUID,
+    background_tasks: BackgroundTasks,
     product_name: str =Form(None),
     cost_price: float = Form(None),
     selling_price: float = Form(None),
@@ -127,7 +368,6 @@ async def update_inventory(
     description: str = Form(None),
     file: Optional[UploadFile] = File(None),
     db: Session = Depends(get_db),
-    background_tasks: BackgroundTasks = BackgroundTasks,
     current_staff: Staff = Depends(require_permission("products.edit")),
 ):  
     
@@ -139,10 +379,11 @@ async def update_inventory(
         status=status_,
         description=description,
     )
-    updated_inventory =  inventory_crud.update_inventory(
+    updated_inventory = await inventory_crud.update_inventory(
         db, inventory_id, inventory_data,
         file=file,
-        background_tasks=background_tasks
+        background_tasks=background_tasks,
+        updated_by=current_staff.user_id,
     )
     return {
         "status_code": status.HTTP_200_OK,
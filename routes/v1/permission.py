@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 
 from config import (
     get_current_active_user,
-    get_current_staff,
+    get_current_store_staff,
     require_any_permission,
     require_permission,
 )
@@ -23,7 +23,7 @@ permission_router = APIRouter()
 async def get_staff_permissions(
     staff_id: UUID,
     db: Session = Depends(get_db),
-    staff: Staff = Depends(get_current_staff),
+    staff: Staff = Depends(get_current_store_staff),
 ):
     permissions = permission_service.get_staff_permissions(db, staff_id)
     return GenericResponseWithSequenceData(status_code=status.HTTP_200_OK, detail="permissions retrieved", data=permissions)
@@ -1,18 +1,18 @@
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import or_, select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import (
     get_current_active_user,
-    get_current_staff,
+    get_current_store_staff,
     require_any_permission,
     require_permission,
 )
-from database.database import get_db
-from models.role import Role
+from crud.pagination import PageParams, page_params, set_next_cursor
+from crud.role import async_role_crud
+from database.database import get_async_read_db
 from models.staff import Staff
 from schemas.errors import ErrorOut
 from schemas.roles import RolesWithSequenceData
@@ -27,14 +27,15 @@ role_router = APIRouter()
 )
 async def get_all_roles(
     store_id: UUID,
-    db: Session = Depends(get_db),
-    staff: Staff = Depends(get_current_staff),
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_read_db),
+    staff: Staff = Depends(get_current_store_staff),
 ):
-    roles = db.scalars(
-        select(Role).where(or_(Role.store_id == store_id, Role.store_id == None))
-    ).all()
+    roles = await async_role_crud.get_store_roles(db, store_id, page)
+    set_next_cursor(response, roles)
     return RolesWithSequenceData(
         status_code=status.HTTP_200_OK,
         detail="roles retrieved",
-        data=jsonable_encoder(roles),
+        data=jsonable_encoder(roles.items),
     )
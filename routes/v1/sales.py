@@ -1,15 +1,17 @@
-from typing import List
+from typing import List, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import get_current_active_user, require_permission
-from crud.sales import sales_crud
-from database.database import get_db
+from crud.pagination import PageParams, page_params, set_next_cursor
+from crud.sales import async_sales_crud
+from database.database import get_async_db, get_async_read_db
 from models.staff import Staff
 from models.user import User
 from schemas.sales import SaleCreate, SaleOut
+from services.export import export_service
 
 sales_router = APIRouter()
 
@@ -19,20 +21,41 @@ sales_router = APIRouter()
 )
 async def create_sale(
     sale_data: SaleCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_staff: Staff = Depends(require_permission("sales.create")),
 ):
-    sale = sales_crud.create_sale(db, sale_data, created_by=current_staff.id)
+    sale = await async_sales_crud.create_sale(db, sale_data, created_by=current_staff.id)
     return sale
 
 
 @sales_router.get("/{store_id}/sales/", response_model=List[SaleOut])
 async def get_all_sales(
     store_id: UUID,
-    db: Session = Depends(get_db),
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_read_db),
     current_staff: Staff = Depends(require_permission("sales.view")),
 ):
-    return sales_crud.get_all_sales(db, store_id)
+    """Newest first; pass the X-Next-Cursor header back as ?cursor= for more"""
+    sales = await async_sales_crud.get_all_sales(db, store_id, page)
+    set_next_cursor(response, sales)
+    return sales.items
+
+
+@sales_router.get("/{store_id}/sales/export")
+def export_sales(
+    store_id: UUID,
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    current_staff: Staff = Depends(require_permission("sales.view")),
+):
+    """Stream the store's sales history, one row per sale line"""
+    return export_service.response(
+        request,
+        export_service.sales_query(store_id),
+        format,
+        f"sales-{store_id}",
+    )
 
 
 @sales_router.delete(
@@ -40,17 +63,17 @@ async def get_all_sales(
 )
 async def delete_sale(
     sale_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_staff: Staff = Depends(require_permission("sales.delete")),
 ):
-    sales_crud.delete_sale(db, sale_id, current_staff.id)
+    await async_sales_crud.delete_sale(db, sale_id, current_staff.id)
     return
 
 
 @sales_router.get("/{store_id}/sales/stats")
 async def get_sales_stats(
     store_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_staff: Staff = Depends(require_permission("analytics.view")),
 ):
-    return sales_crud.get_sales_stats(db, store_id)
+    return await async_sales_crud.get_sales_stats(db, store_id)
@@ -1,21 +1,22 @@
 import os
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
 from config import (
     get_current_active_user,
-    get_current_staff,
+    get_current_store_staff,
     require_any_permission,
     require_permission,
 )
+from crud.pagination import PageParams, page_params, set_next_cursor
 from crud.role import role_crud
 from crud.staff import staff_crud
 from crud.store import store_crud
 from crud.user import user_crud
-from database.database import get_db
+from database.database import get_db, get_read_db
 from models.staff import Staff, StaffStatus
 from models.user import User
 from schemas.errors import ErrorOut
@@ -40,6 +41,7 @@ from schemas.users import UserCreate
 from schemas.utils import GenericResponse
 from services.auth import user_auth_service
 from services.mail import email_service
+from services.permission import permission_cache
 
 store_router = APIRouter()
 
@@ -190,7 +192,7 @@ async def add_staff(
     password = ""
     if not existing_user:
         password = user_auth_service.generate_random_password()
-        existing_user = user_crud.create_user(
+        existing_user = await user_crud.create_user(
             db,
             UserCreate(
                 email=staff_data.email,
@@ -353,7 +355,7 @@ async def accept_store_invitation(
 
     user = user_crud.get_user_by_email(db, email)
     if user is None:
-        user = user_crud.create_user(
+        user = await user_crud.create_user(
             db,
             UserCreate(
                 email=email, username=user_data.username, password=user_data.password
@@ -377,6 +379,7 @@ async def accept_store_invitation(
         new_staff.status = StaffStatus.ACTIVE
         db.commit()
         db.refresh(new_staff)
+        permission_cache.invalidate(new_staff.id)
 
     background_task.add_task(
         email_service.send_email,
@@ -440,6 +443,7 @@ async def update_staff(
 
     db.commit()
     db.refresh(staff)
+    permission_cache.invalidate(staff.id)
 
     return StaffGenericResponseWithStaffData(
         status_code=status.HTTP_200_OK,
@@ -457,19 +461,22 @@ async def update_staff(
 )
 async def get_store_staffs(
     store_id: UUID,
-    db: Session = Depends(get_db),
-    staff: Staff = Depends(get_current_staff),
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
+    staff: Staff = Depends(get_current_store_staff),
 ):
-    """Get all staff members of a store."""
-    staffs = staff_crud.get_all_store_staffs(db, store_id)
-    if not staffs:
+    """Get all staff members of a store, one page at a time."""
+    staffs = staff_crud.get_all_store_staffs(db, store_id, page)
+    set_next_cursor(response, staffs)
+    if not staffs.items and not page.cursor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No staff found for this store",
         )
 
     data = []
-    for staff in staffs:
+    for staff in staffs.items:
         data.append(
             StaffDetail(
                 id=staff.id,
@@ -502,8 +509,8 @@ async def get_store_staffs(
 async def get_staff_details(
     store_id: UUID,
     staff_id: UUID,
-    db: Session = Depends(get_db),
-    staff: Staff = Depends(get_current_staff),
+    db: Session = Depends(get_read_db),
+    staff: Staff = Depends(get_current_store_staff),
 ):
     """Get the detail of a staff member of the store."""
     staff = staff_crud.get_staff_by_id(db, staff_id)
@@ -8,16 +8,18 @@ from fastapi import (
     Depends,
     File,
     HTTPException,
+    Response,
     UploadFile,
     status,
 )
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
-from config import get_current_active_user
-from crud.token_blacklist import token_blacklist_crud
+from config import decode_token, get_current_active_user, is_token_current
+from crud.pagination import PageParams, page_params, set_next_cursor
 from crud.user import user_crud
 from database.database import get_db
+from models.staff import Staff
 from models.user import User
 from schemas.errors import ErrorOut
 from schemas.users import (
@@ -36,6 +38,7 @@ from schemas.utils import GenericResponse
 from services.auth import user_auth_service
 from services.image_config import image_service
 from services.mail import email_service
+from services.token_revocation import token_revocation_service
 
 user_router = APIRouter()
 
@@ -48,7 +51,7 @@ user_router = APIRouter()
 async def create_user(
     user: UserCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)
 ):
-    new_user = user_crud.create_user(db, user)
+    new_user = await user_crud.create_user(db, user)
     token = user_auth_service.login_user(new_user)
 
     background_tasks.add_task(
@@ -68,9 +71,14 @@ async def create_user(
 
 # TODO: remove this endpoint for data privacy
 @user_router.get("/", status_code=status.HTTP_200_OK, response_model=Sequence[UserOut])
-async def get_all_users(db: Session = Depends(get_db)):
-    all_users = user_crud.get_users(db)
-    return all_users
+async def get_all_users(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    all_users = user_crud.get_users(db, page)
+    set_next_cursor(response, all_users)
+    return all_users.items
 
 
 @user_router.patch(
@@ -94,7 +102,15 @@ async def get_all_user_details(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (
+        db.query(User)
+        .options(
+            selectinload(User.stores),
+            selectinload(User.staff_profile).selectinload(Staff.role),
+        )
+        .filter(User.id == user_id)
+        .first()
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not exists"
@@ -103,11 +119,6 @@ async def get_all_user_details(
     response = {}
     response["user"] = user
 
-    user.stores
-    user.staff_profile
-    for profile in user.staff_profile:
-        profile.role
-
     return response
 
 
@@ -119,7 +130,7 @@ async def login_user(
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
-    user = user_auth_service.authenticate_user(
+    user = await user_auth_service.authenticate_user(
         db, user_login.email, user_login.password
     )
     if not user:
@@ -199,7 +210,7 @@ async def change_password(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_active_user),
 ):
-    user_crud.update_password(db, user, user_details.password)
+    await user_crud.update_password(db, user, user_details.password)
     return {
         "status_code": status.HTTP_200_OK,
         "detail": "Password changed successfully.",
@@ -211,7 +222,7 @@ async def user_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Session = Depends(get_db),
 ):
-    user = user_auth_service.authenticate_user(
+    user = await user_auth_service.authenticate_user(
         db, form_data.username, form_data.password
     )
     if not user:
@@ -274,11 +285,14 @@ async def refresh_token(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    if token_blacklist_crud.get_token(db, tokens.refresh_token):
+    refresh_claims = decode_token(tokens.refresh_token)
+    if refresh_claims is None or token_revocation_service.is_revoked(
+        db, refresh_claims.get("jti")
+    ):
         raise invalid_token_exception
 
     user = user_auth_service.get_user_from_token(db, tokens.refresh_token)
-    if not user:
+    if not user or not is_token_current(refresh_claims, user):
         raise invalid_token_exception
 
     # Ensure the access token matches the user
@@ -292,7 +306,9 @@ async def refresh_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    token_blacklist_crud.add_tokens(db, [tokens.access_token, tokens.refresh_token])
+    token_revocation_service.revoke(
+        db, [decode_token(tokens.access_token), refresh_claims]
+    )
 
     new_token = user_auth_service.login_user(user)
     return new_token
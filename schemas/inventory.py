@@ -1,9 +1,13 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field, model_validator
 
+from models.inventory import ImageStatus
+from models.inventory_import import ImportStatus
+from models.stock import StockMovementReason
+
 
 class InventoryItem(BaseModel):
     product_name: str
@@ -31,6 +35,9 @@ class InventoryOut(InventoryItem):
     created_by: UUID
     updated_at: datetime
     created_at: datetime
+    low_stock_since: Optional[datetime] = None
+    image_status: Optional[ImageStatus] = None
+    image_error: Optional[str] = None
 
     model_config = {"from_attributes": True}
 
@@ -48,7 +55,116 @@ class InventoryUpdate(BaseModel):
     
     model_config = {"from_attributes": True}
 
+class InventoryBatchUpdateItem(BaseModel):
+    """One item in a batch update, addressed by id or SKU; None leaves a field as is"""
+
+    inventory_id: Optional[UUID] = None
+    sku: Optional[str] = None
+    product_name: Optional[str] = None
+    cost_price: Optional[float] = None
+    selling_price: Optional[float] = None
+    quantity: Optional[int] = None
+    low_stock_threshold: Optional[int] = None
+    high_stock_threshold: Optional[int] = None
+    status: Optional[str] = None
+    description: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_reference(self):
+        if (self.inventory_id is None) == (self.sku is None):
+            raise ValueError("Give exactly one of inventory_id or sku")
+        return self
+
+
+class InventoryBatchUpdate(BaseModel):
+    items: List[InventoryBatchUpdateItem] = Field(min_length=1, max_length=5000)
+
+
+class InventoryBatchUpdateResult(BaseModel):
+    index: int
+    inventory_id: Optional[UUID] = None
+    sku: Optional[str] = None
+    updated: bool
+    detail: Optional[str] = None
+
+
+class InventoryBatchUpdateResponse(BaseModel):
+    status_code: int
+    detail: str
+    updated: int
+    failed: int
+    results: List[InventoryBatchUpdateResult]
+
+
 class InventoryGenericResponseWithData(BaseModel):
     status_code: int
     detail: str
     inventory: Optional[InventoryOut] = None
+
+
+class InventorySuggestion(BaseModel):
+    id: UUID
+    product_name: str
+    sku: str
+
+
+class InventorySuggestionsResponse(BaseModel):
+    status_code: int
+    detail: str
+    suggestions: List[InventorySuggestion]
+
+
+class InventoryImportRowError(BaseModel):
+    row: int
+    sku: Optional[str] = None
+    errors: List[str]
+
+
+class InventoryImportJobOut(BaseModel):
+    id: UUID
+    store_id: UUID
+    filename: Optional[str] = None
+    status: ImportStatus
+    rows_processed: int
+    rows_imported: int
+    rows_failed: int
+    errors: List[InventoryImportRowError] = []
+    detail: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
+class StockLevel(BaseModel):
+    id: UUID
+    sku: str
+    product_name: str
+    quantity: int
+
+    model_config = {"from_attributes": True}
+
+
+class StockLevelsResponse(BaseModel):
+    status_code: int
+    detail: str
+    at: datetime
+    stock: List[StockLevel]
+
+
+class StockMovementOut(BaseModel):
+    id: int
+    inventory_id: UUID
+    delta: int
+    reason: StockMovementReason
+    reference_id: Optional[UUID] = None
+    created_by: Optional[UUID] = None
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class StockMovementsResponse(BaseModel):
+    status_code: int
+    detail: str
+    movements: List[StockMovementOut]
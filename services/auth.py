@@ -4,11 +4,10 @@ from uuid import UUID
 
 from dotenv import load_dotenv
 from fastapi import HTTPException, status
-from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
-from config import create_access_token, create_refresh_token
-from dependencies.auth import get_password_hash, verify_password
+from config import create_access_token, create_refresh_token, decode_token
+from dependencies.auth import password_hasher
 from models.user import User
 from schemas.store import StoreInvite
 from schemas.users import Token
@@ -25,9 +24,14 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 class AuthService:
 
     @staticmethod
-    def authenticate_user(db: Session, email: str, password: str):
+    async def authenticate_user(db: Session, email: str, password: str):
         user = db.query(User).filter(User.email == email, User.is_active == True).first()
-        if not user or not verify_password(password, user.password_hash):
+        verified, new_hash = False, None
+        if user:
+            verified, new_hash = await password_hasher.verify_and_update(
+                password, user.password_hash
+            )
+        if not verified:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials",
@@ -38,11 +42,15 @@ class AuthService:
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive.",
         )
+        if new_hash:
+            # Stored hash predates the current bcrypt cost; upgrade it
+            user.password_hash = new_hash
+            db.commit()
         return user
 
     @staticmethod
     def login_user(user: User) -> Token:
-        data = {"sub": user.email, "id": user.id}
+        data = {"sub": user.email, "id": user.id, "ver": user.token_version}
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         refresh_token_expires = timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(data, access_token_expires)
@@ -51,26 +59,26 @@ class AuthService:
 
     @staticmethod
     def generate_reset_token(user: User) -> Token:
-        data = {"sub": user.email, "id": user.id}
+        data = {"sub": user.email, "id": user.id, "ver": user.token_version}
         reset_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         reset_token = create_access_token(data=data, expires_delta=reset_token_expires)
         return Token(access_token=reset_token)
 
     @staticmethod
-    def update_password(db: Session, user: User, password: str) -> Token:
-        user.password_hash = get_password_hash(password)
+    async def update_password(db: Session, user: User, password: str) -> Token:
+        user.password_hash = await password_hasher.hash(password)
+        user.token_version = User.token_version + 1
         db.commit()
         db.refresh(user)
         return user
 
     @staticmethod
     def get_user_from_token(db: Session, token: str):
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            email: str = payload.get("sub")
-            if email is None:
-                return None
-        except JWTError:
+        payload = decode_token(token)
+        if payload is None:
+            return None
+        email: str = payload.get("sub")
+        if email is None:
             return None
         return db.query(User).filter(User.email == email).first()
 
@@ -89,14 +97,13 @@ class AuthService:
 
     @staticmethod
     def get_staff_from_invite_token(token: str):
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            email: str | None = payload.get("email")
-            store_id: UUID | None = payload.get("store_id")
-            role: str | None = payload.get("role")
-            if email is None:
-                return None
-        except JWTError:
+        payload = decode_token(token)
+        if payload is None:
+            return None
+        email: str | None = payload.get("email")
+        store_id: UUID | None = payload.get("store_id")
+        role: str | None = payload.get("role")
+        if email is None:
             return None
         return {"email": email, "role": role, "store_id": store_id}
 
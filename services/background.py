@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, TypeVar
+from uuid import UUID
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from database.database import SessionLocal
+from models.staff import Staff
+from models.store import Store
+from models.user import User
+from services.mail import email_service
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Digest(NamedTuple):
+    store_id: UUID
+    recipients: List[str]
+    subject: str
+    body: str
+
+
+class LockedJob(ABC):
+    """A lifespan loop that every worker starts but only one runs at a time.
+
+    Each run takes a transaction-level advisory try-lock on ``lock_key``;
+    workers that wake up together and miss the lock skip that run.
+    """
+
+    name: str
+    lock_key: int
+    interval: int
+
+    def run_locked(self, work: Callable[[Session], T]) -> Optional[T]:
+        """``work(db)`` in one transaction under the lock; None when another
+        worker holds it"""
+        db = SessionLocal()
+        try:
+            locked = db.scalar(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": self.lock_key}
+            )
+            if not locked:
+                return None
+            result = work(db)
+            db.commit()
+            return result
+        finally:
+            db.close()
+
+    @abstractmethod
+    async def run_once(self):
+        """One run of the job"""
+
+    async def run_periodically(self):
+        """Lifespan task: one run every ``interval`` seconds"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("%s failed", self.name)
+
+
+class DigestJob(LockedJob):
+    """A LockedJob whose runs email each affected store one digest"""
+
+    @staticmethod
+    def recipients(db: Session, store_ids: List[UUID]) -> Dict[UUID, List[str]]:
+        """Staff and owner emails for every store, in one query"""
+        rows = db.execute(
+            select(Staff.store_id, User.email)
+            .join(User, User.id == Staff.user_id)
+            .where(Staff.store_id.in_(store_ids))
+            .union(
+                select(Store.id, User.email)
+                .join(User, User.id == Store.user_id)
+                .where(Store.id.in_(store_ids))
+            )
+        ).all()
+        emails = defaultdict(list)
+        for store_id, email in rows:
+            emails[store_id].append(email)
+        return emails
+
+    @staticmethod
+    def digest(
+        store_id: UUID,
+        recipients: List[str],
+        alert: str,
+        intro: str,
+        lines: Sequence[Tuple[str, str]],
+    ) -> Digest:
+        """One email listing (product_name, detail) lines, named after the
+        item when there is only one"""
+        if len(lines) == 1:
+            subject = f"{alert}: {lines[0][0]}"
+        else:
+            subject = f"{alert}: {len(lines)} items"
+        body = f"{intro}<br>" + "<br>".join(
+            f"{product_name} ({detail})" for product_name, detail in lines
+        )
+        return Digest(store_id, recipients, subject, body)
+
+    @abstractmethod
+    def collect_digests(self) -> List[Digest]:
+        """Claim what is due under the lock and build the digests"""
+
+    async def send_digests(self) -> List[Digest]:
+        digests = await run_in_threadpool(self.collect_digests)
+        await asyncio.gather(
+            *(
+                email_service.send_email(email=email, subject=digest.subject, body=digest.body)
+                for digest in digests
+                for email in digest.recipients
+            )
+        )
+        return digests
+
+    async def run_once(self):
+        await self.send_digests()
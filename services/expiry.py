@@ -0,0 +1,135 @@
+import os
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from crud.pagination import Page, PageParams, paginate
+from models.inventory import Inventory
+from services.background import Digest, DigestJob
+from services.inventory_cache import inventory_cache
+
+# How often items are checked against their expiry; 0 turns the job off
+EXPIRY_CHECK_SECONDS = int(os.getenv("EXPIRY_CHECK_SECONDS", 3600))
+# Items expiring within this many days are flagged "expiring_soon"
+EXPIRY_WARNING_DAYS = int(os.getenv("EXPIRY_WARNING_DAYS", 7))
+
+EXPIRING_SOON = "expiring_soon"
+EXPIRED = "expired"
+AVAILABLE = "available"
+# Statuses the job may overwrite; anything else was set by hand and is kept.
+# Must match ix_inventory_expiration_date_unflagged.
+FLAGGABLE_STATUSES = (AVAILABLE, EXPIRING_SOON)
+
+
+class ExpiryService(DigestJob):
+    """Expiring-items listing and the job that flags them through status.
+
+    Each run is one UPDATE that moves every active item past a horizon to
+    "expiring_soon" or "expired" and returns only the rows it changed, so
+    each crossing is reported once, in one digest per store. The same
+    UPDATE puts "expiring_soon" items whose date was pushed out or cleared
+    back to "available"; those are not reported.
+    """
+
+    name = "Expiry check"
+    lock_key = 0xE_C9_12E
+
+    def __init__(
+        self,
+        interval: int = EXPIRY_CHECK_SECONDS,
+        warning_days: int = EXPIRY_WARNING_DAYS,
+    ):
+        self.interval = interval
+        self.warning_days = warning_days
+
+    @staticmethod
+    def get_expiring(
+        db: Session,
+        store_id: UUID,
+        days: int,
+        include_expired: bool = False,
+        page: PageParams = PageParams(),
+    ) -> Page:
+        """Active items expiring within ``days``, soonest first"""
+        stmt = select(Inventory).where(
+            Inventory.store_id == store_id,
+            Inventory.expiration_date.is_not(None),
+            Inventory.is_active == True,
+            Inventory.expiration_date <= func.now() + timedelta(days=days),
+        )
+        if not include_expired:
+            stmt = stmt.where(Inventory.expiration_date > func.now())
+        return paginate(db, stmt, [Inventory.expiration_date, Inventory.id], page)
+
+    def flag_expiring(self, db: Session) -> List:
+        """Set status on items whose horizon changed; returns the changed
+        (store_id, product_name, expiration_date, status) rows"""
+        horizon = func.now() + timedelta(days=self.warning_days)
+        new_status = case(
+            (Inventory.expiration_date <= func.now(), EXPIRED),
+            (Inventory.expiration_date <= horizon, EXPIRING_SOON),
+            else_=AVAILABLE,
+        )
+        return db.execute(
+            update(Inventory)
+            .where(
+                Inventory.is_active == True,
+                Inventory.status.in_(FLAGGABLE_STATUSES),
+                # Each side is served by its own partial index
+                or_(
+                    Inventory.expiration_date <= horizon,
+                    Inventory.status == EXPIRING_SOON,
+                ),
+                Inventory.status != new_status,
+            )
+            .values(status=new_status)
+            .returning(
+                Inventory.store_id,
+                Inventory.product_name,
+                Inventory.expiration_date,
+                Inventory.status,
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+
+    def claim_flagged(self, db: Session) -> Tuple[Dict[UUID, List], Dict[UUID, List[str]]]:
+        """Flag items; returns the newly flagged items and recipients per store"""
+        changed = self.flag_expiring(db)
+        if not changed:
+            return {}, {}
+        items = defaultdict(list)
+        for store_id, product_name, expiration_date, status in changed:
+            if status != AVAILABLE:
+                items[store_id].append((product_name, expiration_date, status))
+        inventory_cache.bump(db, *{row.store_id for row in changed})
+        return items, (self.recipients(db, list(items)) if items else {})
+
+    def collect_digests(self) -> List[Digest]:
+        """Flag items and build one digest per store with new crossings"""
+        items, emails = self.run_locked(self.claim_flagged) or ({}, {})
+        return [
+            self.digest(
+                store_id,
+                emails.get(store_id, []),
+                "Expiry Alert",
+                "The following items are expiring. Please review them.",
+                [
+                    (
+                        product_name,
+                        f"{'expired' if status == EXPIRED else 'expires'} "
+                        f"{expiration_date:%Y-%m-%d}",
+                    )
+                    for product_name, expiration_date, status in sorted(
+                        flagged, key=lambda item: item[1]
+                    )
+                ],
+            )
+            for store_id, flagged in items.items()
+        ]
+
+
+expiry_service = ExpiryService()
@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Iterator, Sequence
+from uuid import UUID
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from database.database import ReadSessionLocal, SessionLocal, reads_from_primary
+from models.inventory import Inventory
+from models.sales import Sale, SaleItem
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+INVENTORY_EXPORT_COLUMNS = [
+    Inventory.id,
+    Inventory.sku,
+    Inventory.product_name,
+    Inventory.quantity,
+    Inventory.cost_price,
+    Inventory.selling_price,
+    Inventory.low_stock_threshold,
+    Inventory.high_stock_threshold,
+    Inventory.status,
+    Inventory.expiration_date,
+    Inventory.created_at,
+    Inventory.updated_at,
+]
+
+SALES_EXPORT_COLUMNS = [
+    Sale.id.label("sale_id"),
+    Sale.created_at,
+    Sale.payment_method,
+    Sale.total_amount,
+    Sale.amount_paid,
+    Sale.change_given,
+    Sale.outstanding_balance,
+    Sale.created_by,
+    SaleItem.inventory_id,
+    SaleItem.product_name,
+    SaleItem.quantity,
+    SaleItem.price,
+]
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    return value
+
+
+class ExportService:
+    """Streams query results as CSV or NDJSON without holding them in memory.
+
+    Rows come from a server-side cursor in batches of ``batch_size``; each
+    batch is encoded, optionally gzipped, and yielded before the next one
+    is fetched, so memory stays flat and the first bytes go out while the
+    query is still running.
+    """
+
+    def __init__(self, batch_size: int = EXPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    @staticmethod
+    def inventory_query(store_id: UUID) -> Select:
+        return (
+            select(*INVENTORY_EXPORT_COLUMNS)
+            .where(Inventory.store_id == store_id, Inventory.is_active == True)
+            .order_by(Inventory.created_at, Inventory.id)
+        )
+
+    @staticmethod
+    def sales_query(store_id: UUID) -> Select:
+        """One row per sale line, oldest sale first"""
+        return (
+            select(*SALES_EXPORT_COLUMNS)
+            .outerjoin(SaleItem, SaleItem.sale_id == Sale.id)
+            .where(Sale.store_id == store_id, Sale.is_deleted == False)
+            .order_by(Sale.created_at, Sale.id)
+        )
+
+    @staticmethod
+    def _encode_csv(header: Sequence[str]) -> Callable:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+
+        def encode(rows) -> str:
+            writer.writerows([[_plain(value) for value in row] for row in rows])
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        return encode
+
+    @staticmethod
+    def _encode_ndjson(header: Sequence[str]) -> Callable:
+        def encode(rows) -> str:
+            return "".join(
+                json.dumps(dict(zip(header, row)), default=_plain) + "\n"
+                for row in rows
+            )
+
+        return encode
+
+    def stream(
+        self,
+        session_factory: Callable[[], Session],
+        stmt: Select,
+        fmt: str = "csv",
+        compress: bool = False,
+    ) -> Iterator[bytes]:
+        """Generator for a StreamingResponse.
+
+        It opens its own session because request-scoped dependencies are
+        torn down before a streamed body is sent.
+        """
+        header = [column.name for column in stmt.selected_columns]
+        encode = (self._encode_ndjson if fmt == "ndjson" else self._encode_csv)(header)
+        # wbits=31 writes a gzip container rather than a bare zlib stream
+        compressor = zlib.compressobj(wbits=31) if compress else None
+
+        def emit(text: str) -> bytes:
+            data = text.encode()
+            if compressor is None:
+                return data
+            # Sync flush so each batch reaches the client as it is produced
+            return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        header_chunk = encode([])
+        if header_chunk:
+            yield emit(header_chunk)
+        db = session_factory()
+        try:
+            result = db.execute(stmt.execution_options(yield_per=self.batch_size))
+            for rows in result.partitions():
+                yield emit(encode(rows))
+        finally:
+            db.close()
+        if compressor:
+            yield compressor.flush()
+
+    @staticmethod
+    def accepts_gzip(accept_encoding: str) -> bool:
+        """Whether Accept-Encoding allows gzip: q=0 refuses it, and an
+        explicit gzip entry takes precedence over ``*``"""
+        weights = {}
+        for entry in accept_encoding.split(","):
+            coding, *params = (part.strip() for part in entry.split(";"))
+            q = 1.0
+            for param in params:
+                name, _, value = param.partition("=")
+                if name.strip().lower() == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            weights[coding.lower()] = q
+        return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+    def response(
+        self, request: Request, stmt: Select, fmt: str, filename: str
+    ) -> StreamingResponse:
+        """StreamingResponse for ``stmt``, gzipped when the client accepts it"""
+        compress = self.accepts_gzip(request.headers.get("accept-encoding", ""))
+        session_factory = (
+            SessionLocal if reads_from_primary(request) else ReadSessionLocal
+        )
+        headers = {
+            "Content-Disposition": f'attachment; filename="{filename}.{fmt}"',
+            "Vary": "Accept-Encoding",
+        }
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(
+            self.stream(session_factory, stmt, fmt, compress),
+            media_type=EXPORT_FORMATS[fmt],
+            headers=headers,
+        )
+
+
+export_service = ExportService()
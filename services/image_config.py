@@ -1,58 +1,211 @@
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
+import asyncio
 import os
-import io
+import shutil
+import tempfile
+import threading
 import time
-from fastapi import UploadFile, HTTPException
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Optional
+
+from fastapi import UploadFile, HTTPException, status
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
+# "cloudinary", or "local" for tests and stores without internet access
+IMAGE_STORAGE_BACKEND = os.getenv("IMAGE_STORAGE_BACKEND", "cloudinary")
+IMAGE_LOCAL_DIR = os.getenv("IMAGE_LOCAL_DIR", "media")
+IMAGE_LOCAL_URL = os.getenv("IMAGE_LOCAL_URL", "/media")
+IMAGE_MAX_SIZE_MB = int(os.getenv("IMAGE_MAX_SIZE_MB", 10))
+IMAGE_UPLOAD_CHUNK_SIZE = int(os.getenv("IMAGE_UPLOAD_CHUNK_SIZE", 256 * 1024))
+IMAGE_UPLOAD_TIMEOUT_SECONDS = float(os.getenv("IMAGE_UPLOAD_TIMEOUT_SECONDS", 30))
+IMAGE_UPLOAD_WORKERS = int(os.getenv("IMAGE_UPLOAD_WORKERS", 4))
+
+_uploader = None
+_uploader_lock = threading.Lock()
+
+
+def get_uploader():
+    """cloudinary.uploader, imported and configured on first use"""
+    global _uploader
+    if _uploader is None:
+        with _uploader_lock:
+            if _uploader is None:
+                import cloudinary
+                import cloudinary.uploader
+
+                cloudinary.config(
+                    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+                    api_key=os.getenv("CLOUDINARY_API_KEY"),
+                    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+                    secure=True
+                )
+                _uploader = cloudinary.uploader
+    return _uploader
+
+
+class StorageBackend(ABC):
+    """Where uploaded images end up. Methods are blocking; ImageConfig runs
+    them on its thread pool."""
+
+    @abstractmethod
+    def save(self, file: BinaryIO, folder: str, filename: str) -> str:
+        """Store ``file`` under ``folder`` and return its public URL"""
+
+    @abstractmethod
+    def delete(self, public_id: str) -> bool:
+        """Remove a stored file; False if it was not there"""
+
+
+class CloudinaryStorage(StorageBackend):
+    def __init__(self, timeout: float = IMAGE_UPLOAD_TIMEOUT_SECONDS):
+        self.timeout = timeout
+
+    def save(self, file: BinaryIO, folder: str, filename: str) -> str:
+        # Cloudinary names the asset itself, so filename is not needed
+        response = get_uploader().upload(
+            file, folder=folder, timestamp=int(time.time()), timeout=self.timeout
+        )
+        return response.get("secure_url")
+
+    def delete(self, public_id: str) -> bool:
+        return get_uploader().destroy(public_id).get("result") == "ok"
+
+
+class LocalStorage(StorageBackend):
+    """Files under ``root``, served by main.py at ``base_url``"""
+
+    def __init__(self, root: str = IMAGE_LOCAL_DIR, base_url: str = IMAGE_LOCAL_URL):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def save(self, file: BinaryIO, folder: str, filename: str) -> str:
+        extension = os.path.splitext(filename or "")[1].lower()
+        public_id = f"{folder}/{uuid.uuid4().hex}{extension}"
+        path = os.path.join(self.root, public_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as target:
+            shutil.copyfileobj(file, target)
+        return f"{self.base_url}/{public_id}"
+
+    def delete(self, public_id: str) -> bool:
+        path = os.path.join(self.root, public_id.removeprefix(self.base_url + "/"))
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+
+STORAGE_BACKENDS = {"cloudinary": CloudinaryStorage, "local": LocalStorage}
+
+
+class UploadTimeout(HTTPException):
+    """The backend's save outlived the timeout. Its thread cannot be
+    stopped, so ``save`` is left running and still resolves to the URL."""
+
+    def __init__(self, save: asyncio.Future):
+        super().__init__(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Image upload timed out",
+        )
+        self.save = save
+
 
 class ImageConfig:
-    MAX_SIZE_MB = 10
+    """Validates image uploads and hands them to the storage backend.
 
-    @staticmethod
-    async def validate_and_upload_profile_picture(file: UploadFile, user_id: str) -> str:
-        # Validate file type
-        if not file.content_type.startswith("image/"):
-            raise HTTPException(
-                status_code=400,
-                detail="File is not an image"
-            )
-        # Read and validate file size
-        contents = await file.read()
-        if len(contents) > ImageConfig.MAX_SIZE_MB * 1024 * 1024:
+    The upload is read in chunks into a spooled temp file and rejected as
+    soon as it passes the size cap. The backend call runs on a dedicated
+    thread pool with a timeout, so a slow store never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        storage: Optional[StorageBackend] = None,
+        max_size_mb: int = IMAGE_MAX_SIZE_MB,
+        chunk_size: int = IMAGE_UPLOAD_CHUNK_SIZE,
+        timeout: float = IMAGE_UPLOAD_TIMEOUT_SECONDS,
+        workers: int = IMAGE_UPLOAD_WORKERS,
+    ):
+        self.storage = storage or STORAGE_BACKENDS[IMAGE_STORAGE_BACKEND]()
+        self.max_size_mb = max_size_mb
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="image-upload"
+        )
+
+    def _too_large(self):
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File size exceeds {self.max_size_mb} MB limit",
+        )
+
+    async def read_upload(self, file: UploadFile, target: Optional[BinaryIO] = None) -> BinaryIO:
+        """Copy the upload into ``target`` (a spooled temp file by default),
+        stopping at the size cap"""
+        if not (file.content_type or "").startswith("image/"):
             raise HTTPException(
-                status_code=400,
-                detail=f"File size exceeds {ImageConfig.MAX_SIZE_MB} MB limit"
+                status_code=status.HTTP_400_BAD_REQUEST, detail="File is not an image"
             )
-        # Prepare file for Cloudinary
-        file_stream = io.BytesIO(contents)
-        file_stream.name = file.filename
+        max_bytes = self.max_size_mb * 1024 * 1024
+        if file.size is not None and file.size > max_bytes:
+            raise self._too_large()
+        spool = target or tempfile.SpooledTemporaryFile(max_size=self.chunk_size)
+        size = 0
+        while chunk := await file.read(self.chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                spool.close()
+                raise self._too_large()
+            spool.write(chunk)
+        spool.seek(0)
+        return spool
 
-        # Upload to Cloudinary
+    async def store(self, file: BinaryIO, folder: str, filename: str) -> str:
+        """Run the backend's save on the upload pool, bounded by the timeout.
+
+        Raises UploadTimeout when the save is still running at the timeout.
+        """
+        loop = asyncio.get_running_loop()
+        save = loop.run_in_executor(
+            self._executor, self.storage.save, file, folder, filename
+        )
+        try:
+            return await asyncio.wait_for(asyncio.shield(save), self.timeout)
+        except asyncio.TimeoutError:
+            raise UploadTimeout(save)
+
+    async def upload_image(self, file: UploadFile, folder: str) -> str:
+        """Validate ``file`` and store it under ``folder``; returns its URL"""
+        spool = await self.read_upload(file)
+        saving = False
         try:
-            timestamp = int(time.time())
-            response = cloudinary.uploader.upload(file_stream, folder=f"users/{user_id}/profile",timestamp=timestamp)
-            return response.get('secure_url')
+            return await self.store(spool, folder, file.filename)
+        except UploadTimeout as timeout:
+            # The save thread is still reading the spool; close it after
+            saving = True
+            timeout.save.add_done_callback(lambda _: spool.close())
+            raise
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error uploading image: {e}")
+        finally:
+            if not saving:
+                spool.close()
+
+    async def validate_and_upload_profile_picture(self, file: UploadFile, user_id: str) -> str:
+        return await self.upload_image(file, f"users/{user_id}/profile")
 
-    @staticmethod
-    def delete_profile_picture(public_id: str):
+    def delete_profile_picture(self, public_id: str):
         try:
-            result = cloudinary.uploader.destroy(public_id)
-            return result.get('result') == 'ok'
+            return self.storage.delete(public_id)
         except Exception as e:
             raise Exception(f"Error deleting image: {e}")
 
-image_service = ImageConfig()
\ No newline at end of file
+image_service = ImageConfig()
@@ -0,0 +1,192 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from crud.pagination import NEXT_CURSOR_HEADER, Page, PageParams
+from models.store import Store
+
+# Serialized inventory pages kept in memory, least recently used out
+INVENTORY_CACHE_SIZE = int(os.getenv("INVENTORY_CACHE_SIZE", 1000))
+# How long a known store version is trusted before it is re-read, which
+# bounds how late writes made by other workers are seen
+INVENTORY_VERSION_SYNC_SECONDS = float(os.getenv("INVENTORY_VERSION_SYNC_SECONDS", 2))
+
+_PENDING = "inventory_versions"
+
+CacheKey = Tuple[UUID, int, Optional[str], int]
+
+
+class InventoryCache:
+    """Per-store inventory versions plus an LRU of serialized list pages.
+
+    Every stock write calls bump() inside its transaction, which increments
+    stores.inventory_version; the new version is applied in memory when the
+    session commits. Reads trust the in-memory version for ``sync_seconds``
+    so an unchanged poll is answered with 304 (or a cached body) without an
+    inventory query. Pages are cached under (store, version, cursor, limit),
+    so a bump makes old entries unreachable rather than needing eviction.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = INVENTORY_CACHE_SIZE,
+        sync_seconds: float = INVENTORY_VERSION_SYNC_SECONDS,
+    ):
+        self.maxsize = maxsize
+        self.sync_seconds = sync_seconds
+        self.hits = 0
+        self.misses = 0
+        self._versions: Dict[UUID, Tuple[int, float]] = {}
+        self._pages: "OrderedDict[CacheKey, Tuple[bytes, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bump_statement(store_ids: Iterable[UUID]):
+        return (
+            update(Store)
+            .where(Store.id.in_(set(store_ids)))
+            .values(inventory_version=Store.inventory_version + 1)
+            .returning(Store.id, Store.inventory_version)
+            .execution_options(synchronize_session=False)
+        )
+
+    def bump(self, db: Session, *store_ids: UUID):
+        """Increment the stores' versions as part of the caller's transaction"""
+        rows = db.execute(self._bump_statement(store_ids)).all()
+        db.info.setdefault(_PENDING, {}).update(rows)
+
+    async def bump_async(self, db: AsyncSession, *store_ids: UUID):
+        rows = (await db.execute(self._bump_statement(store_ids))).all()
+        db.sync_session.info.setdefault(_PENDING, {}).update(rows)
+
+    def record(self, versions: Dict[UUID, int]):
+        """Remember versions read or committed; never moves a store backwards"""
+        now = time.monotonic()
+        with self._lock:
+            for store_id, version in versions.items():
+                known = self._versions.get(store_id)
+                if known is None or version >= known[0]:
+                    self._versions[store_id] = (version, now)
+
+    def version(self, db: Session, store_id: UUID, refresh: bool = False) -> Optional[int]:
+        """The store's version, from memory while fresh; None if no such store"""
+        if not refresh:
+            with self._lock:
+                known = self._versions.get(store_id)
+            if known is not None and time.monotonic() - known[1] < self.sync_seconds:
+                return known[0]
+        version = db.scalar(select(Store.inventory_version).where(Store.id == store_id))
+        if version is not None:
+            self.record({store_id: version})
+        return version
+
+    @staticmethod
+    def etag(key: CacheKey) -> str:
+        return '"%s"' % hashlib.sha1(repr(key).encode()).hexdigest()
+
+    @staticmethod
+    def _matches(request: Request, etag: str) -> bool:
+        header = request.headers.get("if-none-match")
+        if not header:
+            return False
+        # If-None-Match uses weak comparison, so W/ prefixes are ignored
+        tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+        return "*" in tags or etag in tags
+
+    def respond(
+        self,
+        request: Request,
+        db: Session,
+        store_id: UUID,
+        page: PageParams,
+        build: Callable[[], Tuple[dict, Page]],
+    ) -> Response:
+        """Serve a store inventory page with an ETag, from cache when possible.
+
+        ``build`` runs the query and returns (response body, page); it is
+        only called on a cache miss.
+        """
+        version = self.version(db, store_id)
+        if version is None:
+            body, result = build()
+            return self._response(jsonable_encoder(body), result.next_cursor)
+        key = (store_id, version, page.cursor, page.limit)
+        etag = self.etag(key)
+        if self._matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is not None:
+            return self._response(*cached, etag=etag)
+
+        # Read the version before the rows: a write landing in between only
+        # labels newer rows with an older version, never the other way round
+        version = self.version(db, store_id, refresh=True)
+        body, result = build()
+        content = JSONResponse(jsonable_encoder(body)).body
+        key = (store_id, version, page.cursor, page.limit)
+        if self.maxsize > 0:
+            with self._lock:
+                self._pages[key] = (content, result.next_cursor)
+                self._pages.move_to_end(key)
+                while len(self._pages) > self.maxsize:
+                    self._pages.popitem(last=False)
+        return self._response(content, result.next_cursor, etag=self.etag(key))
+
+    @staticmethod
+    def _response(content, next_cursor: Optional[str], etag: Optional[str] = None):
+        headers = {}
+        if etag:
+            headers["ETag"] = etag
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        if isinstance(content, bytes):
+            return Response(content, media_type="application/json", headers=headers)
+        return JSONResponse(content, headers=headers)
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+            self._pages.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._pages),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+inventory_cache = InventoryCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_bumped_versions(session):
+    versions = session.info.pop(_PENDING, None)
+    if versions:
+        inventory_cache.record(versions)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_bumped_versions(session):
+    session.info.pop(_PENDING, None)
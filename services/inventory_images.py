@@ -0,0 +1,166 @@
+import asyncio
+import os
+import tempfile
+from typing import Optional
+from uuid import UUID, uuid4
+
+from fastapi import BackgroundTasks, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+
+from database.database import SessionLocal
+from models.inventory import ImageStatus, Inventory
+from services.image_config import UploadTimeout, image_service
+from services.inventory_cache import inventory_cache
+
+# Upload attempts per image before it is marked failed
+IMAGE_UPLOAD_ATTEMPTS = int(os.getenv("IMAGE_UPLOAD_ATTEMPTS", 3))
+# Delay before the first retry; doubles after each failed attempt
+IMAGE_UPLOAD_RETRY_SECONDS = float(os.getenv("IMAGE_UPLOAD_RETRY_SECONDS", 1))
+
+
+class InventoryImageService:
+    """Uploads inventory images after the item has been committed.
+
+    The request only validates the image and spools it to disk; the item is
+    saved with image_status "pending" and the client gets its response
+    straight away. A background task then uploads the file, retrying up to
+    ``attempts`` times, and patches image_url with image_status "ready", or
+    records "failed" and the last error. A replaced image keeps its old URL
+    until the new one is ready.
+
+    Each upload gets a token in image_upload_id. A newer upload replaces
+    it, so an older one that finishes later neither overwrites the row nor
+    keeps retrying. A save that outlives the timeout is waited for, not
+    retried, so the same file is never stored twice at once.
+    """
+
+    def __init__(
+        self,
+        attempts: int = IMAGE_UPLOAD_ATTEMPTS,
+        retry_seconds: float = IMAGE_UPLOAD_RETRY_SECONDS,
+    ):
+        self.attempts = attempts
+        self.retry_seconds = retry_seconds
+
+    @staticmethod
+    async def stage(file: UploadFile) -> str:
+        """Validate the upload and copy it to a temp file for process()"""
+        with tempfile.NamedTemporaryFile(delete=False, prefix="inventory-image-") as spool:
+            try:
+                await image_service.read_upload(file, spool)
+            except BaseException:
+                spool.close()
+                os.remove(spool.name)
+                raise
+        return spool.name
+
+    @staticmethod
+    def discard(path: Optional[str]):
+        """Remove a staged file that will not be scheduled"""
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def mark_pending(inventory: Inventory):
+        """Start a new upload on the row; call before committing it"""
+        inventory.image_status = ImageStatus.PENDING
+        inventory.image_error = None
+        inventory.image_upload_id = uuid4()
+
+    async def schedule(
+        self,
+        background_tasks: Optional[BackgroundTasks],
+        inventory: Inventory,
+        path: str,
+        filename: str,
+    ):
+        """Queue the upload; without background tasks it runs before returning"""
+        args = (
+            inventory.id,
+            inventory.image_upload_id,
+            inventory.store_id,
+            path,
+            filename,
+        )
+        if background_tasks is None:
+            await self.process(*args)
+        else:
+            background_tasks.add_task(self.process, *args)
+
+    async def process(
+        self, inventory_id: UUID, upload_id: UUID, store_id: UUID, path: str, filename: str
+    ):
+        """Background task: upload the staged file and record the outcome"""
+        error = None
+        try:
+            for attempt in range(self.attempts):
+                if attempt:
+                    await asyncio.sleep(self.retry_seconds * 2 ** (attempt - 1))
+                    if not await run_in_threadpool(self._is_current, inventory_id, upload_id):
+                        return
+                try:
+                    with open(path, "rb") as source:
+                        try:
+                            url = await image_service.store(
+                                source,
+                                f"stores/{store_id}/inventory",
+                                filename,
+                            )
+                        except UploadTimeout as timeout:
+                            # Its thread is still reading the file; a retry now
+                            # would store a second copy
+                            url = await timeout.save
+                except Exception as e:
+                    error = e.detail if isinstance(e, HTTPException) else str(e)
+                    continue
+                await run_in_threadpool(
+                    self._finish, inventory_id, upload_id, ImageStatus.READY, url=url
+                )
+                return
+            await run_in_threadpool(
+                self._finish, inventory_id, upload_id, ImageStatus.FAILED, error=error
+            )
+        finally:
+            os.remove(path)
+
+    @staticmethod
+    def _is_current(inventory_id: UUID, upload_id: UUID) -> bool:
+        db = SessionLocal()
+        try:
+            return db.scalar(
+                select(Inventory.image_upload_id).where(Inventory.id == inventory_id)
+            ) == upload_id
+        finally:
+            db.close()
+
+    @staticmethod
+    def _finish(
+        inventory_id: UUID,
+        upload_id: UUID,
+        image_status: ImageStatus,
+        url: Optional[str] = None,
+        error: Optional[str] = None,
+    ):
+        values = {"image_status": image_status, "image_error": error}
+        if url is not None:
+            values["image_url"] = url
+        db = SessionLocal()
+        try:
+            store_id = db.scalar(
+                update(Inventory)
+                .where(
+                    Inventory.id == inventory_id,
+                    Inventory.image_upload_id == upload_id,
+                )
+                .values(values)
+                .returning(Inventory.store_id)
+            )
+            if store_id is not None:
+                inventory_cache.bump(db, store_id)
+            db.commit()
+        finally:
+            db.close()
+
+
+inventory_image_service = InventoryImageService()
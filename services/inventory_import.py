@@ -0,0 +1,232 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, UploadFile, status
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from database.database import SessionLocal
+from models.inventory import Inventory
+from models.inventory_import import ImportStatus, InventoryImportJob
+from models.stock import StockMovementReason
+from models.store import Store
+from schemas.inventory import InventoryCreate
+from services.inventory_cache import inventory_cache
+from services.product_search import product_search_service
+from services.stock_ledger import stock_ledger_service
+
+# Rows validated and inserted per statement/commit
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+# Row errors kept on the job; the failure count is always exact
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+IMPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+Row = Tuple[int, Dict]
+
+
+class InventoryImportService:
+    """Bulk inventory import from an uploaded CSV or JSONL file.
+
+    The upload is spooled to disk and processed in the background, batch by
+    batch: rows are validated with InventoryCreate, then inserted with one
+    multi-row INSERT ... ON CONFLICT (sku) DO NOTHING per batch, which also
+    resolves SKU conflicts. Progress and row errors are written to an
+    InventoryImportJob after every batch so any worker can report them.
+    """
+
+    def __init__(
+        self, batch_size: int = IMPORT_BATCH_SIZE, max_errors: int = IMPORT_MAX_ERRORS
+    ):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+
+    @staticmethod
+    def detect_format(filename: str) -> str:
+        fmt = IMPORT_FORMATS.get(os.path.splitext(filename or "")[1].lower())
+        if fmt is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload a .csv or .jsonl file",
+            )
+        return fmt
+
+    def start(
+        self, db: Session, store_id: UUID, created_by: UUID, file: UploadFile
+    ) -> Tuple[InventoryImportJob, str]:
+        """Create the job and copy the upload to a temp file for run()"""
+        fmt = self.detect_format(file.filename)
+        if not db.scalar(select(Store.id).where(Store.id == store_id)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Valid Store ID is required"
+            )
+        with tempfile.NamedTemporaryFile(
+            delete=False, prefix="inventory-import-", suffix=f".{fmt}"
+        ) as spool:
+            shutil.copyfileobj(file.file, spool, 1024 * 1024)
+        job = InventoryImportJob(
+            store_id=store_id, created_by=created_by, filename=file.filename
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job, spool.name
+
+    @staticmethod
+    def get_job(db: Session, store_id: UUID, job_id: UUID) -> InventoryImportJob:
+        job = db.scalar(
+            select(InventoryImportJob).where(
+                InventoryImportJob.id == job_id, InventoryImportJob.store_id == store_id
+            )
+        )
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found"
+            )
+        return job
+
+    @staticmethod
+    def read_rows(path: str) -> Iterator[Row]:
+        """(row number, raw fields) pairs; unparseable lines yield an error"""
+        if path.endswith(".csv"):
+            with open(path, newline="", encoding="utf-8-sig") as source:
+                for number, row in enumerate(csv.DictReader(source), start=1):
+                    # Empty cells fall back to the schema defaults
+                    yield number, {
+                        key: value for key, value in row.items() if key and value != ""
+                    }
+            return
+        with open(path, encoding="utf-8-sig") as source:
+            for number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row = {"__error__": f"Invalid JSON: {e}"}
+                if not isinstance(row, dict):
+                    row = {"__error__": "Each line must be a JSON object"}
+                yield number, row
+
+    def run(self, job_id: UUID, path: str):
+        """Background task: import the spooled file into the job's store"""
+        db = SessionLocal()
+        job = None
+        try:
+            job = db.get(InventoryImportJob, job_id)
+            job.status = ImportStatus.RUNNING
+            db.commit()
+            rows = self.read_rows(path)
+            while batch := list(islice(rows, self.batch_size)):
+                self._import_batch(db, job, batch)
+            job.status = ImportStatus.COMPLETED
+        except Exception as e:
+            db.rollback()
+            job = db.get(InventoryImportJob, job_id)
+            job.status = ImportStatus.FAILED
+            job.detail = str(e)
+        finally:
+            if job is not None:
+                job.finished_at = datetime.utcnow()
+                db.commit()
+                product_search_service.invalidate(job.store_id)
+            db.close()
+            os.remove(path)
+
+    def _import_batch(self, db: Session, job: InventoryImportJob, batch: List[Row]):
+        errors = []
+        valid: Dict[str, Tuple[int, InventoryCreate]] = {}
+        for number, raw in batch:
+            if "__error__" in raw:
+                errors.append({"row": number, "sku": None, "errors": [raw["__error__"]]})
+                continue
+            try:
+                item = InventoryCreate.model_validate(raw)
+            except ValidationError as e:
+                errors.append(
+                    {
+                        "row": number,
+                        "sku": None if raw.get("sku") is None else str(raw["sku"]),
+                        "errors": [
+                            f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                            for error in e.errors()
+                        ],
+                    }
+                )
+                continue
+            if item.sku in valid:
+                errors.append(
+                    {"row": number, "sku": item.sku, "errors": ["Duplicate SKU in file"]}
+                )
+                continue
+            valid[item.sku] = (number, item)
+
+        imported = {}
+        if valid:
+            now = datetime.now(timezone.utc)
+            # executemany + RETURNING is sent as batched multi-row INSERTs
+            # ("insertmanyvalues"), with the statement compiled once
+            imported = {
+                sku: (inventory_id, quantity)
+                for sku, inventory_id, quantity in db.execute(
+                    insert(Inventory)
+                    .on_conflict_do_nothing(index_elements=[Inventory.sku])
+                    .returning(Inventory.sku, Inventory.id, Inventory.quantity),
+                    [
+                        {
+                            **item.model_dump(),
+                            "created_by": job.created_by,
+                            "store_id": job.store_id,
+                            "is_active": True,
+                            "low_stock_since": now
+                            if item.low_stock_threshold is not None
+                            and item.quantity <= item.low_stock_threshold
+                            else None,
+                        }
+                        for _, item in valid.values()
+                    ],
+                )
+            }
+            errors.extend(
+                {"row": number, "sku": sku, "errors": ["SKU already exists"]}
+                for sku, (number, _) in valid.items()
+                if sku not in imported
+            )
+
+        job.rows_processed += len(batch)
+        job.rows_imported += len(imported)
+        job.rows_failed += len(errors)
+        room = self.max_errors - len(job.errors)
+        if errors and room > 0:
+            errors.sort(key=lambda error: error["row"])
+            # Reassign so SQLAlchemy sees the JSONB change
+            job.errors = job.errors + errors[:room]
+        if imported:
+            stock_ledger_service.record(
+                db,
+                [
+                    {
+                        "inventory_id": inventory_id,
+                        "store_id": job.store_id,
+                        "delta": quantity,
+                        "reason": StockMovementReason.IMPORT,
+                        "reference_id": job.id,
+                        "created_by": job.created_by,
+                    }
+                    for inventory_id, quantity in imported.values()
+                    if quantity
+                ],
+            )
+            inventory_cache.bump(db, job.store_id)
+        db.commit()
+
+
+inventory_import_service = InventoryImportService()
@@ -0,0 +1,115 @@
+import os
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import Select, and_, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from crud.pagination import Page, PageParams, paginate
+from models.inventory import Inventory, LowStockDigest
+from services.background import Digest, DigestJob
+
+# At most one digest per store per interval; 0 turns the digest loop off
+LOW_STOCK_DIGEST_SECONDS = int(os.getenv("LOW_STOCK_DIGEST_SECONDS", 900))
+
+
+class LowStockService(DigestJob):
+    """Low-stock listing and the per-store digest email.
+
+    Writes only stamp Inventory.low_stock_since when an item crosses its
+    threshold (see Inventory.track_low_stock). A background loop then emails
+    each store one digest per interval listing the items that crossed since
+    its previous digest, instead of one email per recipient per edit.
+    """
+
+    name = "Low stock digest"
+    lock_key = 0x10_57_0C_4
+
+    def __init__(self, interval: int = LOW_STOCK_DIGEST_SECONDS):
+        self.interval = interval
+
+    @staticmethod
+    def get_low_stock(
+        db: Session, store_id: UUID, page: PageParams = PageParams()
+    ) -> Page:
+        """Active items at or below their threshold, longest-low first"""
+        return paginate(
+            db,
+            select(Inventory).where(
+                Inventory.store_id == store_id,
+                Inventory.low_stock_since.is_not(None),
+                Inventory.is_active == True,
+            ),
+            [Inventory.low_stock_since, Inventory.id],
+            page,
+        )
+
+    def due_items_query(self) -> Select:
+        """Items that crossed since their store's last digest, if that is due"""
+        return (
+            select(
+                Inventory.store_id,
+                Inventory.product_name,
+                Inventory.quantity,
+                Inventory.low_stock_threshold,
+            )
+            .outerjoin(LowStockDigest, LowStockDigest.store_id == Inventory.store_id)
+            .where(
+                Inventory.low_stock_since.is_not(None),
+                Inventory.is_active == True,
+                or_(
+                    LowStockDigest.last_sent_at.is_(None),
+                    and_(
+                        Inventory.low_stock_since > LowStockDigest.last_sent_at,
+                        LowStockDigest.last_sent_at
+                        <= func.now() - timedelta(seconds=self.interval),
+                    ),
+                ),
+            )
+            .order_by(Inventory.store_id, Inventory.product_name)
+        )
+
+    def claim_due(self, db: Session) -> Tuple[Dict[UUID, List], Dict[UUID, List[str]]]:
+        """Due items and recipients per store; marks those stores as sent"""
+        items = defaultdict(list)
+        for store_id, product_name, quantity, threshold in db.execute(
+            self.due_items_query()
+        ):
+            items[store_id].append((product_name, quantity, threshold))
+        if not items:
+            return {}, {}
+        emails = self.recipients(db, list(items))
+        db.execute(
+            insert(LowStockDigest)
+            .values(
+                [{"store_id": store_id, "last_sent_at": func.now()} for store_id in items]
+            )
+            .on_conflict_do_update(
+                index_elements=[LowStockDigest.store_id],
+                set_={"last_sent_at": func.now()},
+            )
+        )
+        return items, emails
+
+    def collect_digests(self) -> List[Digest]:
+        """Build the due digests and mark those stores as sent"""
+        items, emails = self.run_locked(self.claim_due) or ({}, {})
+        return [
+            self.digest(
+                store_id,
+                emails.get(store_id, []),
+                "Low Stock Alert",
+                "The following items are low. Please restock soon.",
+                [
+                    (product_name, f"current: {quantity}, threshold: {threshold}")
+                    for product_name, quantity, threshold in low
+                ],
+            )
+            for store_id, low in items.items()
+        ]
+
+
+low_stock_service = LowStockService()
@@ -1,32 +1,103 @@
+import logging
 import os
+import threading
+from typing import Optional
 
 from dotenv import load_dotenv
-from fastapi_mail import ConnectionConfig, FastMail, MessageSchema
 from pydantic import EmailStr
 
 load_dotenv()
-conf = ConnectionConfig(
-    MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
-    MAIL_PASSWORD=os.getenv("MAIL_PASSWORD"),
-    MAIL_FROM=os.getenv("MAIL_FROM"),
-    MAIL_PORT=int(os.getenv("MAIL_PORT")),
-    MAIL_SERVER=os.getenv("MAIL_SERVER"),
-    MAIL_FROM_NAME=os.getenv("MAIL_FROM_NAME"),
-    MAIL_STARTTLS=os.getenv("MAIL_STARTTLS", "False").lower() == "true",
-    MAIL_SSL_TLS=os.getenv("MAIL_SSL_TLS", "True").lower() == "true",
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
-)
+
+logger = logging.getLogger(__name__)
+
+MAIL_USERNAME = os.getenv("MAIL_USERNAME")
+MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
+MAIL_FROM = os.getenv("MAIL_FROM")
+MAIL_PORT = os.getenv("MAIL_PORT")
+MAIL_SERVER = os.getenv("MAIL_SERVER")
+MAIL_FROM_NAME = os.getenv("MAIL_FROM_NAME")
+MAIL_STARTTLS = os.getenv("MAIL_STARTTLS", "False").lower() == "true"
+MAIL_SSL_TLS = os.getenv("MAIL_SSL_TLS", "True").lower() == "true"
+
+_mail_client = None
+_mail_client_lock = threading.Lock()
+
+
+def mail_settings_error() -> Optional[str]:
+    """Why the MAIL_* settings cannot build a client, or None"""
+    missing = [
+        name
+        for name, value in (
+            ("MAIL_USERNAME", MAIL_USERNAME),
+            ("MAIL_PASSWORD", MAIL_PASSWORD),
+            ("MAIL_FROM", MAIL_FROM),
+            ("MAIL_PORT", MAIL_PORT),
+            ("MAIL_SERVER", MAIL_SERVER),
+        )
+        if not value
+    ]
+    if missing:
+        return f"Mail settings missing: {', '.join(missing)}"
+    if not MAIL_PORT.isdigit():
+        return f"MAIL_PORT must be a port number, got {MAIL_PORT!r}"
+    if "@" not in MAIL_FROM:
+        return f"MAIL_FROM must be an email address, got {MAIL_FROM!r}"
+    return None
+
+
+def check_mail_settings() -> bool:
+    """Warn at startup when email is not configured. Deployments without
+    SMTP still boot; each send then fails on its own."""
+    error = mail_settings_error()
+    if error:
+        logger.warning("%s; emails will not be sent", error)
+    return error is None
+
+
+def get_mail_client():
+    """FastMail client, built on first send.
+
+    fastapi_mail is slow to import and its config needs MAIL_* settings, so
+    neither is touched until an email actually goes out. Raises
+    RuntimeError when the settings cannot build a client.
+    """
+    global _mail_client
+    if _mail_client is None:
+        with _mail_client_lock:
+            if _mail_client is None:
+                error = mail_settings_error()
+                if error:
+                    raise RuntimeError(error)
+                from fastapi_mail import ConnectionConfig, FastMail
+
+                conf = ConnectionConfig(
+                    MAIL_USERNAME=MAIL_USERNAME,
+                    MAIL_PASSWORD=MAIL_PASSWORD,
+                    MAIL_FROM=MAIL_FROM,
+                    MAIL_PORT=int(MAIL_PORT),
+                    MAIL_SERVER=MAIL_SERVER,
+                    MAIL_FROM_NAME=MAIL_FROM_NAME,
+                    MAIL_STARTTLS=MAIL_STARTTLS,
+                    MAIL_SSL_TLS=MAIL_SSL_TLS,
+                    USE_CREDENTIALS=True,
+                    VALIDATE_CERTS=True
+                )
+                _mail_client = FastMail(conf)
+    return _mail_client
+
+
 class EmailService:
     @staticmethod
     async def send_email(email: EmailStr, subject: str, body: str, retry: int = 0):
+        from fastapi_mail import MessageSchema
+
         message = MessageSchema(
             subject=subject,
             recipients=[email],
             body=body,
             subtype="html"
         )
-        fm = FastMail(conf)
+        fm = get_mail_client()
         try:
             await fm.send_message(message)
         except Exception as e:
@@ -1,67 +1,200 @@
-from datetime import datetime
-from typing import Dict, List, Union
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Tuple, Union
 from uuid import UUID
 
+from sqlalchemy import Boolean, DateTime, cast, null, select, union_all
 from sqlalchemy.orm import Session
 
-from models.role import Permission, StaffPermissionOverride
+from models.role import Permission, StaffPermissionOverride, role_permissions
 from models.staff import Staff
+from models.user import User
+
+PERMISSION_CACHE_TTL_SECONDS = int(os.getenv("PERMISSION_CACHE_TTL_SECONDS", 60))
+
+
+class PermissionCache:
+    """Per-process cache of effective staff permissions keyed by staff id.
+
+    Entries live for ``ttl`` seconds, but never past the earliest
+    ``expires_at`` of the overrides they were built from, so a timed
+    override stops applying at exactly the moment it expires. Writes that
+    change a staff member's permissions must call ``invalidate``.
+    """
+
+    def __init__(self, ttl: int = PERMISSION_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._entries: Dict[UUID, Tuple[FrozenSet[str], datetime]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, staff_id: UUID) -> Union[FrozenSet[str], None]:
+        with self._lock:
+            entry = self._entries.get(staff_id)
+            if entry is None:
+                return None
+            permissions, valid_until = entry
+            if datetime.utcnow() >= valid_until:
+                del self._entries[staff_id]
+                return None
+            return permissions
+
+    def set(
+        self,
+        staff_id: UUID,
+        permissions: FrozenSet[str],
+        valid_until: Union[datetime, None] = None,
+    ):
+        if self.ttl <= 0:
+            return
+        ttl_deadline = datetime.utcnow() + timedelta(seconds=self.ttl)
+        if valid_until is None or valid_until > ttl_deadline:
+            valid_until = ttl_deadline
+        with self._lock:
+            self._entries[staff_id] = (permissions, valid_until)
 
+    def invalidate(self, staff_id: Union[UUID, None]):
+        if staff_id is None:
+            return
+        with self._lock:
+            self._entries.pop(staff_id, None)
 
-class PermissionService:
-    @staticmethod
-    def get_staff_permissions(db: Session, staff_id: UUID) -> List[str]:
-        """Get all effective permissions for a staff member (role + overrides)"""
-
-        # Get base permissions from role
-        staff = db.query(Staff).filter(Staff.id == staff_id).first()
-        if not staff:
-            return []
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
 
-        # Start with role permissions
-        role_permissions = set()
-        if staff.role:
-            role_permissions = {perm.name for perm in staff.role.permissions}
 
-        # Apply individual overrides
-        final_permissions = PermissionService._apply_permission_overrides(
-            db, staff_id, role_permissions
-        )
+permission_cache = PermissionCache()
 
-        return list(final_permissions)
 
+class PermissionService:
     @staticmethod
-    def _apply_permission_overrides(
-        db: Session, staff_id: UUID, base_permissions: set
-    ) -> set:
-        """Apply individual permission overrides to base permissions"""
-        # Get all active overrides for this staff member
-        overrides = (
-            db.query(StaffPermissionOverride)
-            .filter(
+    def permission_rows(staff_id, role_id, now: datetime):
+        """Union of role permissions and active overrides for one staff member.
+
+        ``staff_id`` and ``role_id`` may be values or column expressions, so
+        the statement can also be correlated against ``Staff`` in a larger
+        query. Each row is ``(name, granted, expires_at)``; role rows carry
+        ``granted = NULL``.
+        """
+        role_rows = (
+            select(
+                Permission.name.label("name"),
+                cast(null(), Boolean).label("granted"),
+                cast(null(), DateTime).label("expires_at"),
+            )
+            .select_from(role_permissions)
+            .join(Permission, Permission.id == role_permissions.c.permission_id)
+            .where(role_permissions.c.role_id == role_id)
+        )
+        override_rows = (
+            select(
+                Permission.name.label("name"),
+                StaffPermissionOverride.granted.label("granted"),
+                StaffPermissionOverride.expires_at.label("expires_at"),
+            )
+            .select_from(StaffPermissionOverride)
+            .join(Permission, Permission.id == StaffPermissionOverride.permission_id)
+            .where(
                 StaffPermissionOverride.staff_id == staff_id,
                 # Only include non-expired overrides
-                (
-                    StaffPermissionOverride.expires_at.is_(None)
-                    | (StaffPermissionOverride.expires_at > datetime.utcnow())
-                ),
+                StaffPermissionOverride.expires_at.is_(None)
+                | (StaffPermissionOverride.expires_at > now),
             )
-            .all()
         )
+        return union_all(role_rows, override_rows)
 
-        final_permissions = base_permissions.copy()
+    @staticmethod
+    def fold_permission_rows(
+        rows: Iterable[Tuple[Union[str, None], Union[bool, None], Union[datetime, None]]],
+    ) -> Tuple[FrozenSet[str], Union[datetime, None]]:
+        """Fold ``permission_rows`` output into the final permission set.
+
+        Also returns the earliest expiry among the active overrides, which
+        bounds how long the result may be cached.
+        """
+        role_permission_names = set()
+        override_grants = set()
+        override_denies = set()
+        valid_until = None
+        for name, granted, expires_at in rows:
+            if name is None:
+                continue
+            if granted is None:
+                role_permission_names.add(name)
+                continue
+            if granted:
+                override_grants.add(name)
+            else:
+                override_denies.add(name)
+            if expires_at is not None and (
+                valid_until is None or expires_at < valid_until
+            ):
+                valid_until = expires_at
+
+        final_permissions = frozenset(
+            (role_permission_names | override_grants) - override_denies
+        )
+        return final_permissions, valid_until
 
-        for override in overrides:
-            permission_name = override.permission.name
+    @staticmethod
+    def resolve_staff_permissions(
+        db: Session, staff_id: UUID, role_id: Union[UUID, None] = None
+    ) -> Tuple[FrozenSet[str], Union[datetime, None]]:
+        """Resolve effective permissions (role + overrides) in one round trip"""
+        if role_id is None:
+            role_id = select(Staff.role_id).where(Staff.id == staff_id).scalar_subquery()
+        rows = db.execute(
+            PermissionService.permission_rows(staff_id, role_id, datetime.utcnow())
+        )
+        return PermissionService.fold_permission_rows(rows)
 
-            if override.granted:
-                # Grant permission (add to set)
-                final_permissions.add(permission_name)
-            else:
-                # Deny permission (remove from set)
-                final_permissions.discard(permission_name)
+    @staticmethod
+    def resolve_store_access(
+        db: Session, email: str, store_id: UUID
+    ) -> Tuple[Union[User, None], Union[Staff, None], FrozenSet[str]]:
+        """Load a user, their staff row in a store and its permissions.
+
+        The user and staff row come from one joined query; the permissions
+        come from the cache, so the permission rows are only queried when
+        the staff member's entry is missing or stale.
+        """
+        row = db.execute(
+            select(User, Staff)
+            .outerjoin(
+                Staff, (Staff.user_id == User.id) & (Staff.store_id == store_id)
+            )
+            .where(User.email == email)
+        ).first()
+        if row is None:
+            return None, None, frozenset()
+
+        user, staff = row
+        if staff is None:
+            return user, None, frozenset()
+        return user, staff, PermissionService._effective_permissions(db, staff)
 
-        return final_permissions
+    @staticmethod
+    def _effective_permissions(
+        db: Session, staff: Union[Staff, UUID]
+    ) -> FrozenSet[str]:
+        """Cached effective permission set for a staff member (row or id)"""
+        if isinstance(staff, Staff):
+            staff_id, role_id = staff.id, staff.role_id
+        else:
+            staff_id, role_id = staff, None
+        permissions = permission_cache.get(staff_id)
+        if permissions is None:
+            permissions, valid_until = PermissionService.resolve_staff_permissions(
+                db, staff_id, role_id
+            )
+            permission_cache.set(staff_id, permissions, valid_until)
+        return permissions
+
+    @staticmethod
+    def get_staff_permissions(db: Session, staff_id: UUID) -> List[str]:
+        """Get all effective permissions for a staff member (role + overrides)"""
+        return list(PermissionService._effective_permissions(db, staff_id))
 
     @staticmethod
     def get_staff_permission_details(db: Session, staff_id: UUID) -> Dict:
@@ -144,6 +277,7 @@ class PermissionService:
 
         db.add(override)
         db.commit()
+        permission_cache.invalidate(staff_id)
 
         return True
 
@@ -179,6 +313,7 @@ class PermissionService:
 
         db.add(override)
         db.commit()
+        permission_cache.invalidate(staff_id)
 
         return True
 
@@ -203,6 +338,7 @@ class PermissionService:
         )
 
         db.commit()
+        permission_cache.invalidate(staff_id)
 
         return deleted > 0
 
@@ -222,13 +358,13 @@ class PermissionService:
     @staticmethod
     def has_permission(db: Session, staff_id: UUID, permission: str) -> bool:
         """Check if staff has specific permission"""
-        permissions = PermissionService.get_staff_permissions(db, staff_id)
+        permissions = PermissionService._effective_permissions(db, staff_id)
         return permission in permissions
 
     @staticmethod
     def has_any_permission(db: Session, staff_id: UUID, permissions: List[str]) -> bool:
         """Check if staff has any of the given permissions"""
-        staff_permissions = PermissionService.get_staff_permissions(db, staff_id)
+        staff_permissions = PermissionService._effective_permissions(db, staff_id)
         return any(perm in staff_permissions for perm in permissions)
 
     @staticmethod
@@ -236,7 +372,7 @@ class PermissionService:
         db: Session, staff_id: UUID, permissions: List[str]
     ) -> bool:
         """Check if staff has all given permissions"""
-        staff_permissions = PermissionService.get_staff_permissions(db, staff_id)
+        staff_permissions = PermissionService._effective_permissions(db, staff_id)
         return all(perm in staff_permissions for perm in permissions)
 
     @staticmethod
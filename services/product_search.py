@@ -0,0 +1,176 @@
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from crud.pagination import Page, PageParams, paginate
+from models.inventory import Inventory
+
+# Stores whose autocomplete index is kept in memory, least recently used out
+AUTOCOMPLETE_MAX_STORES = int(os.getenv("AUTOCOMPLETE_MAX_STORES", 1000))
+# Rebuild a store's index after this long, to pick up other workers' writes
+AUTOCOMPLETE_TTL_SECONDS = int(os.getenv("AUTOCOMPLETE_TTL_SECONDS", 300))
+
+# Letters and digits, as Inventory.search_vector() splits them
+_WORD = re.compile(r"[^\W_]+")
+
+
+def search_terms(text_: str) -> List[str]:
+    return _WORD.findall(text_.lower())
+
+
+class StorePrefixIndex:
+    """Sorted (term, inventory id) pairs for one store's active items.
+
+    Terms are every word of the product name plus the whole SKU, so a
+    prefix lookup is a bisect followed by a short forward scan.
+    """
+
+    def __init__(self, items=()):
+        self.built_at = time.monotonic()
+        self.items: Dict[UUID, Tuple[str, str]] = {}
+        self.terms: List[Tuple[str, UUID]] = []
+        for inventory_id, product_name, sku in items:
+            self.items[inventory_id] = (product_name, sku)
+            self.terms.extend((term, inventory_id) for term in self._terms(product_name, sku))
+        self.terms.sort()
+
+    @staticmethod
+    def _terms(product_name: str, sku: str):
+        return set(search_terms(product_name)) | {sku.lower()}
+
+    def add(self, inventory_id: UUID, product_name: str, sku: str):
+        self.remove(inventory_id)
+        self.items[inventory_id] = (product_name, sku)
+        for term in self._terms(product_name, sku):
+            insort(self.terms, (term, inventory_id))
+
+    def remove(self, inventory_id: UUID):
+        item = self.items.pop(inventory_id, None)
+        if item is None:
+            return
+        for term in self._terms(*item):
+            position = bisect_left(self.terms, (term, inventory_id))
+            if position < len(self.terms) and self.terms[position] == (term, inventory_id):
+                del self.terms[position]
+
+    def suggest(self, prefix: str, limit: int) -> List[dict]:
+        prefix = prefix.strip().lower()
+        found = []
+        seen = set()
+        position = bisect_left(self.terms, (prefix,))
+        while position < len(self.terms) and len(found) < limit:
+            term, inventory_id = self.terms[position]
+            if not term.startswith(prefix):
+                break
+            if inventory_id not in seen:
+                seen.add(inventory_id)
+                product_name, sku = self.items[inventory_id]
+                found.append({"id": inventory_id, "product_name": product_name, "sku": sku})
+            position += 1
+        return found
+
+
+class ProductSearchService:
+    """Store-scoped product search and autocomplete.
+
+    search() is a full-text query over name, SKU and description backed by
+    the ix_inventory_search GIN index. Autocomplete is served from a
+    per-store in-memory prefix index: built from one query on first use,
+    updated by crud/inventory.py on create, update and delete, and rebuilt
+    after ``ttl`` seconds so writes made by other workers show up.
+    """
+
+    def __init__(
+        self, max_stores: int = AUTOCOMPLETE_MAX_STORES, ttl: int = AUTOCOMPLETE_TTL_SECONDS
+    ):
+        self.max_stores = max_stores
+        self.ttl = ttl
+        self._stores: "OrderedDict[UUID, StorePrefixIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def search(db: Session, store_id: UUID, q: str, page: PageParams = PageParams()) -> Page:
+        """Active items whose name, SKU or description has words starting with q's words"""
+        terms = search_terms(q)
+        if not terms:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Search needs at least one letter or digit",
+            )
+        query = func.to_tsquery(
+            text("'simple'::regconfig"), " & ".join(f"{term}:*" for term in terms)
+        )
+        return paginate(
+            db,
+            select(Inventory).where(
+                Inventory.store_id == store_id,
+                Inventory.is_active == True,
+                Inventory.search_vector().op("@@")(query),
+            ),
+            [Inventory.product_name, Inventory.id],
+            page,
+        )
+
+    def _get(self, store_id: UUID) -> Optional[StorePrefixIndex]:
+        index = self._stores.get(store_id)
+        if index is None:
+            return None
+        if time.monotonic() - index.built_at > self.ttl:
+            del self._stores[store_id]
+            return None
+        self._stores.move_to_end(store_id)
+        return index
+
+    def suggest(self, db: Session, store_id: UUID, prefix: str, limit: int = 10) -> List[dict]:
+        with self._lock:
+            index = self._get(store_id)
+            if index is not None:
+                return index.suggest(prefix, limit)
+        # Built outside the lock so a slow query does not block other stores
+        index = StorePrefixIndex(
+            db.execute(
+                select(Inventory.id, Inventory.product_name, Inventory.sku).where(
+                    Inventory.store_id == store_id, Inventory.is_active == True
+                )
+            ).all()
+        )
+        with self._lock:
+            if self.max_stores > 0:
+                self._stores[store_id] = index
+                while len(self._stores) > self.max_stores:
+                    self._stores.popitem(last=False)
+            return index.suggest(prefix, limit)
+
+    def add(self, store_id: UUID, inventory_id: UUID, product_name: str, sku: str):
+        """Reflect a created or renamed item; unloaded stores are built fresh later"""
+        with self._lock:
+            index = self._get(store_id)
+            if index is not None:
+                index.add(inventory_id, product_name, sku)
+
+    def remove(self, store_id: UUID, inventory_id: UUID):
+        with self._lock:
+            index = self._get(store_id)
+            if index is not None:
+                index.remove(inventory_id)
+
+    def invalidate(self, store_id: UUID):
+        """Drop a store's index after bulk changes; the next lookup rebuilds it"""
+        with self._lock:
+            self._stores.pop(store_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._stores.clear()
+
+
+product_search_service = ProductSearchService()
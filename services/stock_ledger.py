@@ -0,0 +1,155 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from crud.pagination import Page, PageParams, paginate
+from models.inventory import Inventory
+from models.stock import StockMovement, StockSnapshot
+from services.background import LockedJob
+
+# How often movements are folded into per-item snapshots; also the longest
+# tail a point-in-time read has to sum
+STOCK_SNAPSHOT_SECONDS = int(os.getenv("STOCK_SNAPSHOT_SECONDS", 86400))
+# Movements younger than this are left for the next run, so transactions
+# still in flight when a snapshot is taken are not skipped
+STOCK_SNAPSHOT_SETTLE_SECONDS = int(os.getenv("STOCK_SNAPSHOT_SETTLE_SECONDS", 300))
+
+
+class StockLedgerService(LockedJob):
+    """Point-in-time stock from the movement ledger plus periodic snapshots.
+
+    A snapshot holds an item's quantity as of a time: all of its movements
+    up to then, summed. take_snapshots() adds one per item that moved since
+    the previous run, so a read at time T is the item's latest snapshot at
+    or before T plus at most one interval of movements.
+    """
+
+    name = "Stock snapshot"
+    lock_key = 0x5_70C_C5
+
+    def __init__(
+        self,
+        interval: int = STOCK_SNAPSHOT_SECONDS,
+        settle_seconds: int = STOCK_SNAPSHOT_SETTLE_SECONDS,
+    ):
+        self.interval = interval
+        self.settle_seconds = settle_seconds
+
+    @staticmethod
+    def record(db: Session, rows: List[dict]):
+        """Insert movements as one executemany; for set-based write paths"""
+        if rows:
+            db.execute(insert(StockMovement), rows)
+
+    @staticmethod
+    def quantities_at(db: Session, store_id: UUID, at: datetime) -> List:
+        """(id, sku, product_name, quantity) of the store's items at ``at``"""
+        snapshot = (
+            select(StockSnapshot.as_of, StockSnapshot.quantity)
+            .where(StockSnapshot.inventory_id == Inventory.id, StockSnapshot.as_of <= at)
+            .order_by(StockSnapshot.as_of.desc())
+            .limit(1)
+            .lateral("snapshot")
+        )
+        tail = (
+            select(func.coalesce(func.sum(StockMovement.delta), 0).label("delta"))
+            .where(
+                StockMovement.inventory_id == Inventory.id,
+                StockMovement.created_at > func.coalesce(snapshot.c.as_of, text("'-infinity'")),
+                StockMovement.created_at <= at,
+            )
+            .lateral("tail")
+        )
+        return db.execute(
+            select(
+                Inventory.id,
+                Inventory.sku,
+                Inventory.product_name,
+                (func.coalesce(snapshot.c.quantity, 0) + tail.c.delta).label("quantity"),
+            )
+            .select_from(Inventory)
+            .outerjoin(snapshot, literal(True))
+            .join(tail, literal(True))
+            .where(Inventory.store_id == store_id, Inventory.created_at <= at)
+            .order_by(Inventory.product_name, Inventory.id)
+        ).all()
+
+    @staticmethod
+    def get_movements(
+        db: Session, store_id: UUID, inventory_id: UUID, page: PageParams = PageParams()
+    ) -> Page:
+        """One item's movements, newest first"""
+        return paginate(
+            db,
+            select(StockMovement).where(
+                StockMovement.store_id == store_id,
+                StockMovement.inventory_id == inventory_id,
+            ),
+            [StockMovement.id],
+            page,
+            descending=True,
+        )
+
+    def take_snapshots(self, db: Session, as_of: Optional[datetime] = None) -> int:
+        """Fold movements since the last run into new snapshots; returns how many.
+
+        Every item that moved after the previous run gets a snapshot at
+        ``as_of``: its previous snapshot plus those movements. Items that did
+        not move keep their older snapshot, which is still exact.
+        """
+        if as_of is None:
+            as_of = datetime.now(timezone.utc) - timedelta(seconds=self.settle_seconds)
+        previous = db.scalar(select(func.max(StockSnapshot.as_of)))
+        if previous is not None and previous >= as_of:
+            return 0
+        moved = select(
+            StockMovement.inventory_id,
+            StockMovement.store_id,
+            func.sum(StockMovement.delta).label("delta"),
+        ).where(StockMovement.created_at <= as_of)
+        if previous is not None:
+            moved = moved.where(StockMovement.created_at > previous)
+        moved = moved.group_by(StockMovement.inventory_id, StockMovement.store_id).subquery()
+        last = (
+            select(StockSnapshot.quantity)
+            .where(StockSnapshot.inventory_id == moved.c.inventory_id)
+            .order_by(StockSnapshot.as_of.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            insert(StockSnapshot).from_select(
+                ["inventory_id", "store_id", "as_of", "quantity"],
+                select(
+                    moved.c.inventory_id,
+                    moved.c.store_id,
+                    literal(as_of, StockSnapshot.as_of.type),
+                    func.coalesce(last, 0) + moved.c.delta,
+                ),
+            )
+        )
+        return result.rowcount
+
+    def compact(self) -> int:
+        """One compaction run in its own transaction; skipped if another
+        worker holds the lock or the last run is recent"""
+        return self.run_locked(self._compact) or 0
+
+    def _compact(self, db: Session) -> int:
+        as_of = datetime.now(timezone.utc) - timedelta(seconds=self.settle_seconds)
+        previous = db.scalar(select(func.max(StockSnapshot.as_of)))
+        if previous is not None and as_of - previous < timedelta(seconds=self.interval):
+            return 0
+        return self.take_snapshots(db, as_of)
+
+    async def run_once(self):
+        await run_in_threadpool(self.compact)
+
+
+stock_ledger_service = StockLedgerService()
@@ -0,0 +1,69 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Union
+
+TOKEN_DECODE_CACHE_SIZE = int(os.getenv("TOKEN_DECODE_CACHE_SIZE", 10000))
+
+
+class TokenDecodeCache:
+    """Bounded LRU of verified JWT claims keyed by a digest of the token.
+
+    An entry is only served until the token's ``exp``; revocation is still
+    checked by the caller on every request, so caching the signature check
+    never keeps a revoked token alive.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_DECODE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Union[dict, None]:
+        key = self._key(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None or claims["exp"] <= time.time():
+                if claims is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(claims)
+
+    def set(self, token: str, claims: dict):
+        if self.maxsize <= 0 or not isinstance(claims.get("exp"), (int, float)):
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = dict(claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+token_decode_cache = TokenDecodeCache()
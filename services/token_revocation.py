@@ -0,0 +1,110 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Union
+
+from sqlalchemy.orm import Session
+
+from crud.token_blacklist import token_blacklist_crud
+
+TOKEN_REVOCATION_SYNC_SECONDS = int(os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", 5))
+TOKEN_REVOCATION_PRUNE_SECONDS = int(os.getenv("TOKEN_REVOCATION_PRUNE_SECONDS", 3600))
+# How far behind its watermark a sync re-reads, for rows committed late
+TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS = int(
+    os.getenv("TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS", 5)
+)
+
+
+class TokenRevocationService:
+    """In-memory set of revoked token ids, backed by the revoked_tokens table.
+
+    Revocations made by this process apply immediately. Revocations made by
+    other workers are picked up by an incremental sync that runs at most
+    every ``sync_interval`` seconds, so a check is normally a dict lookup.
+    The sync reads from the newest database-assigned revoked_at it has seen,
+    which only moves once a read succeeds.
+    Expired ids are dropped from memory on sync and pruned from the table
+    every ``prune_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        sync_interval: int = TOKEN_REVOCATION_SYNC_SECONDS,
+        prune_interval: int = TOKEN_REVOCATION_PRUNE_SECONDS,
+        sync_overlap: int = TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS,
+    ):
+        self.sync_interval = timedelta(seconds=sync_interval)
+        self.prune_interval = timedelta(seconds=prune_interval)
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        self._revoked: Dict[str, datetime] = {}
+        self._synced_at: Union[datetime, None] = None
+        self._watermark: Union[datetime, None] = None
+        self._pruned_at: Union[datetime, None] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def expiry_from_claims(claims: dict) -> datetime:
+        return datetime.utcfromtimestamp(claims["exp"])
+
+    def is_revoked(self, db: Session, jti: Union[str, None]) -> bool:
+        """Tokens without a jti cannot be revoked and are treated as revoked"""
+        if not jti:
+            return True
+        self._sync(db)
+        with self._lock:
+            expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > datetime.utcnow()
+
+    def revoke(self, db: Session, claims: Iterable[dict]):
+        """Revoke the tokens the given decoded claims belong to"""
+        tokens = [
+            (c["jti"], self.expiry_from_claims(c)) for c in claims if c.get("jti")
+        ]
+        if not tokens:
+            return
+        token_blacklist_crud.add_tokens(db, tokens)
+        with self._lock:
+            self._revoked.update(tokens)
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+            self._synced_at = None
+            self._watermark = None
+            self._pruned_at = None
+
+    def _sync(self, db: Session):
+        now = datetime.utcnow()
+        with self._lock:
+            synced_at = self._synced_at
+            if synced_at is not None and now - synced_at < self.sync_interval:
+                return
+            self._synced_at = now
+            watermark = self._watermark
+            prune = self._pruned_at is None or now - self._pruned_at >= self.prune_interval
+
+        # The watermark is the newest revoked_at read so far, i.e. database
+        # time. Re-reading a window behind it picks up revocations that
+        # committed after that read but were stamped before it.
+        since = watermark - self.sync_overlap if watermark is not None else None
+        try:
+            rows = token_blacklist_crud.get_revoked_since(db, since, now)
+        except Exception:
+            with self._lock:
+                self._synced_at = synced_at
+            raise
+        with self._lock:
+            for jti, expires_at, revoked_at in rows:
+                self._revoked[jti] = expires_at
+                if self._watermark is None or revoked_at > self._watermark:
+                    self._watermark = revoked_at
+            for jti in [j for j, exp in self._revoked.items() if exp <= now]:
+                del self._revoked[jti]
+
+        if prune:
+            token_blacklist_crud.prune_expired(db, now)
+            with self._lock:
+                self._pruned_at = now
+
+
+token_revocation_service = TokenRevocationService()
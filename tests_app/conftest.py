@@ -0,0 +1,25 @@
+import pytest
+
+import main  # noqa: F401  (registers every model mapper)
+from database.database import SessionLocal
+from database.schema import ensure_schema
+from tests_app.utils import create_store
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    # TestClient only runs the app lifespan inside a `with` block
+    ensure_schema()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_store(db):
+    """create_store on the test's session"""
+    return lambda prefix: create_store(db, prefix)
@@ -0,0 +1,49 @@
+import asyncio
+import logging
+
+from sqlalchemy import text
+
+from database.database import SessionLocal
+from services.background import LockedJob
+
+
+class CountingJob(LockedJob):
+    name = "Counting job"
+    lock_key = 0x7E_57
+
+    def __init__(self, failures=0):
+        self.interval = 0
+        self.failures = failures
+        self.runs = 0
+
+    async def run_once(self):
+        self.runs += 1
+        if self.runs <= self.failures:
+            raise RuntimeError("job broke")
+
+
+def test_run_is_skipped_while_another_worker_holds_the_lock():
+    job = CountingJob()
+    holder = SessionLocal()
+    try:
+        holder.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": job.lock_key})
+        assert job.run_locked(lambda db: "ran") is None
+    finally:
+        holder.close()
+    assert job.run_locked(lambda db: "ran") == "ran"
+
+
+def test_failed_run_is_logged_with_its_traceback_and_the_loop_goes_on(caplog):
+    job = CountingJob(failures=1)
+
+    async def main():
+        loop = asyncio.create_task(job.run_periodically())
+        while job.runs < 2:
+            await asyncio.sleep(0.01)
+        loop.cancel()
+
+    with caplog.at_level(logging.ERROR, logger="services.background"):
+        asyncio.run(main())
+    (record,) = caplog.records
+    assert record.getMessage() == "Counting job failed"
+    assert record.exc_info[1].args == ("job broke",)
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.inventory import Inventory
+from services.expiry import ExpiryService
+
+
+@pytest.fixture
+def store(db, make_store):
+    store = make_store("exp")
+    now = datetime.now()
+    items = {
+        name: Inventory(
+            product_name=name,
+            selling_price=2,
+            sku=f"exp-{store.suffix}-{name}",
+            quantity=10,
+            status=status,
+            expiration_date=now + timedelta(days=days),
+            created_by=store.owner_id,
+            store_id=store.id,
+        )
+        for name, days, status in [
+            ("yoghurt", 2, "available"),
+            ("milk", -1, "available"),
+            ("rice", 90, "available"),
+            ("bread", -2, "discontinued"),
+        ]
+    }
+    db.add_all(items.values())
+    db.commit()
+    return store.id, store.owner_email, {name: item.id for name, item in items.items()}
+
+
+def test_expiring_lists_soonest_first(db, store):
+    store_id, _, ids = store
+    service = ExpiryService()
+    page = service.get_expiring(db, store_id, days=7)
+    assert [item.id for item in page.items] == [ids["yoghurt"]]
+    page = service.get_expiring(db, store_id, days=7, include_expired=True)
+    assert [item.id for item in page.items] == [ids["bread"], ids["milk"], ids["yoghurt"]]
+
+
+def test_flags_crossings_once_in_one_digest(db, store):
+    store_id, owner_email, ids = store
+    service = ExpiryService(interval=60, warning_days=7)
+
+    (digest,) = [d for d in service.collect_digests() if d.store_id == store_id]
+    assert digest.recipients == [owner_email]
+    assert digest.subject == "Expiry Alert: 2 items"
+    assert "milk (expired" in digest.body and "yoghurt (expires" in digest.body
+
+    statuses = {
+        item.id: item.status
+        for item in db.query(Inventory).filter(Inventory.store_id == store_id)
+    }
+    assert statuses[ids["yoghurt"]] == "expiring_soon"
+    assert statuses[ids["milk"]] == "expired"
+    assert statuses[ids["rice"]] == "available"
+    # Statuses set by hand are left alone
+    assert statuses[ids["bread"]] == "discontinued"
+
+    # Nothing crossed since, so nothing is sent again
+    assert not [d for d in service.collect_digests() if d.store_id == store_id]
+
+
+def test_moved_dates_go_back_to_available(db, store):
+    store_id, _, ids = store
+    service = ExpiryService(interval=60, warning_days=7)
+    service.collect_digests()
+
+    rice = db.get(Inventory, ids["rice"])
+    rice.status = "expiring_soon"
+    yoghurt = db.get(Inventory, ids["yoghurt"])
+    yoghurt.expiration_date = None
+    db.commit()
+
+    # Un-flagging is not reported
+    assert not [d for d in service.collect_digests() if d.store_id == store_id]
+    db.expire_all()
+    assert db.get(Inventory, ids["rice"]).status == "available"
+    assert db.get(Inventory, ids["yoghurt"]).status == "available"
+    assert db.get(Inventory, ids["milk"]).status == "expired"
@@ -0,0 +1,74 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from database.database import SessionLocal
+from models.inventory import Inventory
+from services.export import ExportService
+from tests_app.utils import create_store
+
+ITEMS = 5
+
+
+@pytest.fixture(scope="module")
+def store_id():
+    db = SessionLocal()
+    store = create_store(db, "export")
+    for n in range(ITEMS):
+        db.add(
+            Inventory(
+                product_name=f"item, {n}",
+                selling_price=2,
+                sku=f"export-{store.suffix}-{n}",
+                quantity=n,
+                created_by=store.owner_id,
+                store_id=store.id,
+            )
+        )
+    db.commit()
+    db.close()
+    return store.id
+
+
+def test_csv_streams_in_batches(store_id):
+    service = ExportService(batch_size=2)
+    chunks = list(service.stream(SessionLocal, service.inventory_query(store_id)))
+    # header, then ceil(ITEMS / 2) batches
+    assert len(chunks) == 1 + 3
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert sorted(row["product_name"] for row in rows) == [
+        f"item, {n}" for n in range(ITEMS)
+    ]
+
+
+def test_ndjson_gzip(store_id):
+    service = ExportService(batch_size=2)
+    body = b"".join(
+        service.stream(
+            SessionLocal, service.inventory_query(store_id), "ndjson", compress=True
+        )
+    )
+    lines = gzip.decompress(body).decode().splitlines()
+    assert len(lines) == ITEMS
+    assert json.loads(lines[0])["sku"].startswith("export-")
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("", False),
+        ("gzip", True),
+        ("deflate, gzip;q=0.5", True),
+        ("gzip;q=0", False),
+        ("gzip; q=0.0, br", False),
+        ("*", True),
+        ("*;q=0", False),
+        ("*, gzip;q=0", False),
+        ("identity;q=1, *;q=0.1", True),
+    ],
+)
+def test_accepts_gzip_honours_q_values(accept_encoding, expected):
+    assert ExportService.accepts_gzip(accept_encoding) is expected
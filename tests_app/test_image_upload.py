@@ -0,0 +1,96 @@
+import asyncio
+import io
+import os
+import time
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from services.image_config import ImageConfig, LocalStorage, StorageBackend
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 1000
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def upload(data, content_type="image/png"):
+    return UploadFile(
+        CountingStream(data),
+        filename="photo.png",
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+def test_local_storage_round_trip(tmp_path):
+    service = ImageConfig(LocalStorage(str(tmp_path), "/media"))
+    url = asyncio.run(service.upload_image(upload(PNG), "stores/1/inventory"))
+    assert url.startswith("/media/stores/1/inventory/") and url.endswith(".png")
+    path = tmp_path / url.removeprefix("/media/")
+    assert path.read_bytes() == PNG
+
+    assert service.delete_profile_picture(url)
+    assert not os.path.exists(path)
+
+
+def test_oversized_upload_stops_reading_at_the_cap(tmp_path):
+    service = ImageConfig(LocalStorage(str(tmp_path)), max_size_mb=1, chunk_size=64 * 1024)
+    file = upload(b"\0" * (5 * 1024 * 1024))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(service.upload_image(file, "users/1/profile"))
+    assert error.value.status_code == 400
+    assert file.file.bytes_read <= 1024 * 1024 + 64 * 1024
+    assert not any(tmp_path.iterdir())
+
+
+def test_rejects_non_images(tmp_path):
+    service = ImageConfig(LocalStorage(str(tmp_path)))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(service.upload_image(upload(b"hi", "text/plain"), "users/1/profile"))
+    assert error.value.detail == "File is not an image"
+
+
+def test_slow_backend_times_out_without_blocking_the_loop():
+    class SlowStorage(StorageBackend):
+        def save(self, file, folder, filename):
+            time.sleep(0.5)
+            self.saved = file.read()
+            return "late"
+
+        def delete(self, public_id):
+            return False
+
+    storage = SlowStorage()
+    service = ImageConfig(storage, timeout=0.1)
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        with pytest.raises(HTTPException) as error:
+            await service.upload_image(upload(PNG), "users/1/profile")
+        ticker.cancel()
+        # The spool stays open for the save that outlived the timeout
+        assert await error.value.save == "late"
+        return error.value.status_code, ticks
+
+    status_code, ticks = asyncio.run(main())
+    assert status_code == 504
+    # The event loop kept running while the backend was stuck
+    assert ticks >= 5
+    assert storage.saved == PNG
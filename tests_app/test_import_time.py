@@ -0,0 +1,44 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+LAZY_MODULES = ("fastapi_mail", "cloudinary")
+
+
+@pytest.fixture(scope="module")
+def import_times():
+    """Cumulative microseconds per module for a cold `import main`"""
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith(("MAIL_", "CLOUDINARY_"))
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| +(\S+)", line)
+        if match:
+            times[match.group(2)] = int(match.group(1))
+    return times
+
+
+def test_third_party_clients_are_not_imported(import_times):
+    loaded = [
+        module
+        for module in import_times
+        if module.split(".")[0] in LAZY_MODULES
+    ]
+    assert not loaded
+
@@ -0,0 +1,73 @@
+import uuid
+
+import pytest
+from crud.inventory import inventory_crud
+from database.query_stats import track_queries
+from models.inventory import Inventory
+from schemas.inventory import InventoryBatchUpdateItem
+
+ITEMS = 20
+
+
+@pytest.fixture
+def store(db, make_store):
+    store = make_store("batch")
+    items = [
+        Inventory(
+            product_name=f"item {n}",
+            selling_price=2,
+            sku=f"batch-{store.suffix}-{n}",
+            quantity=100,
+            low_stock_threshold=5,
+            created_by=store.owner_id,
+            store_id=store.id,
+        )
+        for n in range(ITEMS)
+    ]
+    db.add_all(items)
+    db.commit()
+    return store.id, [(item.id, item.sku) for item in items]
+
+
+def test_batch_is_set_based(db, store):
+    store_id, items = store
+    changes = [
+        InventoryBatchUpdateItem(inventory_id=item_id, selling_price=3.5)
+        for item_id, _ in items[: ITEMS // 2]
+    ] + [InventoryBatchUpdateItem(sku=sku, quantity=1) for _, sku in items[ITEMS // 2 :]]
+    with track_queries() as stats:
+        results = inventory_crud.batch_update_inventory(db, store_id, changes)
+    # SKU lookup, UPDATE, the stock ledger INSERT and the store version bump;
+    # commit is not a statement
+    assert stats.count == 4
+    assert all(result.updated for result in results)
+
+    db.expire_all()
+    rows = {row.id: row for row in db.query(Inventory).filter(Inventory.store_id == store_id)}
+    first, last = items[0][0], items[-1][0]
+    assert float(rows[first].selling_price) == 3.5 and rows[first].quantity == 100
+    assert float(rows[last].selling_price) == 2 and rows[last].quantity == 1
+    # The same UPDATE stamps the items that went low
+    assert rows[first].low_stock_since is None
+    assert rows[last].low_stock_since is not None
+
+
+def test_batch_reports_per_item_failures(db, store):
+    store_id, items = store
+    results = inventory_crud.batch_update_inventory(
+        db,
+        store_id,
+        [
+            InventoryBatchUpdateItem(sku="missing", quantity=1),
+            InventoryBatchUpdateItem(inventory_id=uuid.uuid4(), quantity=1),
+            InventoryBatchUpdateItem(inventory_id=items[0][0], quantity=50),
+            InventoryBatchUpdateItem(sku=items[0][1], quantity=60),
+        ],
+    )
+    assert [result.updated for result in results] == [False, False, True, False]
+    assert results[3].detail == "Item appears more than once in the batch"
+
+
+def test_item_needs_one_reference():
+    with pytest.raises(ValueError):
+        InventoryBatchUpdateItem(quantity=1)
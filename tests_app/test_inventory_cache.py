@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services.inventory_cache import inventory_cache
+from tests_app.utils import register_store
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def store(client):
+    store_id, headers, suffix = register_store(client, "etag")
+    item_id = client.post(
+        f"/v1/store/{store_id}/inventory/",
+        data={
+            "product_name": "Milk",
+            "cost_price": 1,
+            "selling_price": 2,
+            "sku": f"etag-{suffix}",
+            "quantity": 10,
+        },
+        headers=headers,
+    ).json()["inventory"]["id"]
+    return f"/v1/store/{store_id}/inventory", item_id, headers
+
+
+def query_count(response):
+    return int(response.headers["X-DB-Query-Count"])
+
+
+def test_unchanged_poll_is_not_modified(client, store):
+    path, _, headers = store
+    first = client.get(path, headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    hits = inventory_cache.stats()["hits"]
+    cached = client.get(path, headers=headers)
+    assert cached.content == first.content and cached.headers["ETag"] == etag
+    assert inventory_cache.stats()["hits"] == hits + 1
+
+    # Only the access check runs: no version lookup, inventory query or body
+    not_modified = client.get(path, headers={**headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304 and not not_modified.content
+    assert query_count(not_modified) < query_count(first)
+
+
+def test_stock_change_invalidates(client, store):
+    path, item_id, headers = store
+    etag = client.get(path, headers=headers).headers["ETag"]
+
+    client.patch(f"{path}/{item_id}", data={"quantity": 4}, headers=headers)
+    changed = client.get(path, headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["inventory"][0]["quantity"] == 4
@@ -0,0 +1,183 @@
+import asyncio
+import io
+import os
+import threading
+
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from crud.inventory import inventory_crud
+from main import app
+from models.inventory import ImageStatus
+from schemas.inventory import InventoryCreate
+from services.image_config import LocalStorage, StorageBackend, image_service
+from services.inventory_images import inventory_image_service
+from tests_app.utils import create_store, register_store
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 100
+
+
+class FlakyStorage(StorageBackend):
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def save(self, file, folder, filename):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("storage unavailable")
+        return f"https://images.test/{folder}/{filename}"
+
+    def delete(self, public_id):
+        return False
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    def use(backend):
+        monkeypatch.setattr(image_service, "storage", backend)
+        monkeypatch.setattr(inventory_image_service, "retry_seconds", 0)
+        return backend
+
+    return use
+
+
+def create_with_image(db):
+    store = create_store(db, "img")
+    db.commit()
+    file = UploadFile(
+        io.BytesIO(PNG), filename="milk.png", headers=Headers({"content-type": "image/png"})
+    )
+    item = asyncio.run(
+        inventory_crud.create_inventory(
+            db,
+            InventoryCreate(
+                product_name="Milk",
+                cost_price=1,
+                selling_price=2,
+                sku=f"img-{store.suffix}",
+                quantity=1,
+            ),
+            store.owner_id,
+            store.id,
+            file=file,
+        )
+    )
+    db.refresh(item)
+    return item
+
+
+def test_retries_until_the_upload_succeeds(db, storage):
+    backend = storage(FlakyStorage(failures=2))
+    item = create_with_image(db)
+    assert backend.calls == 3
+    assert item.image_status == ImageStatus.READY
+    assert item.image_url.endswith("/inventory/milk.png")
+
+
+def test_gives_up_and_records_the_error(db, storage):
+    backend = storage(FlakyStorage(failures=10))
+    item = create_with_image(db)
+    assert backend.calls == inventory_image_service.attempts
+    assert item.image_status == ImageStatus.FAILED
+    assert item.image_error == "storage unavailable"
+    assert item.image_url is None
+
+
+class SlowStorage(StorageBackend):
+    def __init__(self, release):
+        self.release = release
+        self.calls = 0
+
+    def save(self, file, folder, filename):
+        self.calls += 1
+        self.release.wait(5)
+        file.read()
+        return f"https://images.test/{folder}/slow-{self.calls}.png"
+
+    def delete(self, public_id):
+        return False
+
+
+def test_timed_out_save_is_awaited_not_retried(db, storage, monkeypatch):
+    event = threading.Event()
+    threading.Timer(0.2, event.set).start()
+    backend = storage(SlowStorage(event))
+    monkeypatch.setattr(image_service, "timeout", 0.05)
+    item = create_with_image(db)
+    assert backend.calls == 1
+    assert item.image_status == ImageStatus.READY
+    assert item.image_url.endswith("/slow-1.png")
+
+
+def test_superseded_upload_does_not_write_back(db, storage, tmp_path):
+    storage(FlakyStorage(failures=0))
+    item = create_with_image(db)
+    stale = item.image_upload_id
+    inventory_image_service.mark_pending(item)
+    db.commit()
+    current_url = item.image_url
+
+    path = tmp_path / "stale.png"
+    path.write_bytes(PNG)
+    asyncio.run(
+        inventory_image_service.process(item.id, stale, item.store_id, str(path), "old.png")
+    )
+    db.refresh(item)
+    assert item.image_url == current_url
+    assert item.image_status == ImageStatus.PENDING
+
+
+def test_create_returns_before_the_upload(storage, tmp_path):
+    storage(LocalStorage(str(tmp_path), "/media"))
+    with TestClient(app) as client:
+        store_id, headers, suffix = register_store(client, "imgapi")
+        created = client.post(
+            f"/v1/store/{store_id}/inventory/",
+            data={
+                "product_name": "Milk",
+                "cost_price": 1,
+                "selling_price": 2,
+                "sku": f"imgapi-{suffix}",
+                "quantity": 5,
+            },
+            files={"file": ("milk.png", PNG, "image/png")},
+            headers=headers,
+        )
+        assert created.status_code == 201
+        assert created.json()["inventory"]["image_status"] == "pending"
+        assert created.json()["inventory"]["image_url"] is None
+
+        # TestClient runs background tasks before returning
+        (item,) = client.get(
+            f"/v1/store/{store_id}/inventory", headers=headers
+        ).json()["inventory"]
+        assert item["image_status"] == "ready"
+        assert (tmp_path / item["image_url"].removeprefix("/media/")).read_bytes() == PNG
+
+
+def test_staged_file_is_removed_when_the_commit_fails(db, storage, monkeypatch):
+    storage(FlakyStorage(failures=0))
+    staged = []
+    stage = inventory_image_service.stage
+
+    async def recording_stage(file):
+        staged.append(await stage(file))
+        return staged[-1]
+
+    commit = db.commit
+
+    def failing_commit():
+        # The store is committed first; only the item's commit fails
+        if staged:
+            raise ConnectionError("database went away")
+        commit()
+
+    monkeypatch.setattr(inventory_image_service, "stage", recording_stage)
+    monkeypatch.setattr(db, "commit", failing_commit)
+    with pytest.raises(ConnectionError):
+        create_with_image(db)
+    (path,) = staged
+    assert not os.path.exists(path)
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services.inventory_import import inventory_import_service
+from tests_app.utils import register_store
+
+
+@pytest.fixture(scope="module")
+def owner():
+    with TestClient(app) as client:
+        yield (client, *register_store(client, "import"))
+
+
+def test_csv_import_reports_row_errors(owner, monkeypatch):
+    client, store_id, headers, suffix = owner
+    monkeypatch.setattr(inventory_import_service, "batch_size", 2)
+    body = "\n".join(
+        [
+            "product_name,cost_price,selling_price,sku,quantity,low_stock_threshold",
+            f"Milk,1,2,{suffix}-1,10,3",
+            f"Bread,1,2,{suffix}-2,5,",
+            f"Eggs,1,not-a-price,{suffix}-3,5,",
+            f"Milk again,1,2,{suffix}-1,10,",
+            f"Butter,1,2,{suffix}-4,7,",
+        ]
+    )
+    response = client.post(
+        f"/v1/store/{store_id}/inventory/import",
+        files={"file": ("items.csv", body, "text/csv")},
+        headers=headers,
+    )
+    assert response.status_code == 202, response.text
+
+    job = client.get(
+        f"/v1/store/{store_id}/inventory/import/{response.json()['id']}",
+        headers=headers,
+    ).json()
+    assert job["status"] == "completed"
+    assert (job["rows_processed"], job["rows_imported"], job["rows_failed"]) == (5, 3, 2)
+    assert [(error["row"], error["sku"]) for error in job["errors"]] == [
+        (3, f"{suffix}-3"),
+        (4, f"{suffix}-1"),
+    ]
+    assert job["errors"][1]["errors"] == ["SKU already exists"]
+
+    inventory = client.get(f"/v1/store/{store_id}/inventory", headers=headers).json()
+    assert {item["sku"] for item in inventory["inventory"]} == {
+        f"{suffix}-1",
+        f"{suffix}-2",
+        f"{suffix}-4",
+    }
+
+
+def test_jsonl_import(owner):
+    client, store_id, headers, suffix = owner
+    lines = [
+        json.dumps(
+            {
+                "product_name": "Tea",
+                "cost_price": 1,
+                "selling_price": 3,
+                "sku": f"{suffix}-tea",
+                "quantity": 4,
+            }
+        ),
+        "{not json",
+        json.dumps({"product_name": "Dup", "sku": f"{suffix}-tea"}),
+    ]
+    response = client.post(
+        f"/v1/store/{store_id}/inventory/import",
+        files={"file": ("items.jsonl", "\n".join(lines), "application/x-ndjson")},
+        headers=headers,
+    )
+    job = client.get(
+        f"/v1/store/{store_id}/inventory/import/{response.json()['id']}",
+        headers=headers,
+    ).json()
+    assert (job["rows_imported"], job["rows_failed"]) == (1, 2)
+    assert job["errors"][0]["errors"][0].startswith("Invalid JSON")
+
+
+def test_unknown_format_is_rejected(owner):
+    client, store_id, headers, _ = owner
+    response = client.post(
+        f"/v1/store/{store_id}/inventory/import",
+        files={"file": ("items.xlsx", b"x", "application/octet-stream")},
+        headers=headers,
+    )
+    assert response.status_code == 400
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from crud.inventory import inventory_crud
+from models.inventory import Inventory
+from schemas.inventory import InventoryBatchUpdateItem, InventoryUpdate
+from services.low_stock import LowStockService
+
+
+@pytest.fixture
+def store(db, make_store):
+    store = make_store("low")
+    items = [
+        Inventory(
+            product_name=f"item {n}",
+            selling_price=2,
+            sku=f"low-{store.suffix}-{n}",
+            quantity=100,
+            low_stock_threshold=5,
+            created_by=store.owner_id,
+            store_id=store.id,
+        )
+        for n in range(3)
+    ]
+    db.add_all(items)
+    db.commit()
+    return store.id, store.owner_email, [item.id for item in items]
+
+
+def set_quantity(db, inventory_id, quantity):
+    return asyncio.run(
+        inventory_crud.update_inventory(
+            db, inventory_id, InventoryUpdate(quantity=quantity), file=None
+        )
+    )
+
+
+def digest_for(service, store_id):
+    return [digest for digest in service.collect_digests() if digest.store_id == store_id]
+
+
+def test_crossing_is_stamped_and_cleared(db, store):
+    store_id, _, (first, *_) = store
+    since = set_quantity(db, first, 2).low_stock_since
+    assert since is not None
+    # Staying low keeps the original crossing time
+    assert set_quantity(db, first, 1).low_stock_since == since
+    assert [row.id for row in LowStockService.get_low_stock(db, store_id).items] == [first]
+
+    assert set_quantity(db, first, 50).low_stock_since is None
+    assert LowStockService.get_low_stock(db, store_id).items == []
+
+
+def test_one_digest_per_store_per_interval(db, store):
+    store_id, owner_email, (first, second, third) = store
+    inventory_crud.batch_update_inventory(
+        db,
+        store_id,
+        [
+            InventoryBatchUpdateItem(inventory_id=first, quantity=1),
+            InventoryBatchUpdateItem(inventory_id=second, quantity=0),
+        ],
+    )
+    hourly = LowStockService(interval=3600)
+    (digest,) = digest_for(hourly, store_id)
+    assert digest.recipients == [owner_email]
+    assert digest.subject == "Low Stock Alert: 2 items"
+    assert "item 0 (current: 1, threshold: 5)" in digest.body
+
+    # Another crossing inside the interval waits for the next digest
+    inventory_crud.batch_update_inventory(
+        db, store_id, [InventoryBatchUpdateItem(inventory_id=third, quantity=3)]
+    )
+    assert digest_for(hourly, store_id) == []
+    # Once due, only items that crossed since the last digest are listed
+    (digest,) = digest_for(LowStockService(interval=0), store_id)
+    assert digest.subject == "Low Stock Alert: item 2"
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services import mail
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setattr(mail, "_mail_client", None)
+    monkeypatch.setattr(mail, "MAIL_PORT", "465")
+    monkeypatch.setattr(mail, "MAIL_FROM", "team@retaler.test")
+    for name in ("MAIL_USERNAME", "MAIL_PASSWORD", "MAIL_SERVER"):
+        monkeypatch.setattr(mail, name, "x")
+    return lambda name, value: monkeypatch.setattr(mail, name, value)
+
+
+def test_bad_mail_settings_are_reported(settings):
+    assert mail.mail_settings_error() is None
+
+    settings("MAIL_PORT", "smtp")
+    assert "MAIL_PORT" in mail.mail_settings_error()
+
+    settings("MAIL_PORT", None)
+    assert mail.mail_settings_error() == "Mail settings missing: MAIL_PORT"
+
+
+def test_missing_settings_warn_at_startup_and_fail_on_send(settings, caplog):
+    settings("MAIL_USERNAME", "")
+    with caplog.at_level(logging.WARNING, logger="services.mail"):
+        assert mail.check_mail_settings() is False
+    assert "MAIL_USERNAME" in caplog.text
+
+    with pytest.raises(RuntimeError, match="MAIL_USERNAME"):
+        asyncio.run(mail.email_service.send_email("a@b.com", "subject", "body"))
+
+
+def test_app_boots_without_mail_settings(settings):
+    settings("MAIL_SERVER", None)
+    with TestClient(app) as client:
+        assert client.get("/").status_code == 200
@@ -0,0 +1,33 @@
+from fastapi.testclient import TestClient
+
+import config
+from main import app
+
+
+def test_pool_metrics_need_the_token(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(config, "METRICS_TOKEN", None)
+    assert client.get("/metrics/db-pool").status_code == 404
+
+    monkeypatch.setattr(config, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics/db-pool").status_code == 401
+    assert client.get(
+        "/metrics/db-pool", headers={"Authorization": "Bearer wrong"}
+    ).status_code == 401
+    response = client.get("/metrics/db-pool", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert "primary" in response.json()
+
+
+def test_metrics_report_pool_and_token_cache(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(config, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(config, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    body = response.json()
+    assert "primary" in body["db_pool"]
+    assert set(body["token_decode_cache"]) == {"size", "maxsize", "hits", "misses"}
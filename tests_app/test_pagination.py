@@ -0,0 +1,84 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from crud.pagination import (
+    PAGE_SIZE_MAX,
+    PageParams,
+    decode_cursor,
+    encode_cursor,
+)
+from crud.staff import staff_crud
+from main import app
+from models.role import Role
+from models.staff import Staff, StaffStatus
+from models.user import User
+
+STAFF = 7
+
+
+@pytest.fixture
+def store_id(db, make_store):
+    store = make_store("page")
+    role = db.query(Role).filter(Role.name == "Sales Rep").one()
+    for n in range(STAFF):
+        user = User(
+            username=f"page{store.suffix}-{n}", email=f"page{store.suffix}-{n}@mail.com"
+        )
+        db.add(user)
+        db.flush()
+        db.add(
+            Staff(
+                user_id=user.id,
+                store_id=store.id,
+                role_id=role.id,
+                status=StaffStatus.ACTIVE,
+                is_active=True,
+            )
+        )
+    db.commit()
+    return store.id
+
+
+def test_pages_cover_every_row_once(db, store_id):
+    seen = []
+    cursor = None
+    while True:
+        page = staff_crud.get_all_store_staffs(db, store_id, PageParams(cursor, 3))
+        assert len(page.items) <= 3
+        seen.extend(staff.id for staff in page.items)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    assert len(seen) == STAFF
+    assert seen == sorted(seen)
+
+
+def test_last_full_page_has_no_cursor(db, store_id):
+    page = staff_crud.get_all_store_staffs(db, store_id, PageParams(limit=STAFF))
+    assert len(page.items) == STAFF
+    assert page.next_cursor is None
+
+
+def test_cursor_round_trip():
+    value = uuid.uuid4()
+    assert decode_cursor(encode_cursor([value]), [Staff.id]) == [value]
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(["a", "b"])])
+def test_bad_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, [Staff.id])
+    assert error.value.status_code == 400
+
+
+def test_page_size_is_capped():
+    with TestClient(app) as client:
+        response = client.get("/v1/users/", params={"limit": PAGE_SIZE_MAX + 1})
+        assert response.status_code == 422
+        response = client.get("/v1/users/", params={"limit": 1})
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        assert "X-Next-Cursor" in response.headers
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from passlib.hash import bcrypt
+
+from dependencies import auth
+from dependencies.auth import BCRYPT_ROUNDS, PasswordHasher
+from models.user import User
+from services.auth import AuthService
+
+
+def test_full_queue_is_turned_away_with_503(monkeypatch):
+    release = threading.Event()
+
+    def slow_hash(password):
+        release.wait(5)
+        return f"hashed {password}"
+
+    monkeypatch.setattr(auth, "get_password_hash", slow_hash)
+    hasher = PasswordHasher(workers=1, queue_limit=1)
+
+    async def main():
+        running = asyncio.create_task(hasher.hash("a"))
+        queued = asyncio.create_task(hasher.hash("b"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as error:
+            await hasher.hash("c")
+        release.set()
+        return error.value, await running, await queued
+
+    error, *hashed = asyncio.run(main())
+    assert error.status_code == 503
+    assert error.headers == {"Retry-After": "1"}
+    assert hashed == ["hashed a", "hashed b"]
+
+
+def test_login_rehashes_passwords_below_the_current_cost(db):
+    suffix = uuid.uuid4().hex[:8]
+    # Hashed before BCRYPT_ROUNDS was raised
+    user = User(
+        username=f"rehash{suffix}",
+        email=f"rehash{suffix}@mail.com",
+        password_hash=bcrypt.using(rounds=4).hash("pw"),
+    )
+    db.add(user)
+    db.commit()
+
+    asyncio.run(AuthService.authenticate_user(db, user.email, "pw"))
+    db.refresh(user)
+    upgraded = user.password_hash
+    assert bcrypt.from_string(upgraded).rounds == BCRYPT_ROUNDS
+    assert bcrypt.verify("pw", upgraded)
+
+    # Already current, so the next login leaves it alone
+    asyncio.run(AuthService.authenticate_user(db, user.email, "pw"))
+    db.refresh(user)
+    assert user.password_hash == upgraded
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database.database import SessionLocal
+from database.query_stats import track_queries
+from main import app
+from models.role import Role
+from models.staff import Staff, StaffStatus
+from services.permission import permission_cache, permission_service
+from tests_app.utils import register_store
+
+
+@pytest.fixture
+def staff(db, make_store):
+    store = make_store("perm")
+    role = db.query(Role).filter(Role.name == "Manager").first()
+    staff = Staff(
+        user_id=store.owner_id,
+        store_id=store.id,
+        role_id=role.id,
+        status=StaffStatus.ACTIVE,
+        is_active=True,
+    )
+    db.add(staff)
+    db.commit()
+    permission_cache.clear()
+    return staff
+
+
+def test_permission_check_is_one_round_trip(db, staff):
+    staff_id = staff.id
+    checks = [
+        lambda: permission_service.has_permission(db, staff_id, "products.view"),
+        lambda: permission_service.has_any_permission(
+            db, staff_id, ["staff.view", "sales.view"]
+        ),
+        lambda: permission_service.has_all_permissions(
+            db, staff_id, ["products.view", "sales.create"]
+        ),
+        lambda: permission_service.can(db, staff_id, "edit", "products"),
+    ]
+    for check in checks:
+        permission_cache.clear()
+        with track_queries() as stats:
+            assert check() is True
+        assert stats.count == 1
+
+
+def test_cached_permission_check_skips_database(db, staff):
+    staff_id = staff.id
+    permission_service.has_permission(db, staff_id, "products.view")
+    with track_queries() as stats:
+        assert permission_service.has_permission(db, staff_id, "products.view")
+    assert stats.count == 0
+
+
+def test_store_access_reads_the_cache(db, staff):
+    email, store_id = staff.user.email, staff.store_id
+    with track_queries() as stats:
+        user, resolved, permissions = permission_service.resolve_store_access(
+            db, email, store_id
+        )
+    assert resolved.id == staff.id and "products.view" in permissions
+    assert stats.count == 2
+    with track_queries() as stats:
+        assert permission_service.resolve_store_access(db, email, store_id)[2] == permissions
+    assert stats.count == 1
+
+
+def test_overrides_invalidate_cache(db, staff):
+    assert not permission_service.has_permission(db, staff.id, "staff.view")
+    permission_service.grant_permission_override(db, staff.id, "staff.view")
+    assert permission_service.has_permission(db, staff.id, "staff.view")
+
+    permission_service.deny_permission_override(db, staff.id, "products.view")
+    assert not permission_service.has_permission(db, staff.id, "products.view")
+
+    permission_service.remove_permission_override(db, staff.id, "products.view")
+    assert permission_service.has_permission(db, staff.id, "products.view")
+
+
+def test_expired_override_stops_applying(db, staff):
+    permission_service.grant_permission_override(
+        db,
+        staff.id,
+        "staff.view",
+        expires_at=datetime.utcnow() + timedelta(seconds=1),
+    )
+    assert permission_service.has_permission(db, staff.id, "staff.view")
+    _, valid_until = permission_service.resolve_staff_permissions(db, staff.id)
+    assert valid_until is not None
+    assert valid_until <= datetime.utcnow() + timedelta(seconds=1)
+
+
+def test_role_change_outlives_a_read_before_its_commit(db, staff):
+    staff_id = staff.id
+
+    def concurrent_read(session):
+        # Another request resolves the committed, still old, role
+        other = SessionLocal()
+        try:
+            permission_service.get_staff_permissions(other, staff_id)
+        finally:
+            other.close()
+
+    with TestClient(app) as client:
+        store = register_store(client, "role")
+        staff.store_id = store.id
+        db.commit()
+        event.listen(Session, "before_commit", concurrent_read)
+        try:
+            response = client.patch(
+                f"/v1/store/{store.id}/staff",
+                json={"staff_id": str(staff_id), "role": "Sales Rep"},
+                headers=store.headers,
+            )
+        finally:
+            event.remove(Session, "before_commit", concurrent_read)
+    assert response.status_code == 200
+    assert not permission_service.has_permission(db, staff_id, "products.edit")
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from crud.inventory import inventory_crud
+from database.query_stats import track_queries
+from schemas.inventory import InventoryCreate, InventoryUpdate
+from services.product_search import ProductSearchService, product_search_service
+
+
+@pytest.fixture
+def store(db, make_store):
+    store = make_store("search")
+    db.commit()
+    return store.id, store.owner_id, store.suffix
+
+
+def create(db, store, product_name, sku, description=None):
+    store_id, owner_id, suffix = store
+    return asyncio.run(
+        inventory_crud.create_inventory(
+            db,
+            InventoryCreate(
+                product_name=product_name,
+                cost_price=1,
+                selling_price=2,
+                sku=f"{sku}-{suffix}",
+                quantity=10,
+                description=description,
+            ),
+            owner_id,
+            store_id,
+            file=None,
+        )
+    )
+
+
+def test_search_matches_name_sku_and_description(db, store):
+    store_id = store[0]
+    create(db, store, "Whole Milk", "DAIRY-QX")
+    create(db, store, "Bread", "BAKE-QZ", description="sliced wholemeal loaf")
+    create(db, store, "Eggs", "DAIRY-QY")
+
+    names = lambda q: [
+        item.product_name for item in ProductSearchService.search(db, store_id, q).items
+    ]
+    assert names("whole") == ["Bread", "Whole Milk"]
+    assert names("whole mil") == ["Whole Milk"]
+    assert names("dairy") == ["Eggs", "Whole Milk"]
+    assert names("dairy-qx") == ["Whole Milk"]
+    assert names("cheese") == []
+
+
+def test_autocomplete_follows_crud_changes(db, store):
+    store_id = store[0]
+    product_search_service.invalidate(store_id)
+    milk = create(db, store, "Whole Milk", "DAIRY-1")
+
+    suggest = lambda q: [
+        item["product_name"] for item in product_search_service.suggest(db, store_id, q)
+    ]
+    assert suggest("mi") == ["Whole Milk"]
+    create(db, store, "Mint Tea", "TEA-1")
+    asyncio.run(
+        inventory_crud.update_inventory(
+            db, milk.id, InventoryUpdate(product_name="Skimmed Milk"), file=None
+        )
+    )
+    # Served from memory: no queries once the store's index is built
+    with track_queries() as stats:
+        assert sorted(suggest("mi")) == ["Mint Tea", "Skimmed Milk"]
+        assert suggest("whole") == []
+        assert suggest("dairy") == ["Skimmed Milk"]
+    assert stats.count == 0
+
+    inventory_crud.delete_inventory(db, milk.id)
+    assert suggest("mi") == ["Mint Tea"]
@@ -0,0 +1,108 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from database.database import SessionLocal
+from database.query_stats import track_queries
+from main import app
+from models.inventory import Inventory
+from models.role import Role
+from models.sales import Sale, SaleItem
+from models.staff import Staff, StaffStatus
+from models.store import Store
+from models.user import User
+from tests_app.utils import assert_query_budget, register_store
+
+ROWS = 8
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def store(client):
+    """A store with ROWS staff and ROWS sales, plus an owner token"""
+    store_id, headers, suffix = register_store(client, "budget")
+
+    db = SessionLocal()
+    owner = db.query(User).filter(User.email == f"budget{suffix}@mail.com").one()
+    role = db.query(Role).filter(Role.name == "Sales Rep").one()
+    item = Inventory(
+        product_name="Milk",
+        selling_price=2,
+        sku=f"budget-{suffix}",
+        quantity=100,
+        created_by=owner.id,
+        store_id=store_id,
+    )
+    db.add(item)
+    for n in range(ROWS):
+        user = User(username=f"budget{suffix}-{n}", email=f"budget{suffix}-{n}@mail.com")
+        db.add(user)
+        db.flush()
+        db.add(
+            Staff(
+                user_id=user.id,
+                store_id=store_id,
+                role_id=role.id,
+                status=StaffStatus.ACTIVE,
+                is_active=True,
+            )
+        )
+        sale = Sale(
+            store_id=store_id,
+            total_amount=2,
+            amount_paid=2,
+            change_given=0,
+            outstanding_balance=0,
+            payment_method="cash",
+            created_by=owner.id,
+        )
+        db.add(sale)
+        db.flush()
+        db.add(
+            SaleItem(
+                sale_id=sale.id,
+                inventory_id=item.id,
+                quantity=1,
+                price=2,
+                product_name="Milk",
+            )
+        )
+    db.commit()
+    owner_id = owner.id
+    db.close()
+    return {"id": store_id, "owner_id": owner_id, "headers": headers}
+
+
+@pytest.mark.parametrize(
+    "path, budget",
+    [
+        ("/v1/store/{id}/staff", 6),
+        ("/v1/store/{id}/sales/", 6),
+        ("/v1/store/{id}/inventory", 6),
+        ("/v1/users/{owner_id}", 6),
+    ],
+)
+def test_endpoint_query_budget(client, store, path, budget):
+    response = client.get(path.format(**store), headers=store["headers"])
+    assert response.status_code == 200, response.text
+    assert_query_budget(response, budget)
+
+
+def test_repeated_statements_are_reported():
+    db = SessionLocal()
+    with track_queries() as stats:
+        db.query(Store).limit(1).all()
+        for _ in range(3):
+            db.query(User).filter(User.id == uuid.uuid4()).first()
+    db.close()
+    assert stats.count == 4
+    assert stats.duration > 0
+    [(shape, count)] = stats.repeated(threshold=2)
+    assert count == 3
+    assert shape.startswith("SELECT users.id")
@@ -0,0 +1,272 @@
+"""EXPLAIN every hot CRUD query against a realistically sized database.
+
+The seed is written with set-based SQL into a throwaway schema that the
+engine's connections point at for this module only, and is dropped
+afterwards. A query fails the suite if its plan sequentially scans one of
+the large tables; tiny lookup tables (roles, permissions) are allowed to.
+"""
+import re
+
+import pytest
+from sqlalchemy import event, text
+
+import main  # noqa: F401  (registers every model mapper)
+from crud.inventory import inventory_crud
+from crud.pagination import PageParams, paginate
+from crud.sales import SalesCRUD
+from crud.staff import staff_crud
+from crud.store import store_crud
+from crud.user import user_crud
+from database.database import SessionLocal, engine
+from database.schema import ensure_schema
+from services.expiry import expiry_service
+from services.low_stock import low_stock_service
+from services.permission import permission_service
+from services.product_search import product_search_service
+
+USERS = 20000
+STORES = 2000
+INVENTORY_PER_STORE = 50
+SALES_PER_STORE = 25
+ITEMS_PER_SALE = 2
+LARGE_TABLES = {
+    "users",
+    "stores",
+    "staffs",
+    "inventory",
+    "sales",
+    "sale_items",
+    "staff_permission_overrides",
+    "revoked_tokens",
+}
+PLAN_SCHEMA = "plan_seed"
+
+SEED_SQL = [
+    f"""
+    INSERT INTO users (id, username, email, is_active, token_version)
+    SELECT gen_random_uuid(), 'plan-seed-user-' || n, 'plan-seed-user-' || n || '@mail.com',
+           true, 0
+    FROM generate_series(1, {USERS}) AS n
+    """,
+    f"""
+    INSERT INTO stores (id, name, no_of_staffs, user_id)
+    SELECT gen_random_uuid(), 'plan-seed-store-' || u.n, '10', u.id
+    FROM (
+        SELECT id, row_number() OVER (ORDER BY id) AS n FROM users
+        WHERE email LIKE 'plan-seed-user-%%'
+    ) AS u
+    WHERE u.n <= {STORES}
+    """,
+    """
+    INSERT INTO staffs (id, role_id, user_id, store_id, status, is_active)
+    SELECT gen_random_uuid(), (SELECT id FROM roles WHERE name = 'Manager'), u.id,
+           s.id, 'ACTIVE', true
+    FROM (
+        SELECT id, row_number() OVER (ORDER BY id) AS n FROM users
+        WHERE email LIKE 'plan-seed-user-%%'
+    ) AS u
+    JOIN (
+        SELECT id, row_number() OVER (ORDER BY id) AS n FROM stores
+        WHERE name LIKE 'plan-seed-store-%%'
+    ) AS s ON s.n = (u.n %% %(stores)s) + 1
+    """,
+    f"""
+    INSERT INTO inventory (id, product_name, selling_price, cost_price, sku, quantity,
+                           low_stock_threshold, status, created_by, is_active, store_id,
+                           low_stock_since)
+    SELECT gen_random_uuid(), 'product ' || i, 10, 5, s.id || '-' || i, i %% 40, 5,
+           'available', s.user_id, i %% 10 <> 0, s.id,
+           CASE WHEN i %% 40 <= 5 THEN now() - (i || ' minutes')::interval END
+    FROM stores AS s, generate_series(1, {INVENTORY_PER_STORE}) AS i
+    WHERE s.name LIKE 'plan-seed-store-%%'
+    """,
+    f"""
+    INSERT INTO sales (id, store_id, total_amount, amount_paid, change_given,
+                       outstanding_balance, payment_method, created_by, created_at,
+                       is_deleted)
+    SELECT gen_random_uuid(), s.id, 20, 20, 0, 0, 'cash', s.user_id,
+           now() - (i || ' hours')::interval, i %% 20 = 0
+    FROM stores AS s, generate_series(1, {SALES_PER_STORE}) AS i
+    WHERE s.name LIKE 'plan-seed-store-%%'
+    """,
+    f"""
+    WITH first_item AS (
+        SELECT DISTINCT ON (store_id) store_id, id FROM inventory ORDER BY store_id, id
+    )
+    INSERT INTO sale_items (id, sale_id, inventory_id, quantity, price, product_name)
+    SELECT gen_random_uuid(), sa.id, fi.id, 1, 10, 'product'
+    FROM sales AS sa
+    JOIN first_item AS fi ON fi.store_id = sa.store_id,
+    generate_series(1, {ITEMS_PER_SALE})
+    """,
+    """
+    INSERT INTO staff_permission_overrides (id, staff_id, permission_id, granted, expires_at)
+    SELECT gen_random_uuid(), st.id, (SELECT id FROM permissions WHERE name = 'staff.view'),
+           true, now() + interval '1 day'
+    FROM staffs AS st
+    """,
+]
+
+
+class StatementRecorder:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self)
+
+
+def use_plan_schema(dbapi_connection, connection_record, connection_proxy):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"SET search_path TO {PLAN_SCHEMA}")
+    cursor.close()
+    dbapi_connection.commit()
+
+
+@pytest.fixture(scope="module")
+def plan_schema():
+    """Point every pooled connection at an empty schema; drop it afterwards"""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {PLAN_SCHEMA} CASCADE")
+        conn.exec_driver_sql(f"CREATE SCHEMA {PLAN_SCHEMA}")
+    engine.dispose()
+    event.listen(engine, "checkout", use_plan_schema)
+    try:
+        yield
+    finally:
+        event.remove(engine, "checkout", use_plan_schema)
+        # Pooled connections keep their search_path, so start over
+        engine.dispose()
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {PLAN_SCHEMA} CASCADE")
+
+
+@pytest.fixture(scope="module")
+def seeded(plan_schema):
+    ensure_schema()
+    with engine.begin() as conn:
+        for statement in SEED_SQL:
+            conn.exec_driver_sql(statement, {"stores": STORES})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+    db = SessionLocal()
+    store_id, owner_id, owner_email = db.execute(
+        text(
+            "SELECT s.id, s.user_id, u.email FROM stores s JOIN users u ON u.id = s.user_id"
+            " WHERE s.name = 'plan-seed-store-1'"
+        )
+    ).one()
+    staff_id, staff_user_id, staff_store_id = db.execute(
+        text("SELECT id, user_id, store_id FROM staffs WHERE store_id = :store_id LIMIT 1"),
+        {"store_id": store_id},
+    ).one()
+    inventory_id = db.execute(
+        text("SELECT id FROM inventory WHERE store_id = :store_id LIMIT 1"),
+        {"store_id": store_id},
+    ).scalar_one()
+    staff_email = db.execute(
+        text("SELECT email FROM users WHERE id = :id"), {"id": staff_user_id}
+    ).scalar_one()
+    first_page = PageParams(limit=10)
+    cursors = {
+        "inventory_cursor": inventory_crud.get_inventory_by_store_id(
+            db, store_id, first_page
+        ).next_cursor,
+        "sales_cursor": sales_page(db, store_id, first_page).next_cursor,
+        "users_cursor": user_crud.get_users(db, first_page).next_cursor,
+    }
+    yield db, {
+        "store_id": store_id,
+        "owner_id": owner_id,
+        "owner_email": owner_email,
+        "staff_id": staff_id,
+        "staff_user_id": staff_user_id,
+        "staff_store_id": staff_store_id,
+        "staff_email": staff_email,
+        "inventory_id": inventory_id,
+        **cursors,
+    }
+    db.close()
+
+
+def sales_page(db, store_id, page=PageParams()):
+    # The statements AsyncSalesCRUD runs, explained on the sync engine
+    return paginate(
+        db, SalesCRUD.store_sales(store_id), SalesCRUD.PAGE_KEYS, page, descending=True
+    )
+
+
+CRUD_QUERIES = {
+    "inventory_by_store": lambda db, ids: inventory_crud.get_inventory_by_store_id(
+        db, ids["store_id"]
+    ),
+    "inventory_by_id": lambda db, ids: inventory_crud.get_inventory_by_id(
+        db, ids["inventory_id"]
+    ),
+    "inventory_page": lambda db, ids: inventory_crud.get_inventory_by_store_id(
+        db, ids["store_id"], PageParams(ids["inventory_cursor"], 10)
+    ),
+    "expiring": lambda db, ids: expiry_service.get_expiring(db, ids["store_id"], 7),
+    "low_stock": lambda db, ids: low_stock_service.get_low_stock(db, ids["store_id"]),
+    "product_search": lambda db, ids: product_search_service.search(
+        db, ids["store_id"], "product 1"
+    ),
+    "sales_by_store": lambda db, ids: sales_page(db, ids["store_id"]),
+    "sales_page": lambda db, ids: sales_page(
+        db, ids["store_id"], PageParams(ids["sales_cursor"], 10)
+    ),
+    "sales_stats": lambda db, ids: db.execute(SalesCRUD.stats_query(ids["store_id"])),
+    "staff_by_id": lambda db, ids: staff_crud.get_staff_by_id(db, ids["staff_id"]),
+    "staff_by_user_id": lambda db, ids: staff_crud.get_staff_by_user_id(
+        db, ids["staff_store_id"], ids["staff_user_id"]
+    ),
+    "store_staffs": lambda db, ids: staff_crud.get_all_store_staffs(
+        db, ids["store_id"]
+    ),
+    "store_by_id": lambda db, ids: store_crud.get_store_by_id(db, ids["store_id"]),
+    "store_by_owner": lambda db, ids: store_crud.get_store_by_owner(
+        db, ids["owner_id"]
+    ),
+    "user_by_email": lambda db, ids: user_crud.get_user_by_email(
+        db, ids["owner_email"]
+    ),
+    "user_by_id": lambda db, ids: user_crud.get_user_by_id(db, ids["owner_id"]),
+    "users_page": lambda db, ids: user_crud.get_users(
+        db, PageParams(ids["users_cursor"], 10)
+    ),
+    "staff_permissions": lambda db, ids: permission_service.resolve_staff_permissions(
+        db, ids["staff_id"]
+    ),
+    "store_access": lambda db, ids: permission_service.resolve_store_access(
+        db, ids["staff_email"], ids["staff_store_id"]
+    ),
+    "permission_overrides": lambda db, ids: permission_service.get_staff_permission_details(
+        db, ids["staff_id"]
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(CRUD_QUERIES))
+def test_crud_query_uses_indexes(seeded, name):
+    db, ids = seeded
+    db.expunge_all()
+    with StatementRecorder() as recorder:
+        CRUD_QUERIES[name](db, ids)
+    assert recorder.statements
+
+    with engine.connect() as conn:
+        for statement, parameters in recorder.statements:
+            plan = "\n".join(
+                row[0]
+                for row in conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            )
+            scanned = set(re.findall(r"Seq Scan on (\w+)", plan)) & LARGE_TABLES
+            assert not scanned, f"{name} scans {scanned}:\n{statement}\n{plan}"
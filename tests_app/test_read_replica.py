@@ -0,0 +1,101 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+import database.database as database
+from database.database import DATABASE_URL, READ_PRIMARY_COOKIE, READ_PRIMARY_HEADER, Base
+from main import app
+from middleware import middleware
+from models.store import Store
+from tests_app.utils import register_store
+
+
+@pytest.fixture(scope="module")
+def replica_url():
+    """A second, empty database with every table, standing in for a replica"""
+    url = make_url(DATABASE_URL)
+    url = url.set(database=f"{url.database}_replica")
+    admin = create_engine(DATABASE_URL, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.exec_driver_sql(f"DROP DATABASE IF EXISTS {url.database}")
+        conn.exec_driver_sql(f"CREATE DATABASE {url.database}")
+    replica = create_engine(url)
+    Base.metadata.create_all(replica)
+    replica.dispose()
+    yield url.render_as_string(hide_password=False)
+    with admin.connect() as conn:
+        conn.exec_driver_sql(f"DROP DATABASE IF EXISTS {url.database} WITH (FORCE)")
+    admin.dispose()
+
+
+@pytest.fixture
+def replica(replica_url, monkeypatch):
+    """Route reads the way REPLICA_DATABASE_URL=replica_url does at startup"""
+    engine = create_engine(replica_url)
+    monkeypatch.setattr(database, "REPLICA_DATABASE_URL", replica_url)
+    monkeypatch.setattr(
+        database,
+        "ReadSessionLocal",
+        sessionmaker(autocommit=False, autoflush=False, bind=database._read_only(engine)),
+    )
+    monkeypatch.setattr(middleware, "READ_YOUR_WRITES_SECONDS", 1)
+    # The async replica engine is built on first use, so set aside any built earlier
+    registries = (database._async_engines, database._async_session_factories)
+    saved = [registry.pop("replica", None) for registry in registries]
+    yield
+    for registry, previous in zip(registries, saved):
+        registry.pop("replica", None)
+        if previous is not None:
+            registry["replica"] = previous
+    engine.dispose()
+
+
+def test_reads_go_to_the_primary_only_right_after_a_write(replica, db):
+    with TestClient(app) as client:
+        store = register_store(client, "replica")
+        owner_id = db.scalar(select(Store.user_id).where(Store.id == store.id))
+        item = client.post(
+            f"/v1/store/{store.id}/inventory/",
+            data={
+                "product_name": "Milk",
+                "cost_price": 1,
+                "selling_price": 2,
+                "sku": f"replica-{store.suffix}",
+                "quantity": 5,
+            },
+            headers=store.headers,
+        ).json()["inventory"]
+        sale = client.post(
+            f"/v1/store/{store.id}/sales/",
+            json={
+                "store_id": store.id,
+                "items": [
+                    {"inventory_id": item["id"], "quantity": 1, "price": 2, "product_name": "Milk"}
+                ],
+                "payment_method": "cash",
+                "amount_paid": 2,
+                "staff_id": str(owner_id),
+            },
+            headers=store.headers,
+        )
+        assert sale.status_code == 201
+        assert READ_PRIMARY_COOKIE in client.cookies
+
+        def reads(headers=store.headers):
+            """(search hits, sales) as seen by the sync and async read sessions"""
+            search = client.get(
+                f"/v1/store/{store.id}/inventory/search", params={"q": "Milk"}, headers=headers
+            )
+            sales = client.get(f"/v1/store/{store.id}/sales/", headers=headers)
+            return len(search.json()["inventory"]), len(sales.json())
+
+        # Within READ_YOUR_WRITES_SECONDS the client sees its own writes
+        assert reads() == (1, 1)
+        time.sleep(1.1)
+        # Then it reads the replica, which never received them
+        assert reads() == (0, 0)
+        assert reads({**store.headers, READ_PRIMARY_HEADER: "1"}) == (1, 1)
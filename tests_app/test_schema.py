@@ -0,0 +1,34 @@
+from sqlalchemy import func, select
+
+from database.database import engine
+from database.query_stats import track_queries
+from database.schema import ensure_schema, schema_fingerprint, schema_version
+from database.seed_data import PERMISSIONS, seed_data
+from models.role import Permission, Role, role_permissions
+
+
+def test_matching_schema_version_is_one_query():
+    ensure_schema()
+    with track_queries() as stats:
+        assert ensure_schema() is False
+    assert stats.count == 1
+
+
+def test_fingerprint_is_stored():
+    with engine.connect() as conn:
+        stored = conn.execute(select(schema_version.c.version)).scalar_one()
+    assert stored == schema_fingerprint()
+
+
+def test_reseeding_is_idempotent():
+    def counts():
+        with engine.connect() as conn:
+            return [
+                conn.execute(select(func.count()).select_from(table)).scalar_one()
+                for table in (Permission, Role, role_permissions)
+            ]
+
+    before = counts()
+    seed_data()
+    assert counts() == before
+    assert before[0] >= len(PERMISSIONS)
@@ -0,0 +1,127 @@
+import asyncio
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from crud.inventory import inventory_crud
+from crud.sales import async_sales_crud
+from database.database import SessionLocal, get_async_database_url
+from models.inventory import Inventory
+from models.stock import StockMovement, StockMovementReason, StockSnapshot
+from schemas.inventory import InventoryBatchUpdateItem, InventoryCreate, InventoryUpdate
+from schemas.sales import SaleCreate, SaleItem
+from services.stock_ledger import stock_ledger_service
+
+
+def now(db):
+    at = db.scalar(select(func.clock_timestamp()))
+    db.commit()
+    return at
+
+
+def test_stock_at_a_point_in_time(db, make_store):
+    store_id, owner_id, _, suffix = make_store("ledger")
+    db.commit()
+
+    before = now(db)
+    item = asyncio.run(
+        inventory_crud.create_inventory(
+            db,
+            InventoryCreate(
+                product_name="Rice", cost_price=1, selling_price=2, sku=f"ledger-{suffix}", quantity=10
+            ),
+            owner_id,
+            store_id,
+            file=None,
+        )
+    )
+    created = now(db)
+    asyncio.run(
+        inventory_crud.update_inventory(
+            db, item.id, InventoryUpdate(quantity=4), file=None, updated_by=owner_id
+        )
+    )
+    snapshot_at = now(db)
+    assert stock_ledger_service.take_snapshots(db, snapshot_at) >= 1
+    db.commit()
+    inventory_crud.batch_update_inventory(
+        db, store_id, [InventoryBatchUpdateItem(inventory_id=item.id, quantity=7)]
+    )
+
+    def quantity_at(at):
+        return {row.id: row.quantity for row in stock_ledger_service.quantities_at(db, store_id, at)}
+
+    assert quantity_at(before) == {}
+    assert quantity_at(created) == {item.id: 10}
+    assert quantity_at(snapshot_at) == {item.id: 4}
+    # The latest snapshot plus the one movement after it
+    assert quantity_at(now(db)) == {item.id: 7}
+    assert db.scalar(
+        select(StockSnapshot.quantity).where(StockSnapshot.inventory_id == item.id)
+    ) == 4
+
+    movements = stock_ledger_service.get_movements(db, store_id, item.id).items
+    assert [(m.reason, m.delta) for m in movements] == [
+        (StockMovementReason.ADJUSTMENT, 3),
+        (StockMovementReason.ADJUSTMENT, -6),
+        (StockMovementReason.CREATE, 10),
+    ]
+    assert movements[1].created_by == owner_id
+
+
+def test_concurrent_sales_keep_the_ledger_in_step(db, make_store):
+    store_id, owner_id, _, suffix = make_store("race")
+    db.commit()
+    item = asyncio.run(
+        inventory_crud.create_inventory(
+            db,
+            InventoryCreate(
+                product_name="Salt", cost_price=1, selling_price=2, sku=f"race-{suffix}", quantity=10
+            ),
+            owner_id,
+            store_id,
+            file=None,
+        )
+    )
+    item_id = item.id
+
+    async def sell(sessions, quantity):
+        async with sessions() as session:
+            await async_sales_crud.create_sale(
+                session,
+                SaleCreate(
+                    store_id=store_id,
+                    items=[
+                        SaleItem(
+                            inventory_id=item_id, quantity=quantity, price=2, product_name="Salt"
+                        )
+                    ],
+                    payment_method="cash",
+                    amount_paid=2 * quantity,
+                    staff_id=owner_id,
+                ),
+                owner_id,
+            )
+
+    async def main():
+        # A private engine, so no pooled connection outlives this event loop
+        async_engine = create_async_engine(get_async_database_url(), poolclass=NullPool)
+        sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+        # Hold the row so both sales are in flight at once
+        holder = SessionLocal()
+        holder.execute(select(Inventory).where(Inventory.id == item_id).with_for_update())
+        sales = asyncio.gather(sell(sessions, 2), sell(sessions, 3))
+        await asyncio.sleep(0.3)
+        holder.commit()
+        holder.close()
+        await sales
+        await async_engine.dispose()
+
+    asyncio.run(main())
+
+    db.expire_all()
+    assert db.get(Inventory, item_id).quantity == 5
+    assert db.scalar(
+        select(func.sum(StockMovement.delta)).where(StockMovement.inventory_id == item_id)
+    ) == 5
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+import pytest
+from jose import jwt
+
+import config
+from config import create_access_token, decode_token
+from services.token_cache import TokenDecodeCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = TokenDecodeCache(maxsize=10)
+    monkeypatch.setattr(config, "token_decode_cache", cache)
+    return cache
+
+
+def test_repeat_token_is_served_from_the_cache(cache):
+    token = create_access_token({"sub": "cache@mail.com"})
+    claims = decode_token(token)
+    assert claims["sub"] == "cache@mail.com"
+    assert cache.stats() == {"size": 1, "maxsize": 10, "hits": 0, "misses": 1}
+
+    assert decode_token(token) == claims
+    assert cache.stats()["hits"] == 1
+
+
+def test_invalid_token_is_not_cached(cache):
+    assert decode_token("not-a-token") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_expired_claims_are_never_served(cache):
+    token = create_access_token({"sub": "cache@mail.com"}, timedelta(seconds=-1))
+    assert decode_token(token) is None
+    # Claims cached while the token was still valid
+    cache.set(token, jwt.get_unverified_claims(token))
+    assert decode_token(token) is None
+    assert cache.stats() == {"size": 0, "maxsize": 10, "hits": 0, "misses": 2}
@@ -0,0 +1,33 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects.postgresql import insert
+
+from models.token_blacklist import TokenBlacklist
+from services.token_revocation import TokenRevocationService
+
+
+def claims():
+    expires = datetime.utcnow() + timedelta(hours=1)
+    return {"jti": str(uuid.uuid4()), "exp": expires.timestamp()}
+
+
+def test_other_workers_pick_up_revocations(db):
+    worker, other = TokenRevocationService(sync_interval=0), TokenRevocationService(sync_interval=0)
+    first, second = claims(), claims()
+    worker.revoke(db, [first])
+    assert other.is_revoked(db, first["jti"])
+
+    # Committed late, stamped before the other worker's last read
+    late = str(uuid.uuid4())
+    db.execute(
+        insert(TokenBlacklist).values(
+            jti=late,
+            expires_at=datetime.utcnow() + timedelta(hours=1),
+            revoked_at=other._watermark - timedelta(milliseconds=1),
+        )
+    )
+    db.commit()
+    worker.revoke(db, [second])
+    assert other.is_revoked(db, second["jti"])
+    assert other.is_revoked(db, late)
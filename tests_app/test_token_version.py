@@ -0,0 +1,45 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from main import app
+from models.user import User
+
+
+def test_bumping_token_version_kills_issued_tokens(db):
+    suffix = uuid.uuid4().hex[:8]
+    email = f"ver{suffix}@mail.com"
+    with TestClient(app) as client:
+        client.post(
+            "/v1/users/register",
+            json={"username": f"ver{suffix}", "email": email, "password": "pw"},
+        )
+
+        def login():
+            body = client.post("/v1/users/login", json={"email": email, "password": "pw"}).json()
+            return body["user"]["id"], body["token"]
+
+        user_id, tokens = login()
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        assert client.get(f"/v1/users/{user_id}", headers=headers).status_code == 200
+
+        # What a password change or logout-everywhere does
+        db.execute(
+            update(User).where(User.email == email).values(token_version=User.token_version + 1)
+        )
+        db.commit()
+
+        assert client.get(f"/v1/users/{user_id}", headers=headers).status_code == 401
+        refreshed = client.post(
+            "/v1/users/token/refresh",
+            json={
+                "access_token": tokens["access_token"],
+                "refresh_token": tokens["refresh_token"],
+            },
+        )
+        assert refreshed.status_code == 401
+
+        _, tokens = login()
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        assert client.get(f"/v1/users/{user_id}", headers=headers).status_code == 200
@@ -0,0 +1,69 @@
+import uuid
+from typing import Dict, NamedTuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from models.store import Store
+from models.user import User
+
+
+class NewStore(NamedTuple):
+    id: UUID
+    owner_id: UUID
+    owner_email: str
+    suffix: str
+
+
+class RegisteredStore(NamedTuple):
+    id: str
+    headers: Dict[str, str]
+    suffix: str
+
+
+def create_store(db: Session, prefix: str) -> NewStore:
+    """An owner and their store, flushed but not committed.
+
+    Names carry a random suffix so tests never collide on unique columns.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    owner = User(username=f"{prefix}{suffix}", email=f"{prefix}{suffix}@mail.com")
+    db.add(owner)
+    db.flush()
+    store = Store(name=f"{prefix} store {suffix}", no_of_staffs="1", user_id=owner.id)
+    db.add(store)
+    db.flush()
+    return NewStore(store.id, owner.id, owner.email, suffix)
+
+
+def register_store(client, prefix: str) -> RegisteredStore:
+    """create_store through the API: register, log in and open a store"""
+    suffix = uuid.uuid4().hex[:8]
+    email = f"{prefix}{suffix}@mail.com"
+    client.post(
+        "/v1/users/register",
+        json={"username": f"{prefix}{suffix}", "email": email, "password": "pw"},
+    )
+    token = client.post(
+        "/v1/users/login", json={"email": email, "password": "pw"}
+    ).json()["token"]["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    store_id = client.post(
+        "/v1/store/",
+        json={"name": f"{prefix} store {suffix}", "category": "x", "no_of_staff": "1"},
+        headers=headers,
+    ).json()["store"]["id"]
+    return RegisteredStore(store_id, headers, suffix)
+
+
+def assert_query_budget(response, max_queries: int):
+    """Fail if a request ran more SQL statements than its budget.
+
+    Reads the X-DB-Query-Count header set by the query stats middleware.
+    """
+    count = int(response.headers["X-DB-Query-Count"])
+    assert count <= max_queries, (
+        f"{response.request.method} {response.request.url.path} ran {count} "
+        f"queries, budget is {max_queries}"
+    )
+    return count